@@ -0,0 +1,152 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+
+from app_paths import user_cache_dir
+from image_cache import cover_size
+from lazy_import import LazyModule
+
+Image = LazyModule('PIL.Image')
+
+MAGIC = b"AUSTBG\x00\x01"
+# Bump whenever the file layout or the scaling below changes
+ASSET_VERSION = 1
+
+# Window sizes worth having ready: the app's default geometry plus the
+# common screen resolutions a maximized window lands close to
+COMMON_SIZES = (
+    (1200, 800), (1280, 720), (1366, 768), (1440, 900),
+    (1536, 864), (1600, 900), (1920, 1080), (2560, 1440),
+)
+
+# Bitmaps start on page boundaries so each one maps cleanly
+ALIGN = 4096
+
+# A bitmap may be up to this much larger than the window in each dimension;
+# the canvas centres it, so the extra is simply cropped off-screen
+MAX_OVERSCAN = 1.25
+
+
+def default_cache_path():
+    return user_cache_dir("assets", "backgrounds.rgba")
+
+
+def source_hashes(theme_images):
+    hashes = {}
+    for theme, path in sorted(theme_images.items()):
+        with open(path, 'rb') as f:
+            hashes[theme] = hashlib.sha256(f.read()).hexdigest()
+    return hashes
+
+
+def build_assets(theme_images, path=None, sizes=COMMON_SIZES):
+    # Decode each theme once and write a window-sized RGBA bitmap for every
+    # size; the file is replaced atomically. Returns (bitmaps, bytes).
+    path = path or default_cache_path()
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+
+    # Offsets depend only on the sizes, so the header can go first
+    entries = {}
+    position = 0
+    for theme in sorted(theme_images):
+        for width, height in sizes:
+            entries[f"{theme}:{width}x{height}"] = [position, width, height]
+            position += width * height * 4
+            position += -position % ALIGN
+    header = json.dumps({
+        "version": ASSET_VERSION,
+        "sources": source_hashes(theme_images),
+        "entries": entries,
+    }).encode('utf-8')
+    prefix = MAGIC + struct.pack('<I', len(header)) + header
+    prefix += b"\0" * (-len(prefix) % ALIGN)
+
+    fd, tmp_path = tempfile.mkstemp(prefix='.backgrounds-', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(prefix)
+            for theme in sorted(theme_images):
+                with Image.open(theme_images[theme]) as image:
+                    source = image.convert('RGBA')
+                for width, height in sizes:
+                    scaled = source.resize(cover_size(source.width, source.height, width, height),
+                                           Image.Resampling.LANCZOS)
+                    left = (scaled.width - width) // 2
+                    top = (scaled.height - height) // 2
+                    f.seek(len(prefix) + entries[f"{theme}:{width}x{height}"][0])
+                    f.write(scaled.crop((left, top, left + width, top + height)).tobytes())
+            f.truncate(len(prefix) + position)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return len(entries), len(prefix) + position
+
+
+class AssetCache:
+    # Pre-scaled theme backgrounds in one read-only memory-mapped file.
+    # lookup() wraps the mapped pixels in a PIL image without copying, so
+    # showing a background needs neither a PNG decode nor a resample.
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            self._mmap.close()
+            raise ValueError(f"{path} is not an asset cache")
+        (header_len,) = struct.unpack_from('<I', self._mmap, len(MAGIC))
+        start = len(MAGIC) + 4
+        header = json.loads(bytes(self._mmap[start:start + header_len]))
+        self.version = header["version"]
+        self.sources = header["sources"]
+        self.base = start + header_len + (-(start + header_len) % ALIGN)
+        self.entries = {}
+        for key, (offset, width, height) in header["entries"].items():
+            theme, _ = key.rsplit(":", 1)
+            self.entries.setdefault(theme, []).append((width, height, offset))
+
+    @classmethod
+    def open(cls, theme_images, path=None):
+        # The cache for these images, or None when it is missing, was built
+        # by another version, or any source image has changed since
+        path = path or default_cache_path()
+        try:
+            cache = cls(path)
+        except (OSError, ValueError, KeyError):
+            return None
+        if cache.version != ASSET_VERSION or cache.sources != source_hashes(theme_images):
+            cache.close()
+            return None
+        return cache
+
+    def sizes(self, theme):
+        return sorted((width, height) for width, height, _ in self.entries.get(theme, ()))
+
+    def lookup(self, theme, width, height):
+        # Smallest stored bitmap that covers the window without overshooting
+        # it by more than MAX_OVERSCAN, or None
+        best = None
+        for entry_width, entry_height, offset in self.entries.get(theme, ()):
+            if not (width <= entry_width <= width * MAX_OVERSCAN
+                    and height <= entry_height <= height * MAX_OVERSCAN):
+                continue
+            if best is None or entry_width * entry_height < best[0] * best[1]:
+                best = (entry_width, entry_height, offset)
+        if best is None:
+            return None
+        entry_width, entry_height, offset = best
+        start = self.base + offset
+        pixels = memoryview(self._mmap)[start:start + entry_width * entry_height * 4]
+        return Image.frombuffer('RGBA', (entry_width, entry_height), pixels, 'raw', 'RGBA', 0, 1)
+
+    def close(self):
+        try:
+            self._mmap.close()
+        except BufferError:
+            # Images returned by lookup() still point into the mapping; it is
+            # released when they are
+            pass
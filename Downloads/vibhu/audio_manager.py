@@ -0,0 +1,134 @@
+import os
+import threading
+
+from lazy_import import LazyModule
+
+pygame = LazyModule('pygame')
+
+# Decoded tracks are held in memory up to this many bytes; anything beyond it
+# is streamed from disk with pygame.mixer.music instead
+DEFAULT_MAX_BYTES = 160 * 1024 * 1024
+DEFAULT_FADE_MS = 1200
+
+# Two channels are reserved for music so narration and other sounds never
+# steal them; a crossfade fades one out while the other fades in
+MUSIC_CHANNELS = (0, 1)
+
+
+def sound_bytes(sound):
+    # Size of the decoded PCM buffer, without copying it out via get_raw()
+    frequency, size, channels = pygame.mixer.get_init()
+    return int(sound.get_length() * frequency) * channels * (abs(size) // 8)
+
+
+class MusicManager:
+    # Theme music with background preloading and gapless crossfades.
+    # Call only after pygame.mixer.init(); play/stop run on the Tk thread.
+    def __init__(self, track_paths, max_bytes=DEFAULT_MAX_BYTES, fade_ms=DEFAULT_FADE_MS):
+        self.track_paths = track_paths
+        self.max_bytes = max_bytes
+        self.fade_ms = fade_ms
+        self.current_theme = None
+        self._sounds = {}
+        self._sizes = {}
+        self._streamed = set()
+        self._lock = threading.Lock()
+        self._preloader = None
+        self._active = 0
+        self._streaming = False
+
+        pygame.mixer.set_reserved(len(MUSIC_CHANNELS))
+        self._channels = [pygame.mixer.Channel(i) for i in MUSIC_CHANNELS]
+
+    @property
+    def playing(self):
+        return self.current_theme is not None
+
+    def preload(self, first=None):
+        # Decode every track on a background thread, the given theme first
+        if self._preloader is not None:
+            return
+        order = sorted(self.track_paths, key=lambda theme: theme != first)
+        self._preloader = threading.Thread(target=self._preload, args=(order,),
+                                           name="music-preload", daemon=True)
+        self._preloader.start()
+
+    def _preload(self, order):
+        for theme in order:
+            path = self.track_paths[theme]
+            if not os.path.exists(path):
+                continue
+            try:
+                sound = pygame.mixer.Sound(path)
+            except Exception as e:
+                print(f"Could not preload music for {theme}: {e}")
+                continue
+            nbytes = sound_bytes(sound)
+            with self._lock:
+                if self.memory_used() + nbytes > self.max_bytes:
+                    # Over the cap: leave this track to be streamed from disk
+                    self._streamed.add(theme)
+                    continue
+                self._sounds[theme] = sound
+                self._sizes[theme] = nbytes
+
+        report = self.memory_report()
+        if report["tracks"] or report["streamed"]:
+            print(f"Preloaded {len(report['tracks'])} music tracks "
+                  f"({report['total_bytes'] / 2**20:.1f} MB of "
+                  f"{report['max_bytes'] / 2**20:.0f} MB cap); "
+                  f"streaming: {', '.join(report['streamed']) or 'none'}")
+
+    def memory_used(self):
+        return sum(self._sizes.values())
+
+    def memory_report(self):
+        with self._lock:
+            return {
+                "tracks": dict(self._sizes),
+                "streamed": sorted(self._streamed),
+                "total_bytes": self.memory_used(),
+                "max_bytes": self.max_bytes,
+            }
+
+    def play(self, theme):
+        # Crossfade to theme's track; a no-op if it is already playing
+        if theme == self.current_theme:
+            return True
+        path = self.track_paths.get(theme)
+        if path is None:
+            return False
+
+        with self._lock:
+            sound = self._sounds.get(theme)
+
+        self._fade_out_current()
+        if sound is not None:
+            self._active = 1 - self._active
+            self._channels[self._active].play(sound, loops=-1, fade_ms=self.fade_ms)
+        else:
+            # Not decoded (yet, or over the cap): stream it instead
+            try:
+                pygame.mixer.music.load(path)
+                pygame.mixer.music.play(-1, fade_ms=self.fade_ms)
+            except Exception as e:
+                print(f"Could not play music for {theme}: {e}")
+                self.current_theme = None
+                return False
+            self._streaming = True
+        self.current_theme = theme
+        return True
+
+    def stop(self):
+        self._fade_out_current()
+        self.current_theme = None
+
+    def _fade_out_current(self):
+        if self.current_theme is None:
+            return
+        if self._streaming:
+            # mixer.music.fadeout blocks until the fade ends, so just stop
+            pygame.mixer.music.stop()
+            self._streaming = False
+        else:
+            self._channels[self._active].fadeout(self.fade_ms)
@@ -0,0 +1,55 @@
+# Minimal stand-ins for the Tk objects the typewriter touches, so its own
+# per-frame cost can be measured without a display. Calls are counted, not
+# rendered, and `after` callbacks run only when the benchmark pumps them.
+
+
+class FakeText:
+    def __init__(self):
+        self.calls = 0
+        self.pending = []
+        self._next_id = 0
+
+    def after(self, delay, callback, *args):
+        self._next_id += 1
+        self.pending.append((self._next_id, callback, args))
+        return self._next_id
+
+    def after_cancel(self, after_id):
+        self.pending = [entry for entry in self.pending if entry[0] != after_id]
+
+    def pump(self):
+        # Run every queued callback, including ones they queue in turn
+        while self.pending:
+            _, callback, args = self.pending.pop(0)
+            callback(*args)
+
+    def _count(self, *args, **kwargs):
+        self.calls += 1
+
+    tag_configure = tag_remove = mark_set = mark_gravity = see = _count
+
+
+class FakeViewer:
+    # The StoryViewer surface used by TypewriterRenderer
+    def __init__(self):
+        self.text = FakeText()
+        self.generation = 0
+        self.paragraphs = 0
+        self.characters = 0
+
+    @property
+    def following(self):
+        return True
+
+    def clear(self):
+        self.generation += 1
+        self.paragraphs = self.characters = 0
+
+    def append(self, paragraph, tags=('body',)):
+        self.paragraphs += 1
+        self.characters += len(paragraph)
+        self.text.calls += 3
+        return f'{self.paragraphs}.0'
+
+    def see_end(self):
+        self.text.calls += 1
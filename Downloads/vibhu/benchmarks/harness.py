@@ -0,0 +1,86 @@
+import json
+import platform
+import sys
+import time
+
+# A metric may be this much worse than the baseline before it counts as a
+# regression; timings on shared machines easily wander by 10-20%
+DEFAULT_TOLERANCE = 0.30
+# Sub-millisecond timings are dominated by scheduler and cache noise, so
+# they get more room (passed per metric, see metric())
+NOISY_TOLERANCE = 0.60
+
+
+class Skipped(Exception):
+    # Raised by a benchmark that cannot run here (no display, no Pillow, ...)
+    pass
+
+
+def metric(value, unit, higher_is_better=False, tolerance=None):
+    # tolerance overrides the run's tolerance for this metric when larger
+    result = {"value": value, "unit": unit, "higher_is_better": higher_is_better}
+    if tolerance is not None:
+        result["tolerance"] = tolerance
+    return result
+
+
+def best_time(fn, repeat=7, warmup=1):
+    # Fastest wall time of fn() over `repeat` runs, after `warmup` discarded
+    # runs. Interference only ever adds time, so the minimum is the most
+    # repeatable estimate of what the code itself costs.
+    for _ in range(warmup):
+        fn()
+    best = float('inf')
+    for _ in range(repeat):
+        began = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - began)
+    return best
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+    }
+
+
+def write_results(path, results):
+    report = {"environment": environment(), "results": results}
+    if path == '-':
+        json.dump(report, sys.stdout, indent=2, sort_keys=True)
+        sys.stdout.write("\n")
+        return
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def load_results(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)["results"]
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    # Yield (name, baseline value, current value, change, regressed) for every
+    # metric measured in this run. `change` is positive when things got
+    # worse, as a fraction of the baseline. A metric the baseline does not
+    # have yields None for both and counts as regressed, so a new benchmark
+    # cannot go unchecked until someone remembers to record it. Metrics only
+    # in the baseline (e.g. skipped here for lack of a display) are ignored.
+    for name in sorted(results):
+        new = results[name]["value"]
+        if name not in baseline:
+            yield name, None, new, None, True
+            continue
+        old = baseline[name]["value"]
+        if not old:
+            continue
+        if results[name].get("higher_is_better"):
+            change = (old - new) / old
+        else:
+            change = (new - old) / old
+        allowed = max(tolerance, baseline[name].get("tolerance", tolerance))
+        yield name, old, new, change, change > allowed
@@ -0,0 +1,127 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from urllib.parse import urlsplit
+
+if not __package__:
+    # Run as `python benchmarks/load_test.py`: the app modules live one level up
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from latency_monitor import percentile  # noqa: E402
+
+# Sample request bodies, one per endpoint under test
+STORY_DATA = {
+    "heroine": {"name": "Elizabeth", "personality": "Witty", "status": "Gentleman's daughter"},
+    "hero": {"name": "Darcy", "personality": "Proud", "status": "Wealthy landowner"},
+    "theme": "Romance",
+    "setting": "Bath",
+}
+
+SCENARIOS = {
+    "story": ("/story", lambda args: STORY_DATA),
+    "stories": ("/stories", lambda args: {"records": [STORY_DATA] * args.batch}),
+    "longform": ("/longform", lambda args: {"story_data": STORY_DATA,
+                                            "chapters": args.chapters, "seed": 1}),
+}
+
+
+async def read_response(reader):
+    # Status line, headers, then a Content-Length or chunked body
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode('latin-1').split("\r\n")
+    status = int(lines[0].split(" ", 2)[1])
+    headers = {}
+    for line in lines[1:]:
+        if line:
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+    if headers.get("transfer-encoding") == "chunked":
+        size = 0
+        while True:
+            length = int((await reader.readuntil(b"\r\n"))[:-2], 16)
+            await reader.readexactly(length + 2)
+            size += length
+            if not length:
+                break
+    else:
+        size = int(headers.get("content-length", "0"))
+        await reader.readexactly(size)
+    return status, size, headers.get("connection", "").lower() != "close"
+
+
+async def client(host, port, path, body, deadline, latencies, failures):
+    # One keep-alive connection sending requests back to back until the deadline
+    request = (f"POST {path} HTTP/1.1\r\nHost: {host}\r\n"
+               f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+               ).encode('latin-1') + body
+    reader, writer = await asyncio.open_connection(host, port, limit=1 << 20)
+    try:
+        while time.perf_counter() < deadline:
+            began = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+            status, _, keep_alive = await read_response(reader)
+            latencies.append(time.perf_counter() - began)
+            if status != 200:
+                failures.append(status)
+            if not keep_alive:
+                writer.close()
+                reader, writer = await asyncio.open_connection(host, port, limit=1 << 20)
+    finally:
+        writer.close()
+
+
+async def run(args):
+    url = urlsplit(args.url)
+    host, port = url.hostname, url.port or 80
+    path, make_body = SCENARIOS[args.scenario]
+    body = json.dumps(make_body(args)).encode('utf-8')
+    latencies = []
+    failures = []
+    began = time.perf_counter()
+    deadline = began + args.duration
+    await asyncio.gather(*(client(host, port, path, body, deadline, latencies, failures)
+                           for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - began
+    ordered = sorted(latencies)
+    return {
+        "scenario": args.scenario,
+        "concurrency": args.concurrency,
+        "requests": len(ordered),
+        "errors": len(failures),
+        "seconds": round(elapsed, 2),
+        "rps": round(len(ordered) / elapsed, 1),
+        "p50_ms": round(percentile(ordered, 0.50) * 1000, 2),
+        "p90_ms": round(percentile(ordered, 0.90) * 1000, 2),
+        "p99_ms": round(percentile(ordered, 0.99) * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2) if ordered else 0.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks.load_test',
+        description="Load-test a running 'cli.py serve' instance")
+    parser.add_argument('--url', default='http://127.0.0.1:8765')
+    parser.add_argument('--scenario', choices=sorted(SCENARIOS), default='story')
+    parser.add_argument('-c', '--concurrency', type=int, default=32,
+                        help="Simultaneous keep-alive connections")
+    parser.add_argument('-d', '--duration', type=float, default=10.0, help="Seconds to run")
+    parser.add_argument('--batch', type=int, default=100, help="Records per /stories request")
+    parser.add_argument('--chapters', type=int, default=20, help="Chapters per /longform request")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run(args))
+    print(f"{report['requests']} requests in {report['seconds']}s: {report['rps']:,} req/s, "
+          f"p50 {report['p50_ms']} ms, p90 {report['p90_ms']} ms, p99 {report['p99_ms']} ms, "
+          f"max {report['max_ms']} ms, {report['errors']} errors", file=sys.stderr)
+    json.dump(report, sys.stdout)
+    sys.stdout.write("\n")
+    return 1 if report['errors'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+import os
+import tempfile
+
+from bulk_sampler import BatchRenderer, BulkSampler
+from prose_model import POOL_SIZE, POOL_SEED, ProseModel, train, write_model
+from story_data import load_story_data
+from story_engine import StoryEngine
+from story_space import StorySpace
+from templates import StoryTemplates
+
+from benchmarks.harness import NOISY_TOLERANCE, best_time, metric
+
+STORIES = 20000
+SEED = 1234
+
+
+def sample_records(engine, count=STORIES, seed=SEED):
+    space = StorySpace(engine)
+    return [space.sampled(index, seed) for index in range(count)]
+
+
+def bench_create_story(engine, records):
+    create_story = engine.create_story
+
+    def run():
+        for data in records:
+            create_story(data)
+
+    seconds = best_time(run)
+    return {"create_story": metric(len(records) / seconds, "stories/s", higher_is_better=True)}
+
+
+def bench_template_compile(engine):
+    plot_elements = engine.plot_elements
+    seconds = best_time(lambda: StoryTemplates(plot_elements), repeat=20)
+    return {"template_compile": metric(seconds * 1000, "ms", tolerance=NOISY_TOLERANCE)}
+
+
+def bench_template_render(engine, records):
+    templates = engine.templates
+    render_story = templates.render_story
+    prepare = templates.prepare
+    values = [prepare(data) for data in records]
+    theme_stories = [templates.theme_stories.get(data["theme"], templates.default_story)
+                     for data in records]
+
+    def render_full():
+        for data in records:
+            render_story(data)
+
+    def render_prepared():
+        for template, prepared in zip(theme_stories, values):
+            template.render(prepared)
+
+    full = best_time(render_full)
+    prepared = best_time(render_prepared)
+    return {
+        "template_render": metric(full / len(records) * 1e6, "us/story"),
+        "template_render_prepared": metric(prepared / len(records) * 1e6, "us/story"),
+    }
+
+
+def bench_bulk(engine, count=STORIES * 5, seed=SEED):
+    # Batch sampling and code-batch rendering
+    sampler = BulkSampler(engine, seed)
+    renderer = BatchRenderer(engine, sampler.vocab)
+    batch = sampler.batch(count)
+    sample = best_time(lambda: sampler.batch(count))
+    render = best_time(lambda: renderer.render(batch))
+    return {
+        "bulk_sample": metric(count / sample, "records/s", higher_is_better=True),
+        "bulk_render": metric(render / count * 1e6, "us/story"),
+    }
+
+
+def bench_prose(engine, records):
+    # Sampling a theme's sentence pool from a model trained on generated
+    # stories; this is the work the first prose story of a theme waits for
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = os.path.join(tmp, "corpus.txt")
+        with open(corpus, 'w', encoding='utf-8') as f:
+            for data in records[:2000]:
+                f.write(engine.create_story(data))
+                f.write("\n\n")
+        path = os.path.join(tmp, "default.ngram")
+        vocab, transitions = train([corpus])
+        write_model(path, vocab, transitions, 3)
+        model = ProseModel(path)
+        try:
+            seconds = best_time(lambda: model.sentences(POOL_SIZE, POOL_SEED))
+        finally:
+            model.close()
+    return {"prose_sample": metric(POOL_SIZE / seconds, "sentences/s", higher_is_better=True)}
+
+
+def bench_story_data_load(data_dir):
+    # Warm start: the validated pickle cache is hit every time after the first
+    seconds = best_time(lambda: load_story_data(data_dir), repeat=20)
+    return {"story_data_load": metric(seconds * 1000, "ms", tolerance=NOISY_TOLERANCE)}
+
+
+def run(data_dir):
+    engine = StoryEngine(data_dir)
+    records = sample_records(engine)
+    results = {}
+    results.update(bench_create_story(engine, records))
+    results.update(bench_template_compile(engine))
+    results.update(bench_template_render(engine, records))
+    results.update(bench_bulk(engine))
+    results.update(bench_prose(engine, records))
+    results.update(bench_story_data_load(data_dir))
+    return results
@@ -0,0 +1,80 @@
+import argparse
+import os
+import sys
+
+from story_data import DATA_DIR
+
+from benchmarks import pipeline, ui
+from benchmarks.harness import DEFAULT_TOLERANCE, compare, load_results, write_results
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks.run',
+        description="Benchmark the story pipeline and UI hot paths")
+    parser.add_argument('-o', '--output', default=None,
+                        help="Write results as JSON to this file ('-' for stdout)")
+    parser.add_argument('--baseline', default=BASELINE,
+                        help="Baseline results to compare against")
+    parser.add_argument('--update-baseline', action='store_true',
+                        help="Store these results as the new baseline instead of comparing")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed slowdown before a metric fails (0.3 = 30%%)")
+    parser.add_argument('--only', choices=('pipeline', 'ui'), default=None,
+                        help="Run one group of benchmarks")
+    parser.add_argument('--mock-tk', action='store_true',
+                        help="Use the mocked Tk even when a display is available")
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    args = parser.parse_args(argv)
+
+    results = {}
+    skipped = {}
+    if args.only in (None, 'pipeline'):
+        results.update(pipeline.run(args.data_dir))
+    if args.only in (None, 'ui'):
+        ui_results, skipped = ui.run(args.data_dir, headless=True if args.mock_tk else None)
+        results.update(ui_results)
+
+    for name in sorted(results):
+        result = results[name]
+        print(f"{name:<44}{result['value']:>14,.3f} {result['unit']}", file=sys.stderr)
+    for name, reason in skipped.items():
+        print(f"{name:<44}{'skipped':>14} ({reason})", file=sys.stderr)
+
+    if args.output:
+        write_results(args.output, results)
+    if args.update_baseline:
+        write_results(args.baseline, results)
+        print(f"Baseline written to {args.baseline}", file=sys.stderr)
+        return 0
+    if not os.path.exists(args.baseline):
+        print("No baseline to compare against; run with --update-baseline", file=sys.stderr)
+        return 0
+
+    regressions = []
+    missing = []
+    print(f"\n{'metric':<44}{'baseline':>14}{'current':>14}{'change':>9}", file=sys.stderr)
+    for name, old, new, change, regressed in compare(results, load_results(args.baseline),
+                                                     args.tolerance):
+        if old is None:
+            print(f"{name:<44}{'-':>14}{new:>14,.3f}{'':>9}  NO BASELINE", file=sys.stderr)
+            missing.append(name)
+            continue
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{name:<44}{old:>14,.3f}{new:>14,.3f}{change:>+9.1%}{flag}", file=sys.stderr)
+        if regressed:
+            regressions.append(name)
+    if regressions:
+        print(f"\n{len(regressions)} metric(s) regressed by more than their tolerance "
+              f"({args.tolerance:.0%} unless set per metric): {', '.join(regressions)}",
+              file=sys.stderr)
+    if missing:
+        print(f"\n{len(missing)} metric(s) have no baseline entry: {', '.join(missing)}; "
+              "record them with --update-baseline", file=sys.stderr)
+    return 1 if regressions or missing else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
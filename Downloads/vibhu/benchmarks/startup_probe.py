@@ -0,0 +1,22 @@
+# Launched by the startup benchmark: build the app, wait for its window to be
+# mapped, print the in-process time and widget count as JSON and exit without
+# entering mainloop. --eager-tabs builds every tab up front, as before lazy tabs.
+
+import json
+import sys
+import time
+
+import main
+
+
+def probe(eager_tabs=False):
+    app = main.AustenStoryCreator(eager_tabs=eager_tabs)
+    app.root.wait_visibility()
+    first_window = time.perf_counter() - main._START
+    widgets = main.count_widgets(app.root)
+    app.on_close()
+    print(json.dumps({"first_window_ms": first_window * 1000, "widgets": widgets}))
+
+
+if __name__ == "__main__":
+    probe(eager_tabs="--eager-tabs" in sys.argv[1:])
@@ -0,0 +1,212 @@
+import json
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.fake_tk import FakeViewer
+from benchmarks.harness import NOISY_TOLERANCE, Skipped, best_time, metric
+
+# Window sizes the background is rescaled to when a theme is applied
+WINDOW_SIZES = ((1200, 800), (1600, 900), (1920, 1080), (2560, 1440))
+TYPEWRITER_CHAPTERS = 20
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def have_display():
+    import tkinter as tk
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        return False
+    root.destroy()
+    return True
+
+
+def have_pillow():
+    try:
+        import PIL.Image  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def long_story(engine):
+    from longform import LongFormStory
+    from story_space import StorySpace
+    data = StorySpace(engine).sampled(0, 0)
+    return list(LongFormStory(engine, data, chapters=TYPEWRITER_CHAPTERS, seed=0))
+
+
+def bench_typewriter(engine, headless):
+    # Time to type out a long story with the rate uncapped, so every frame
+    # spends its whole budget revealing characters
+    from typewriter import TypewriterRenderer
+    paragraphs = long_story(engine)
+    characters = sum(len(p) for p in paragraphs)
+
+    if headless:
+        viewer = FakeViewer()
+        typewriter = TypewriterRenderer(viewer, cps=1e9, frame_ms=0)
+
+        def run():
+            typewriter.start(paragraphs)
+            viewer.text.pump()
+
+        seconds = best_time(run)
+        name = "typewriter_per_1000_chars[mocked]"
+    else:
+        import tkinter as tk
+        from story_viewer import StoryViewer
+        root = tk.Tk()
+        root.withdraw()
+        viewer = StoryViewer(root)
+        typewriter = TypewriterRenderer(viewer, cps=1e9, frame_ms=0)
+
+        def run():
+            typewriter.start(paragraphs)
+            while typewriter.running:
+                root.update()
+
+        try:
+            seconds = best_time(run)
+        finally:
+            root.destroy()
+        name = "typewriter_per_1000_chars[tk]"
+    return {name: metric(seconds / characters * 1000 * 1000, "ms", tolerance=NOISY_TOLERANCE)}
+
+
+def bench_apply_theme(data_dir, headless):
+    # Background rescale behind apply_theme, per window size: a cold resize
+    # (first time at that size), a warm one (served from the LRU) and one
+    # served from the memory-mapped asset cache
+    if not have_pillow():
+        raise Skipped("Pillow is not installed")
+    import tempfile
+    from asset_cache import AssetCache, build_assets
+    from image_cache import BackgroundImageCache
+    themes = sorted(f for f in os.listdir(os.path.join(PROJECT_DIR, "images")) if f.endswith("_bg.png"))
+    if not themes:
+        raise Skipped("no theme images in images/")
+    cache = BackgroundImageCache({"theme": os.path.join(PROJECT_DIR, "images", themes[0])})
+    cache.source("theme")
+    scratch = tempfile.TemporaryDirectory()
+    assets_path = os.path.join(scratch.name, "backgrounds.rgba")
+    build_assets(cache.theme_images, assets_path, sizes=WINDOW_SIZES)
+    assets = AssetCache.open(cache.theme_images, assets_path)
+    mapped = BackgroundImageCache(cache.theme_images, assets=assets)
+
+    photo = None
+    if not headless:
+        import tkinter as tk
+        from PIL import ImageTk
+        root = tk.Tk()
+        root.withdraw()
+        photo = ImageTk.PhotoImage
+
+    results = {}
+    try:
+        for width, height in WINDOW_SIZES:
+            def cold():
+                cache.clear()
+                image = cache.get("theme", width, height)
+                if photo:
+                    photo(image)
+
+            def warm():
+                image = cache.get("theme", width, height)
+                if photo:
+                    photo(image)
+
+            def from_assets():
+                image = mapped.get("theme", width, height)
+                if photo:
+                    photo(image)
+
+            size = f"{width}x{height}"
+            # Large cold resizes are bound by memory bandwidth, which other
+            # processes on the machine share
+            results[f"apply_theme_resize_ms[{size}]"] = metric(
+                best_time(cold) * 1000, "ms", tolerance=NOISY_TOLERANCE)
+            results[f"apply_theme_cached_ms[{size}]"] = metric(
+                best_time(warm) * 1000, "ms", tolerance=NOISY_TOLERANCE)
+            results[f"apply_theme_mapped_ms[{size}]"] = metric(
+                best_time(from_assets) * 1000, "ms", tolerance=NOISY_TOLERANCE)
+    finally:
+        if not headless:
+            root.destroy()
+        assets.close()
+        scratch.cleanup()
+    return results
+
+
+def bench_startup():
+    # Wall time from launching the interpreter to the main window being
+    # mapped, and the widgets built by then: with lazy tabs (the default)
+    # and with every tab built up front
+    if not have_display():
+        raise Skipped("no display for the startup probe")
+
+    def run(args):
+        began = time.perf_counter()
+        output = subprocess.run([sys.executable, "-m", "benchmarks.startup_probe", *args],
+                                cwd=PROJECT_DIR, capture_output=True, text=True, check=True)
+        report = json.loads(output.stdout.strip().splitlines()[-1])
+        return time.perf_counter() - began, report
+
+    run([])  # warm the OS file cache and the story data cache
+    results = {}
+    for suffix, args in (("", []), ("[eager_tabs]", ["--eager-tabs"])):
+        samples = [run(args) for _ in range(5)]
+        samples.sort(key=lambda sample: sample[0])
+        total, report = samples[len(samples) // 2]
+        results[f"startup_to_first_window{suffix}"] = metric(total * 1000, "ms")
+        results[f"startup_in_process{suffix}"] = metric(report["first_window_ms"], "ms")
+        results[f"startup_widgets{suffix}"] = metric(report["widgets"], "widgets")
+    return results
+
+
+def bench_story_card(engine):
+    # Composing one share card (cached fonts, backgrounds and word bitmaps),
+    # then encoding it in the default format
+    if not have_pillow():
+        raise Skipped("Pillow is not installed")
+    import io
+    from story_cards import CardRenderer
+    from story_space import StorySpace
+    space = StorySpace(engine)
+    records = [space.sampled(index, 0) for index in range(50)]
+    stories = [engine.create_story(data) for data in records]
+    renderer = CardRenderer()
+
+    def render():
+        return [renderer.render(data, story) for data, story in zip(records, stories)]
+
+    images = render()
+
+    def encode():
+        for image in images:
+            renderer.save(image, io.BytesIO())
+
+    return {
+        "story_card_render": metric(best_time(render) / len(records) * 1000, "ms"),
+        "story_card_encode": metric(best_time(encode) / len(records) * 1000, "ms"),
+    }
+
+
+def run(data_dir, headless=None):
+    from story_engine import StoryEngine
+    if headless is None:
+        headless = not have_display()
+    engine = StoryEngine(data_dir)
+    results = {}
+    skipped = {}
+    for name, bench in (("typewriter", lambda: bench_typewriter(engine, headless)),
+                        ("apply_theme", lambda: bench_apply_theme(data_dir, headless)),
+                        ("story_card", lambda: bench_story_card(engine)),
+                        ("startup", bench_startup)):
+        try:
+            results.update(bench())
+        except Skipped as e:
+            skipped[name] = str(e)
+    return results, skipped
@@ -0,0 +1,300 @@
+import json
+
+from lazy_import import LazyModule
+from prose_model import require_numpy
+from story_space import FALLBACK_NAMES
+
+# Whole batches are drawn and filtered as integer arrays (see requirements.txt)
+np = LazyModule('numpy')
+
+DIMENSIONS = (
+    'heroine_name', 'heroine_personality', 'heroine_status',
+    'hero_name', 'hero_personality', 'hero_status',
+    'setting', 'theme',
+)
+
+# Template field -> the dimension that supplies its value
+FIELD_DIMENSIONS = {
+    ('heroine', 'name'): 'heroine_name',
+    ('heroine', 'personality'): 'heroine_personality',
+    ('heroine', 'status'): 'heroine_status',
+    ('hero', 'name'): 'hero_name',
+    ('hero', 'personality'): 'hero_personality',
+    ('hero', 'status'): 'hero_status',
+    ('setting', None): 'setting',
+    ('theme', None): 'theme',
+}
+
+# Rows drawn per round. Fixed, so that batch sizes do not change the output
+DRAW_BLOCK = 65536
+# Rounds without a single accepted row before giving up
+MAX_IDLE_ROUNDS = 50
+
+
+class SamplerError(ValueError):
+    pass
+
+
+def vocabularies(engine):
+    # Every dimension's values, in the order their integer codes refer to
+    data = engine.data
+    themes = list(engine.plot_elements.get('themes', {}))
+    if not themes:
+        raise SamplerError("plots.json defines no themes to sample")
+    names = {gender: data.names.get(gender) or FALLBACK_NAMES[gender] for gender in FALLBACK_NAMES}
+    return {
+        'heroine_name': names['female'],
+        'heroine_personality': data.personalities,
+        'heroine_status': data.statuses['female'],
+        'hero_name': names['male'],
+        'hero_personality': data.personalities,
+        'hero_status': data.statuses['male'],
+        'setting': data.locations,
+        'theme': themes,
+    }
+
+
+def load_constraints(path):
+    # {"weights": {dim: {value: weight}}, "exclude": [{dim: value(s)}],
+    #  "unique": [dim, ...]}
+    with open(path, 'r', encoding='utf-8') as f:
+        spec = json.load(f)
+    if not isinstance(spec, dict):
+        raise SamplerError(f"{path}: expected a JSON object")
+    return spec.get('weights'), spec.get('exclude', ()), spec.get('unique', ())
+
+
+class CodeBatch:
+    # A batch of stories as one column of integer codes per dimension.
+    # Strings only appear when records() or a BatchRenderer asks for them.
+    def __init__(self, columns, vocab):
+        self.columns = columns
+        self.vocab = vocab
+
+    def __len__(self):
+        return len(self.columns['theme'])
+
+    def codes(self, dimension):
+        return self.columns[dimension].tolist()
+
+    def values(self, dimension, table=None):
+        # The column as strings, looked up from `table` (default: the vocabulary)
+        table = self.vocab[dimension] if table is None else table
+        return [table[code] for code in self.codes(dimension)]
+
+    def records(self):
+        # story_data dicts, shaped like StorySpace.story_data
+        columns = [self.values(dimension) for dimension in DIMENSIONS]
+        for (heroine_name, heroine_personality, heroine_status,
+             hero_name, hero_personality, hero_status, setting, theme) in zip(*columns):
+            yield {
+                "heroine": {"name": heroine_name, "personality": heroine_personality,
+                            "status": heroine_status},
+                "hero": {"name": hero_name, "personality": hero_personality,
+                         "status": hero_status},
+                "theme": theme,
+                "setting": setting,
+            }
+
+
+class BulkSampler:
+    # Draws whole batches of attribute tuples from one seeded generator.
+    #
+    # weights:  {dimension: {value: weight}}; unlisted values weigh 1, and a
+    #           weight of 0 never draws the value
+    # exclude:  [{dimension: value or [values]}]; a row matching every
+    #           dimension of any rule is rejected and redrawn
+    # unique:   dimensions whose combination may appear only once per sampler,
+    #           e.g. ("heroine_name", "hero_name") for no repeated pairings
+    #
+    # The same seed and arguments always give the same stream of rows,
+    # whatever batch sizes it is read in. NumPy is required; there is no
+    # fallback that would draw a different sequence.
+    def __init__(self, engine, seed, weights=None, exclude=(), unique=()):
+        require_numpy("Bulk sampling")
+        self.vocab = vocabularies(engine)
+        self.index = {dimension: {value: code for code, value in enumerate(values)}
+                      for dimension, values in self.vocab.items()}
+        self.weights = self._compile_weights(weights or {})
+        self.exclude = [self._compile_rule(rule, i) for i, rule in enumerate(exclude)]
+        self.unique = tuple(unique)
+        for dimension in self.unique:
+            self._check_dimension(dimension, "unique")
+        self.rng = np.random.default_rng(seed)
+        self._seen = np.empty(0, dtype=np.int64)
+        # Accepted rows drawn but not handed out yet
+        self._buffer = []
+        self._buffered = 0
+        self.produced = 0
+
+    def _check_dimension(self, dimension, where):
+        if dimension not in self.vocab:
+            raise SamplerError(f"{where}: unknown dimension '{dimension}' "
+                               f"(expected one of {', '.join(DIMENSIONS)})")
+
+    def _code(self, dimension, value, where):
+        code = self.index[dimension].get(value)
+        if code is None:
+            raise SamplerError(f"{where}: unknown {dimension} '{value}'")
+        return code
+
+    def _compile_weights(self, weights):
+        compiled = {}
+        for dimension, table in weights.items():
+            self._check_dimension(dimension, "weights")
+            row = [1.0] * len(self.vocab[dimension])
+            for value, weight in table.items():
+                if not isinstance(weight, (int, float)) or weight < 0:
+                    raise SamplerError(f"weights.{dimension}: invalid weight for '{value}'")
+                row[self._code(dimension, value, f"weights.{dimension}")] = float(weight)
+            total = sum(row)
+            if not total:
+                raise SamplerError(f"weights.{dimension}: every value has weight 0")
+            compiled[dimension] = [weight / total for weight in row]
+        return compiled
+
+    def _compile_rule(self, rule, i):
+        where = f"exclude[{i}]"
+        if not isinstance(rule, dict) or not rule:
+            raise SamplerError(f"{where}: expected a non-empty object")
+        compiled = {}
+        for dimension, values in rule.items():
+            self._check_dimension(dimension, where)
+            if isinstance(values, str):
+                values = [values]
+            compiled[dimension] = sorted({self._code(dimension, value, where) for value in values})
+        return compiled
+
+    # Drawing
+
+    def _draw(self, count):
+        columns = {}
+        for dimension in DIMENSIONS:
+            size = len(self.vocab[dimension])
+            columns[dimension] = self.rng.choice(size, count, p=self.weights.get(dimension))
+        return columns
+
+    def _unique_keys(self, columns):
+        # Mixed-radix key of the unique dimensions, one per row
+        keys = np.zeros(len(columns['theme']), dtype=np.int64)
+        for dimension in self.unique:
+            keys = keys * len(self.vocab[dimension]) + columns[dimension]
+        return keys
+
+    def _accepted(self, columns):
+        # Rows that pass every constraint, in draw order; claims their unique
+        # keys
+        count = len(columns['theme'])
+        keep = np.ones(count, dtype=bool)
+        for rule in self.exclude:
+            hit = np.ones(count, dtype=bool)
+            for dimension, codes in rule.items():
+                hit &= np.isin(columns[dimension], codes)
+            keep &= ~hit
+        if self.unique:
+            keys = self._unique_keys(columns)
+            keep &= ~np.isin(keys, self._seen, assume_unique=False)
+            # First occurrence of each key within the block wins
+            _, first = np.unique(keys[keep], return_index=True)
+            rows = np.flatnonzero(keep)[np.sort(first)]
+            self._seen = np.union1d(self._seen, keys[rows])
+            return rows
+        return np.flatnonzero(keep)
+
+    def _take(self, columns, rows):
+        return {dimension: column[rows] for dimension, column in columns.items()}
+
+    def _concat(self, parts):
+        return {dimension: np.concatenate([part[dimension] for part in parts])
+                for dimension in DIMENSIONS}
+
+    def _refill(self, count):
+        # Draw fixed-size blocks until `count` accepted rows are buffered.
+        # Block boundaries never depend on the batch sizes asked for, so
+        # the stream of rows is the same however it is sliced into batches.
+        idle = 0
+        while self._buffered < count:
+            columns = self._draw(DRAW_BLOCK)
+            rows = self._accepted(columns)
+            if len(rows):
+                self._buffer.append(self._take(columns, rows))
+                self._buffered += len(rows)
+                idle = 0
+            else:
+                idle += 1
+                if idle >= MAX_IDLE_ROUNDS:
+                    raise SamplerError(f"constraints leave no room for more stories after "
+                                       f"{self.produced + self._buffered}")
+
+    def batch(self, count):
+        # The next `count` rows of the sampler's stream
+        self._refill(count)
+        columns = self._concat(self._buffer) if self._buffer else self._draw(0)
+        rest = {dimension: column[count:] for dimension, column in columns.items()}
+        self._buffered = len(rest['theme'])
+        self._buffer = [rest] if self._buffered else []
+        self.produced += count
+        return CodeBatch({dimension: column[:count] for dimension, column in columns.items()},
+                         self.vocab)
+
+    def batches(self, total, batch_size=10000):
+        while total > 0:
+            count = min(batch_size, total)
+            yield self.batch(count)
+            total -= count
+
+
+class BatchRenderer:
+    # Renders a CodeBatch with the engine's compiled templates. Each template
+    # slot gets a lookup table from codes to its (converted) string, so the
+    # values for a row are a zip over the slot columns and a story is a single
+    # format call. Themes with a custom generator or generated prose go
+    # through engine.create_story instead.
+    def __init__(self, engine, vocab):
+        self.engine = engine
+        templates = engine.templates
+        self.slot_dimensions = []
+        self.slot_tables = []
+        for (root, key, conversion), slot in sorted(templates.slot_table.slots.items(),
+                                                    key=lambda item: item[1]):
+            dimension = FIELD_DIMENSIONS[(root, key)]
+            values = vocab[dimension]
+            if conversion == "lower":
+                values = [value.lower() for value in values]
+            self.slot_dimensions.append(dimension)
+            self.slot_tables.append(values)
+        self.theme_templates = []
+        for theme in vocab['theme']:
+            if engine.story_generator(theme) == templates.render_story:
+                self.theme_templates.append(
+                    templates.theme_stories.get(theme, templates.default_story))
+            else:
+                self.theme_templates.append(None)
+
+    def render(self, batch):
+        columns = [batch.values(dimension, table)
+                   for dimension, table in zip(self.slot_dimensions, self.slot_tables)]
+        templates = self.theme_templates
+        stories = []
+        records = None
+        for i, (theme, values) in enumerate(zip(batch.codes('theme'), zip(*columns))):
+            template = templates[theme]
+            if template is not None:
+                stories.append(template.render(values))
+            else:
+                if records is None:
+                    records = list(batch.records())
+                stories.append(self.engine.create_story(records[i]))
+        return stories
+
+
+def generate_bulk(count, seed, data_dir, weights=None, exclude=(), unique=(),
+                  batch_size=10000):
+    # Yield (story_data, story) pairs for `count` sampled stories
+    from story_engine import StoryEngine
+
+    engine = StoryEngine(data_dir)
+    sampler = BulkSampler(engine, seed, weights=weights, exclude=exclude, unique=unique)
+    renderer = BatchRenderer(engine, sampler.vocab)
+    for batch in sampler.batches(count, batch_size):
+        yield from zip(batch.records(), renderer.render(batch))
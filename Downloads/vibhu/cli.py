@@ -0,0 +1,483 @@
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+
+from longform import DEFAULT_CHAPTERS
+from story_engine import DATA_DIR, generate_batch, read_story_data, write_stories
+
+
+def worker_count(value):
+    # argparse type for -j/--workers: 0 means every core, negatives are errors
+    workers = int(value)
+    if workers < 0:
+        raise argparse.ArgumentTypeError(f"must be 0 (all cores) or more, not {workers}")
+    return workers
+
+
+def positive_int(value):
+    # argparse type for counts that must be at least 1
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be 1 or more, not {number}")
+    return number
+
+
+def shard_spec(value):
+    # argparse type for --shard K/N: returns (K, N) with 0 <= K < N
+    try:
+        shard, shards = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected K/N such as 0/4, not {value!r}") from None
+    if not 0 <= shard < shards:
+        raise argparse.ArgumentTypeError(f"K must be from 0 to N-1 in K/N, not {value!r}")
+    return shard, shards
+
+
+def open_input(path):
+    if path == '-':
+        return contextlib.nullcontext(sys.stdin)
+    return open(path, 'r', encoding='utf-8')
+
+
+def open_output(path):
+    if path == '-':
+        return contextlib.nullcontext(sys.stdout)
+    return open(path, 'w', encoding='utf-8')
+
+
+def cmd_generate(args):
+    start = time.perf_counter()
+    with open_input(args.input) as src, open_output(args.output) as out:
+        records = read_story_data(src)
+        pairs = generate_batch(records,
+                               workers=args.workers,
+                               chunk_size=args.chunk_size,
+                               data_dir=args.data_dir)
+        count = write_stories(pairs, out)
+    elapsed = time.perf_counter() - start
+    rate = count / elapsed if elapsed > 0 else 0.0
+    print(f"Generated {count} stories in {elapsed:.2f}s ({rate:,.0f} stories/s)",
+          file=sys.stderr)
+    return 0
+
+
+def cmd_narrate(args):
+    from narration_cache import DEFAULT_MAX_BYTES, render_directory
+
+    start = time.perf_counter()
+    count = 0
+    for story_path, audio_path, seconds in render_directory(
+            args.directory,
+            cache_dir=args.cache_dir,
+            rate=args.rate,
+            workers=args.workers,
+            max_bytes=args.max_mb * 1024 * 1024 if args.max_mb else DEFAULT_MAX_BYTES):
+        if audio_path:
+            count += 1
+            print(f"{story_path} -> {audio_path} ({seconds:.2f}s)", file=sys.stderr)
+    elapsed = time.perf_counter() - start
+    print(f"Rendered narration for {count} stories in {elapsed:.2f}s", file=sys.stderr)
+    return 0
+
+
+def cmd_pdf(args):
+    from pdf_writer import render_batch
+
+    with open_input(args.input) as src:
+        stories, pages, elapsed = render_batch(read_story_data(src),
+                                               args.output,
+                                               split=args.split,
+                                               workers=args.workers,
+                                               chunk_size=args.chunk_size,
+                                               data_dir=args.data_dir)
+    rate = pages / elapsed if elapsed > 0 else 0.0
+    print(f"Rendered {stories} stories, {pages} pages in {elapsed:.2f}s "
+          f"({rate:,.0f} pages/s)", file=sys.stderr)
+    return 0
+
+
+def cmd_cards(args):
+    from story_cards import render_cards
+
+    with open_input(args.input) as src:
+        cards, elapsed, cpu, workers = render_cards(read_story_data(src), args.output,
+                                                    workers=args.workers,
+                                                    chunk_size=args.chunk_size,
+                                                    fmt=args.format,
+                                                    data_dir=args.data_dir)
+    rate = cards / elapsed if elapsed > 0 else 0.0
+    per_core = cards / cpu if cpu > 0 else 0.0
+    print(f"Rendered {cards} cards in {elapsed:.2f}s with {workers} worker(s): "
+          f"{rate:,.0f} cards/s, {per_core:,.0f} cards/s per core", file=sys.stderr)
+    return 0
+
+
+def cmd_longform(args):
+    from longform import LongFormStory
+    from story_engine import StoryEngine
+
+    with open_input(args.input) as src:
+        data = json.load(src)
+    story = LongFormStory(StoryEngine(args.data_dir), data,
+                          chapters=args.chapters, seed=args.seed)
+    start = time.perf_counter()
+    if args.pdf:
+        from pdf_writer import export_story, story_title
+        pages = export_story(args.pdf, story, title=story_title(data))
+        print(f"Wrote {args.chapters} chapters, {pages} pages in "
+              f"{time.perf_counter() - start:.2f}s", file=sys.stderr)
+        return 0
+    count = 0
+    with open_output(args.output) as out:
+        # One paragraph at a time, so output starts at once and memory stays flat
+        for paragraph in story:
+            if count:
+                out.write("\n\n")
+            out.write(paragraph)
+            count += 1
+        out.write("\n")
+    print(f"Wrote {args.chapters} chapters, {count} paragraphs in "
+          f"{time.perf_counter() - start:.2f}s", file=sys.stderr)
+    return 0
+
+
+def cmd_train_prose(args):
+    from prose_model import train_directory
+
+    output = args.output or os.path.join(args.data_dir, 'prose')
+    start = time.perf_counter()
+    count = 0
+    for name, vocab_size, contexts in train_directory(args.corpus, output, order=args.order):
+        count += 1
+        print(f"{name}: {vocab_size:,} words, {contexts:,} contexts", file=sys.stderr)
+    if not count:
+        print(f"No .txt files found in {args.corpus}", file=sys.stderr)
+        return 1
+    print(f"Trained {count} model(s) into {output} in {time.perf_counter() - start:.2f}s",
+          file=sys.stderr)
+    return 0
+
+
+def cmd_build_assets(args):
+    from asset_cache import build_assets, default_cache_path
+    from story_cards import theme_background
+    from story_data import load_story_data
+
+    themes = load_story_data(args.data_dir).plot_elements.get('themes', {})
+    theme_images = {theme: theme_background(theme) for theme in themes
+                    if os.path.exists(theme_background(theme))}
+    sizes = None
+    if args.size:
+        try:
+            sizes = tuple(tuple(int(part) for part in size.lower().split('x'))
+                          for size in args.size)
+        except ValueError:
+            print("Sizes look like 1920x1080", file=sys.stderr)
+            return 2
+    output = args.output or default_cache_path()
+    start = time.perf_counter()
+    count, size = build_assets(theme_images, output, **({'sizes': sizes} if sizes else {}))
+    print(f"Wrote {count} backgrounds for {len(theme_images)} themes to {output} "
+          f"({size / 1024 / 1024:.0f} MB) in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+    return 0
+
+
+def cmd_serve(args):
+    import asyncio
+    from story_server import serve
+
+    try:
+        asyncio.run(serve(args.host, args.port, data_dir=args.data_dir, workers=args.workers))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def cmd_space(args):
+    from story_space import Checkpoint, StorySpace, generate_range
+    from story_engine import StoryEngine
+
+    space = StorySpace(StoryEngine(args.data_dir))
+    if args.command == 'enumerate':
+        start, stop = args.start, len(space) if args.stop is None else min(args.stop, len(space))
+        if args.shard:
+            start, stop = space.shard(*args.shard, start, stop)
+        mode = 'enumerate'
+    else:
+        start, stop = args.start, args.start + args.count
+        mode = 'sample'
+
+    run = {'mode': mode, 'seed': args.seed, 'start': start, 'stop': stop}
+    checkpoint = Checkpoint(args.checkpoint) if args.checkpoint else None
+    resume_from = start
+    resume_offset = 0
+    if checkpoint:
+        if args.output == '-':
+            print("--checkpoint needs an output file", file=sys.stderr)
+            return 2
+        state = checkpoint.load()
+        if state and state.get('run') == run:
+            resume_from = state['next_index']
+            resume_offset = state['offset']
+            if resume_from >= stop:
+                print("Run already complete", file=sys.stderr)
+                return 0
+            print(f"Resuming at index {resume_from}", file=sys.stderr)
+
+    begin = time.perf_counter()
+    count = 0
+    if args.output == '-':
+        out_ctx = contextlib.nullcontext(sys.stdout)
+    elif resume_offset:
+        # Drop anything written after the last checkpoint, then append
+        out_ctx = open(args.output, 'r+', encoding='utf-8')
+    else:
+        out_ctx = open(args.output, 'w', encoding='utf-8')
+    with out_ctx as out:
+        if resume_offset:
+            out.seek(resume_offset)
+            out.truncate()
+        for index, data, story in generate_range(resume_from, stop, args.seed, mode=mode,
+                                                 workers=args.workers,
+                                                 data_dir=args.data_dir):
+            record = dict(data)
+            record['index'] = index
+            record['story'] = story
+            out.write(json.dumps(record, ensure_ascii=False))
+            out.write('\n')
+            count += 1
+            if checkpoint and count % args.checkpoint_every == 0:
+                out.flush()
+                checkpoint.save({'run': run, 'next_index': index + 1, 'offset': out.tell()})
+        if checkpoint:
+            out.flush()
+            checkpoint.save({'run': run, 'next_index': stop, 'offset': out.tell()})
+
+    elapsed = time.perf_counter() - begin
+    print(f"Wrote stories {resume_from}..{stop - 1} of a {len(space):,}-story space "
+          f"({count} in {elapsed:.2f}s)", file=sys.stderr)
+    return 0
+
+
+def cmd_bulk(args):
+    from bulk_sampler import SamplerError, generate_bulk, load_constraints
+
+    weights, exclude, unique = (None, (), ())
+    if args.constraints:
+        weights, exclude, unique = load_constraints(args.constraints)
+    if args.unique:
+        unique = tuple(args.unique.split(','))
+    start = time.perf_counter()
+    try:
+        with open_output(args.output) as out:
+            count = write_stories(generate_bulk(args.count, args.seed, args.data_dir,
+                                                weights=weights, exclude=exclude,
+                                                unique=unique, batch_size=args.batch_size),
+                                  out)
+    except (SamplerError, ImportError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    elapsed = time.perf_counter() - start
+    rate = count / elapsed if elapsed > 0 else 0.0
+    print(f"Generated {count} stories in {elapsed:.2f}s ({rate:,.0f} stories/s)",
+          file=sys.stderr)
+    return 0
+
+
+def cmd_library_import(args):
+    from story_library import StoryLibrary
+
+    start = time.perf_counter()
+    with open_input(args.input) as src, StoryLibrary(args.library) as library:
+        pairs = ((record, record.pop('story')) for record in read_story_data(src))
+        count = library.add_many(pairs, batch_size=args.batch_size)
+        library.optimize()
+    elapsed = time.perf_counter() - start
+    print(f"Imported {count} stories in {elapsed:.2f}s", file=sys.stderr)
+    return 0
+
+
+def cmd_library_search(args):
+    from story_library import StoryLibrary
+
+    with StoryLibrary(args.library) as library:
+        start = time.perf_counter()
+        rows = library.search(args.query, limit=args.limit, offset=args.offset,
+                              order=args.order)
+        elapsed = time.perf_counter() - start
+    for story_id, heroine, hero, theme, setting, _, snippet in rows:
+        print(f"{story_id}\t{heroine}\t{hero}\t{theme}\t{setting}\t{' '.join(snippet.split())}")
+    print(f"{len(rows)} results in {elapsed * 1000:.1f} ms", file=sys.stderr)
+    return 0
+
+
+def add_space_arguments(parser):
+    parser.add_argument('--seed', type=int, default=0,
+                        help="Seed; the same seed always produces the same output")
+    parser.add_argument('-o', '--output', default='-',
+                        help="JSONL file to write stories to (default: stdout)")
+    parser.add_argument('-j', '--workers', type=worker_count, default=1,
+                        help="Worker processes (1 = in-process, 0 = all cores)")
+    parser.add_argument('--checkpoint', default=None,
+                        help="Checkpoint file used to resume an interrupted run")
+    parser.add_argument('--checkpoint-every', type=positive_int, default=10000,
+                        help="Stories between checkpoint updates")
+    parser.set_defaults(func=cmd_space)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='cli.py',
+        description="Headless tools for The Austen Experience")
+    parser.add_argument('--data-dir', default=DATA_DIR,
+                        help="Directory containing characters.json, settings.json and plots.json")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    generate = subparsers.add_parser(
+        'generate', help="Generate stories from JSONL story_data records")
+    generate.add_argument('input', help="JSONL file of story_data dicts ('-' for stdin)")
+    generate.add_argument('-o', '--output', default='-',
+                          help="JSONL file to write stories to (default: stdout)")
+    generate.add_argument('-j', '--workers', type=worker_count, default=1,
+                          help="Worker processes (1 = in-process, 0 = all cores)")
+    generate.add_argument('--chunk-size', type=int, default=500,
+                          help="Records sent to a worker at a time")
+    generate.set_defaults(func=cmd_generate)
+
+    enumerate_cmd = subparsers.add_parser(
+        'enumerate', help="Walk the personality x status x setting x theme space in order")
+    enumerate_cmd.add_argument('--start', type=int, default=0, help="First index")
+    enumerate_cmd.add_argument('--stop', type=int, default=None, help="Index to stop before")
+    enumerate_cmd.add_argument('--shard', type=shard_spec, default=None,
+                               help="K/N: only produce shard K of N equal index ranges")
+    add_space_arguments(enumerate_cmd)
+
+    sample = subparsers.add_parser(
+        'sample', help="Generate reproducible random stories from a seed")
+    sample.add_argument('count', type=int, help="Number of stories")
+    sample.add_argument('--start', type=int, default=0,
+                        help="Index of the first sample (to extend an earlier run)")
+    add_space_arguments(sample)
+
+    bulk = subparsers.add_parser(
+        'bulk', help="Sample and render stories in vectorized batches")
+    bulk.add_argument('count', type=int, help="Number of stories")
+    bulk.add_argument('--seed', type=int, default=0,
+                      help="Seed; the same seed always produces the same output")
+    bulk.add_argument('--constraints', default=None,
+                      help="JSON file with 'weights', 'exclude' and 'unique' rules")
+    bulk.add_argument('--unique', default=None,
+                      help="Comma-separated dimensions that may not repeat together, "
+                           "e.g. heroine_name,hero_name")
+    bulk.add_argument('--batch-size', type=int, default=10000,
+                      help="Stories sampled and rendered at a time (does not change the output)")
+    bulk.add_argument('-o', '--output', default='-',
+                      help="JSONL file to write stories to (default: stdout)")
+    bulk.set_defaults(func=cmd_bulk)
+
+    longform = subparsers.add_parser(
+        'longform', help="Write a multi-chapter story from one story_data record")
+    longform.add_argument('input', help="JSON file with one story_data dict ('-' for stdin)")
+    longform.add_argument('--chapters', type=int, default=DEFAULT_CHAPTERS,
+                          help=f"Number of chapters (default: {DEFAULT_CHAPTERS})")
+    longform.add_argument('--seed', type=int, default=0,
+                          help="Seed for scene order and chapter settings")
+    longform.add_argument('-o', '--output', default='-',
+                          help="Text file to write the story to (default: stdout)")
+    longform.add_argument('--pdf', default=None, help="Write a PDF instead of text")
+    longform.set_defaults(func=cmd_longform)
+
+    library = subparsers.add_parser('library', help="Story library tools")
+    library.add_argument('--library', default=None,
+                         help="Library database (default: per-user library)")
+    library_commands = library.add_subparsers(dest='library_command', required=True)
+    library_import = library_commands.add_parser(
+        'import', help="Add generated stories (JSONL with a 'story' field)")
+    library_import.add_argument('input', help="JSONL file ('-' for stdin)")
+    library_import.add_argument('--batch-size', type=int, default=2000,
+                                help="Stories per insert transaction")
+    library_import.set_defaults(func=cmd_library_import)
+    library_search = library_commands.add_parser('search', help="Full-text search")
+    library_search.add_argument('query', help="Words to find; field:word and word* are supported")
+    library_search.add_argument('--limit', type=int, default=20)
+    library_search.add_argument('--offset', type=int, default=0)
+    library_search.add_argument('--order', choices=('recent', 'relevance'), default='recent')
+    library_search.set_defaults(func=cmd_library_search)
+
+    pdf = subparsers.add_parser(
+        'pdf', help="Render JSONL story_data records to PDF")
+    pdf.add_argument('input', help="JSONL file of story_data dicts ('-' for stdin)")
+    pdf.add_argument('-o', '--output', required=True,
+                     help="PDF file to write, or a directory with --split")
+    pdf.add_argument('--split', action='store_true',
+                     help="Write one PDF per story into the output directory")
+    pdf.add_argument('-j', '--workers', type=worker_count, default=1,
+                     help="Worker processes (1 = in-process, 0 = all cores)")
+    pdf.add_argument('--chunk-size', type=int, default=200,
+                     help="Stories sent to a worker at a time")
+    pdf.set_defaults(func=cmd_pdf)
+
+    train_prose = subparsers.add_parser(
+        'train-prose', help="Train n-gram prose models from a directory of .txt files")
+    train_prose.add_argument('corpus',
+                             help="Corpus directory: top-level .txt files train the default "
+                                  "model, each subdirectory trains a model for that theme")
+    train_prose.add_argument('-o', '--output', default=None,
+                             help="Model directory (default: <data-dir>/prose)")
+    train_prose.add_argument('--order', type=int, default=3,
+                             help="n-gram order, 2 to 4 (default: 3)")
+    train_prose.set_defaults(func=cmd_train_prose)
+
+    cards = subparsers.add_parser(
+        'cards', help="Render shareable story card images from JSONL story_data records")
+    cards.add_argument('input', help="JSONL file of story_data dicts ('-' for stdin)")
+    cards.add_argument('-o', '--output', required=True, help="Directory to write cards into")
+    cards.add_argument('--format', choices=('jpeg', 'png'), default='jpeg')
+    cards.add_argument('-j', '--workers', type=worker_count, default=1,
+                       help="Worker processes (1 = in-process, 0 = all cores)")
+    cards.add_argument('--chunk-size', type=int, default=100,
+                       help="Cards sent to a worker at a time")
+    cards.set_defaults(func=cmd_cards)
+
+    build_assets = subparsers.add_parser(
+        'build-assets', help="Pre-scale the theme backgrounds into the app's asset cache")
+    build_assets.add_argument('--size', action='append', default=None,
+                              help="Window size to prepare, e.g. 1920x1080 (repeatable; "
+                                   "default: common sizes)")
+    build_assets.add_argument('-o', '--output', default=None,
+                              help="Cache file (default: per-user asset cache)")
+    build_assets.set_defaults(func=cmd_build_assets)
+
+    serve_cmd = subparsers.add_parser(
+        'serve', help="Serve story generation over local HTTP")
+    serve_cmd.add_argument('--host', default='127.0.0.1',
+                           help="Address to listen on (default: localhost only)")
+    serve_cmd.add_argument('--port', type=int, default=8765)
+    serve_cmd.add_argument('-j', '--workers', type=worker_count, default=0,
+                           help="Worker processes for large batches (0 = all cores, 1 = none)")
+    serve_cmd.set_defaults(func=cmd_serve)
+
+    narrate = subparsers.add_parser(
+        'narrate', help="Pre-render narration for a directory of .txt stories")
+    narrate.add_argument('directory', help="Directory of .txt story files")
+    narrate.add_argument('--cache-dir', default=None,
+                         help="Narration cache directory (default: per-user cache)")
+    narrate.add_argument('--rate', type=int, default=150, help="Speech rate (words per minute)")
+    narrate.add_argument('--max-mb', type=int, default=None, help="Cache size limit in MB")
+    narrate.add_argument('-j', '--workers', type=worker_count, default=0,
+                         help="Worker processes (0 = all cores)")
+    narrate.set_defaults(func=cmd_narrate)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
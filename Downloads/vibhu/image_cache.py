@@ -0,0 +1,91 @@
+import threading
+from collections import OrderedDict
+
+from lazy_import import LazyModule
+
+Image = LazyModule('PIL.Image')
+
+# Scaled backgrounds are kept until together they exceed this many bytes
+DEFAULT_MAX_BYTES = 96 * 1024 * 1024
+
+
+def cover_size(image_width, image_height, window_width, window_height):
+    # Smallest size that keeps the aspect ratio and fully covers the window
+    window_ratio = window_width / window_height
+    image_ratio = image_width / image_height
+    if window_ratio > image_ratio:
+        # Window is wider than image
+        return window_width, int(window_width / image_ratio)
+    # Window is taller than image
+    return int(window_height * image_ratio), window_height
+
+
+def image_bytes(image):
+    return image.width * image.height * len(image.getbands())
+
+
+class BackgroundImageCache:
+    # Decoded theme images plus an LRU of their window-sized versions.
+    # Safe to call from a background task and the Tk thread at once. When an
+    # AssetCache is attached, sizes it holds are served from it directly.
+    def __init__(self, theme_images, max_bytes=DEFAULT_MAX_BYTES, assets=None):
+        self.theme_images = theme_images
+        self.max_bytes = max_bytes
+        self.assets = assets
+        self._sources = {}
+        self._scaled = OrderedDict()
+        self._scaled_bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def scaled_bytes(self):
+        return self._scaled_bytes
+
+    def source(self, theme):
+        # Decode each PNG once; later requests reuse the pixels in memory
+        with self._lock:
+            image = self._sources.get(theme)
+        if image is None:
+            with Image.open(self.theme_images[theme]) as f:
+                image = f.convert('RGBA') if f.mode not in ('RGB', 'RGBA') else f.copy()
+            with self._lock:
+                image = self._sources.setdefault(theme, image)
+        return image
+
+    def get(self, theme, width, height):
+        assets = self.assets
+        if assets is not None:
+            image = assets.lookup(theme, width, height)
+            if image is not None:
+                return image
+
+        key = (theme, width, height)
+        with self._lock:
+            image = self._scaled.get(key)
+            if image is not None:
+                self._scaled.move_to_end(key)
+                return image
+
+        source = self.source(theme)
+        size = cover_size(source.width, source.height, width, height)
+        # Resize image with high-quality resampling
+        image = source.resize(size, Image.Resampling.LANCZOS)
+        self._store(key, image)
+        return image
+
+    def _store(self, key, image):
+        nbytes = image_bytes(image)
+        with self._lock:
+            if key in self._scaled:
+                return
+            self._scaled[key] = image
+            self._scaled_bytes += nbytes
+            # Always keep the newest entry, even if it alone is over the cap
+            while self._scaled_bytes > self.max_bytes and len(self._scaled) > 1:
+                _, evicted = self._scaled.popitem(last=False)
+                self._scaled_bytes -= image_bytes(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._scaled.clear()
+            self._scaled_bytes = 0
@@ -0,0 +1,139 @@
+import functools
+import json
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Samples kept per handler for the percentiles (counts cover every call),
+# and stalls kept in total
+MAX_SAMPLES = 1000
+MAX_STALLS = 200
+
+# The watchdog expects to run every HEARTBEAT_MS; running later than that by
+# more than STALL_MS means the event loop was blocked
+HEARTBEAT_MS = 50
+STALL_MS = 100
+
+
+def percentile(sorted_values, fraction):
+    # Nearest-rank percentile of an already sorted list
+    if not sorted_values:
+        return 0.0
+    rank = min(len(sorted_values) - 1, max(0, round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[rank]
+
+
+class LatencyMonitor:
+    # Timing spans around UI handlers plus an event-loop watchdog.
+    #
+    # Spans are only opened on the Tk thread. The watchdog is an `after`
+    # heartbeat: when it fires late, the loop was blocked, and the stall is
+    # blamed on the span still open at that moment (a handler that pumps the
+    # loop itself) or else the longest span that ran since the last beat.
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.samples = {}
+        # Every call ever timed; samples only keep the most recent ones
+        self.calls = {}
+        self.stalls = deque(maxlen=MAX_STALLS)
+        self.stall_count = 0
+        self._active = []
+        self._since_beat = None
+        self._root = None
+        self._after_id = None
+        self._expected = None
+
+    @contextmanager
+    def span(self, name):
+        began = time.perf_counter()
+        self._active.append(name)
+        try:
+            yield
+        finally:
+            self._active.pop()
+            duration = time.perf_counter() - began
+            samples = self.samples.get(name)
+            if samples is None:
+                samples = self.samples[name] = deque(maxlen=MAX_SAMPLES)
+            samples.append(duration)
+            self.calls[name] = self.calls.get(name, 0) + 1
+            if self._since_beat is None or duration > self._since_beat[1]:
+                self._since_beat = (name, duration)
+
+    def instrument(self, name):
+        # Decorator form of span() for handler methods
+        def decorate(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    # Watchdog
+
+    def watch(self, root, heartbeat_ms=HEARTBEAT_MS, stall_ms=STALL_MS):
+        self._root = root
+        self.heartbeat = heartbeat_ms / 1000.0
+        self.stall_threshold = stall_ms / 1000.0
+        self._schedule()
+
+    def _schedule(self):
+        self._expected = time.perf_counter() + self.heartbeat
+        self._after_id = self._root.after(int(self.heartbeat * 1000), self._beat)
+
+    def _beat(self):
+        now = time.perf_counter()
+        lag = now - self._expected
+        if lag > self.stall_threshold:
+            if self._active:
+                blamed = self._active[-1]
+            elif self._since_beat is not None:
+                blamed = self._since_beat[0]
+            else:
+                blamed = None
+            self.stall_count += 1
+            self.stalls.append({
+                "at_s": round(now - self.start, 3),
+                "lag_ms": round(lag * 1000, 1),
+                "span": blamed,
+            })
+        self._since_beat = None
+        self._schedule()
+
+    def stop(self):
+        if self._after_id is not None:
+            self._root.after_cancel(self._after_id)
+            self._after_id = None
+
+    # Reporting
+
+    def stats(self):
+        handlers = {}
+        for name, samples in self.samples.items():
+            ordered = sorted(samples)
+            handlers[name] = {
+                "count": self.calls[name],
+                "p50_ms": round(percentile(ordered, 0.50) * 1000, 2),
+                "p99_ms": round(percentile(ordered, 0.99) * 1000, 2),
+                "max_ms": round(ordered[-1] * 1000, 2),
+            }
+        blamed = {}
+        for stall in self.stalls:
+            key = stall["span"] or "(untracked)"
+            blamed[key] = blamed.get(key, 0) + 1
+        return {
+            "uptime_s": round(time.perf_counter() - self.start, 1),
+            "handlers": handlers,
+            "stall_count": self.stall_count,
+            "stalls_by_span": blamed,
+            "recent_stalls": list(self.stalls),
+        }
+
+    def dump(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.stats(), f, indent=2)
+            f.write("\n")
+
+
+monitor = LatencyMonitor()
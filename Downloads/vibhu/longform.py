@@ -0,0 +1,100 @@
+import random
+
+DEFAULT_CHAPTERS = 12
+SCENES_PER_CHAPTER = 6
+
+ROMAN_NUMERALS = (
+    (1000, "M"), (900, "CM"), (500, "D"), (400, "CD"), (100, "C"), (90, "XC"),
+    (50, "L"), (40, "XL"), (10, "X"), (9, "IX"), (5, "V"), (4, "IV"), (1, "I"),
+)
+
+
+def roman(number):
+    result = []
+    for value, numeral in ROMAN_NUMERALS:
+        count, number = divmod(number, value)
+        result.append(numeral * count)
+    return "".join(result)
+
+
+class ChapterHeading(str):
+    # A paragraph that starts a chapter; viewers use it for navigation, while
+    # anything that just wants text can treat it as a plain string
+    __slots__ = ()
+
+
+def chapter_heading(number, setting):
+    return ChapterHeading(f"Chapter {roman(number)}: {setting}")
+
+
+class LongFormStory:
+    # A novel-length story produced one paragraph at a time.
+    #
+    # Chapter one opens with the story's own setting and the outline's opening
+    # and meeting; later chapters travel through the other settings. Each
+    # chapter mixes scene paragraphs, with the twists spread across the middle
+    # and the theme's resolution and the outline's ending in the final
+    # chapter. Only the current paragraph is ever held, so memory stays flat
+    # however many chapters are requested, and the same seed always yields the
+    # same text.
+    def __init__(self, engine, data, chapters=DEFAULT_CHAPTERS,
+                 scenes_per_chapter=SCENES_PER_CHAPTER, seed=0):
+        if chapters < 1:
+            raise ValueError("a long-form story needs at least one chapter")
+        self.templates = engine.templates
+        if not self.templates.chapter_openings or not self.templates.chapter_scenes:
+            raise ValueError("plots.json has no chapter openings or scenes for long-form stories")
+        self.engine = engine
+        self.data = data
+        self.chapters = chapters
+        self.scenes_per_chapter = scenes_per_chapter
+        self.seed = seed
+
+    def __iter__(self):
+        return self.paragraphs()
+
+    def settings_order(self):
+        # The chosen setting first, then the rest in a seeded order
+        locations = [loc for loc in self.engine.settings["locations"] if loc != self.data["setting"]]
+        random.Random(self.seed).shuffle(locations)
+        return [self.data["setting"]] + locations
+
+    def paragraphs(self):
+        templates = self.templates
+        rng = random.Random(self.seed)
+        settings = self.settings_order()
+        base_values = templates.prepare(self.data)
+        twists = list(templates.twists)
+        rng.shuffle(twists)
+        theme_choice = self.engine.plot_elements.get("themes", {}).get(self.data["theme"], {})
+        resolution = templates.resolutions[theme_choice.get("resolution", 0)]
+        # Twists land in evenly spaced middle chapters
+        twist_chapters = {}
+        if self.chapters > 2:
+            step = (self.chapters - 1) / (len(twists) + 1)
+            for i, twist in enumerate(twists):
+                twist_chapters.setdefault(1 + round(step * (i + 1)), twist)
+
+        for number in range(1, self.chapters + 1):
+            setting = settings[(number - 1) % len(settings)]
+            values = templates.prepare(dict(self.data, setting=setting))
+            yield chapter_heading(number, setting)
+
+            if number == 1:
+                yield templates.paragraphs["opening"].render(base_values)
+                yield templates.paragraphs["meeting"].render(base_values)
+            else:
+                yield rng.choice(templates.chapter_openings).render(values)
+
+            scenes = rng.sample(templates.chapter_scenes,
+                                min(self.scenes_per_chapter, len(templates.chapter_scenes)))
+            middle = len(scenes) // 2
+            for i, scene in enumerate(scenes):
+                yield scene.render(values)
+                if i == middle and number in twist_chapters:
+                    yield twist_chapters[number].render(values)
+
+            if number == self.chapters:
+                yield templates.paragraphs["courtship"].render(base_values)
+                yield resolution.render(base_values)
+                yield templates.paragraphs["ending"].render(base_values)
@@ -1,53 +1,143 @@
+import time
+_START = time.perf_counter()
+
+import argparse
 import tkinter as tk
-from tkinter import scrolledtext, messagebox, filedialog, ttk
-from PIL import Image, ImageDraw, ImageFont, ImageTk
-import pygame
-import pyttsx3
+from tkinter import messagebox, filedialog, ttk
 import threading
 import os
-import time
 import random
-import json
-from ttkthemes import ThemedTk
-import customtkinter as ctk
+from startup_profile import profiler
+from lazy_import import LazyModule
+from story_engine import StoryEngine
+from longform import DEFAULT_CHAPTERS, LongFormStory
+from typewriter import TYPING_SPEEDS, TypewriterRenderer
+from story_viewer import StoryViewer
+from ui_themes import ThemeSwitcher
+from settings_store import SettingsStore, normalize as normalize_settings
+from task_scheduler import TaskCancelled, TaskScheduler
+from latency_monitor import monitor
+from image_cache import BackgroundImageCache
+from asset_cache import AssetCache
+from tts_worker import TTSWorker
+from narration_cache import NarrationCache, NarrationRenderer
+from pdf_writer import export_story, split_paragraphs
+from story_cards import save_card
+from audio_manager import MusicManager
+from story_library import PAGE_SIZE as LIBRARY_PAGE_SIZE, StoryLibrary
+
+# Audio, TTS and imaging toolkits load on first use (or on the background
+# init thread) so the window can appear before they are imported
+pygame = LazyModule('pygame')
+ImageTk = LazyModule('PIL.ImageTk')
+
+profiler.start = _START
+profiler.record("imports", _START, time.perf_counter())
+
+# Resize events are coalesced until the window has been still this long
+RESIZE_DEBOUNCE_MS = 150
+# Settings are written once they have stopped changing for this long, so a
+# slider drag or a run of combobox picks becomes a single write
+SETTINGS_SAVE_DELAY_MS = 500
+
+def count_widgets(widget):
+    return 1 + sum(count_widgets(child) for child in widget.winfo_children())
+
+
+def unbind_one(widget, sequence, funcid):
+    # Remove one handler added with bind(..., add='+') and leave the rest.
+    # Before Python 3.13, unbind(sequence, funcid) cleared them all.
+    script = widget.bind(sequence)
+    widget.bind(sequence, "\n".join(line for line in script.split("\n") if funcid not in line))
+    widget.deletecommand(funcid)
+
+
+def checked(items, token):
+    # Stop a streaming job between items once its task has been cancelled
+    for item in items:
+        token.check()
+        yield item
+
 
 class AustenStoryCreator:
-    def __init__(self):
+    def __init__(self, eager_tabs=False):
+        self.eager_tabs = eager_tabs
         self.setup_audio()
-        self.load_story_elements()
-        self.create_gui()
+        with profiler.phase("data load"):
+            self.load_story_elements()
+        with profiler.phase("GUI build"):
+            self.create_gui()
         self.current_story_state = {}
+        self.latency_report = None
+        
+        # Audio and TTS come up in the background once the window is shown
+        self.first_map_id = self.root.bind('<Map>', self.on_first_map, add='+')
         
     def setup_audio(self):
-        pygame.mixer.init()
+        music_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'music')
         self.bg_music_paths = {
-            "Romance": "music/romance.mp3",
-            "Drama": "music/drama.mp3",
-            "Mystery": "music/mystery.mp3",
-            "Comedy": "music/comedy.mp3",
-            "Tragedy": "music/tragedy.mp3"
+            "Romance": os.path.join(music_dir, "romance.mp3"),
+            "Drama": os.path.join(music_dir, "drama.mp3"),
+            "Mystery": os.path.join(music_dir, "mystery.mp3"),
+            "Comedy": os.path.join(music_dir, "comedy.mp3"),
+            "Tragedy": os.path.join(music_dir, "tragedy.mp3")
         }
         
-        try:
-            # Test if text-to-speech is available
-            engine = pyttsx3.init()
-            engine.stop()
-            self.voice_enabled = True
-        except:
-            self.voice_enabled = False
+        # Filled in by init_audio; None means "not checked yet"
+        self.mixer_ready = None
+        self.voice_enabled = None
+        self.music = None
+        self.audio_lock = threading.Lock()
             
         self.music_playing = False
         self.voice_playing = False
-        self.current_engine = None
+        self.tts = None
+        self.narration_cache = NarrationCache()
+        self.narration_renderer = NarrationRenderer(self.narration_cache)
+        self.narration_channel = None
+        self.narration_paused = False
+
+    def on_first_map(self, event):
+        if event.widget != self.root:
+            return
+        unbind_one(self.root, '<Map>', self.first_map_id)
+        profiler.mark("first window")
+        if profiler.enabled:
+            profiler.count("widgets", count_widgets(self.root))
+        self.scheduler.submit("audio-init", lambda token: self.background_init())
+
+    def background_init(self):
+        self.init_audio()
+        profiler.report()
+
+    def init_audio(self):
+        # Runs once, on the background thread or on first use, whichever is first
+        with self.audio_lock:
+            if self.voice_enabled is not None:
+                return
+            with profiler.phase("audio init"):
+                try:
+                    pygame.mixer.init()
+                    self.music = MusicManager(self.bg_music_paths)
+                    # Decode theme tracks in the background, current theme first
+                    self.music.preload(first=self.current_theme)
+                    self.mixer_ready = True
+                except Exception as e:
+                    print(f"Error initializing audio: {e}")
+                    self.mixer_ready = False
+                
+                # One long-lived TTS engine; voices are resolved once, here
+                self.tts = TTSWorker(rate=self.voice_rate, on_event=self.on_tts_event)
+                self.tts.start()
+                self.tts.ready.wait()
+                self.voice_enabled = self.tts.available
 
     def load_story_elements(self):
-        # Load story elements from JSON files
-        with open('data/characters.json', 'r') as f:
-            self.character_traits = json.load(f)
-        with open('data/settings.json', 'r') as f:
-            self.settings = json.load(f)
-        with open('data/plots.json', 'r') as f:
-            self.plot_elements = json.load(f)
+        # Story elements live in the headless engine; the GUI only reads them
+        self.engine = StoryEngine()
+        self.character_traits = self.engine.character_traits
+        self.settings = self.engine.settings
+        self.plot_elements = self.engine.plot_elements
             
         # Get the absolute path to the images directory
         base_dir = os.path.dirname(os.path.abspath(__file__))
@@ -83,12 +173,34 @@ class AustenStoryCreator:
                 "image": os.path.join(images_dir, "tragedy_bg.png")
             }
         }
+        
+        self.library = None
+        
+        self.image_cache = BackgroundImageCache(
+            {theme: data["image"] for theme, data in self.themes.items()})
+        self.current_theme = None
+        self.bg_key = None
+        self.bg_pending_key = None
 
     def create_gui(self):
-        # Create themed window
-        self.root = ThemedTk(theme="clearlooks")
+        from ttkthemes import ThemedTk
+        
+        # Create themed window; the theme itself comes from a style snapshot
+        self.root = ThemedTk()
+        with profiler.phase("settings load"):
+            self.settings_store = SettingsStore()
+            self.saved_settings = self.settings_store.load()
+        self.theme_switcher = ThemeSwitcher(self.root)
+        self.theme_switcher.apply(self.saved_settings["app_theme"])
         self.root.title("📚 The Austen Experience")
         self.root.geometry("1200x800")
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        
+        # Every background job and every UI update from a worker goes through here
+        self.scheduler = TaskScheduler(self.root)
+        self.load_background_assets()
+        # Handler timings and event-loop stalls, shown from the Settings tab
+        monitor.watch(self.root)
         
         # Configure the root window
         self.root.grid_rowconfigure(0, weight=1)
@@ -104,12 +216,19 @@ class AustenStoryCreator:
         self.notebook = ttk.Notebook(self.main_container)
         self.notebook.grid(row=0, column=0, sticky="nsew")
         
-        # Create tabs
+        # Create tabs; Settings and Help are only built once first opened
+        self.create_settings_vars()
+        self.lazy_tabs = {}
+        self.notebook.bind('<<NotebookTabChanged>>', self.build_selected_tab, add='+')
         self.create_story_tab()
-        self.create_settings_tab()
-        self.create_help_tab()
+        self.add_lazy_tab("Settings", self.build_settings_tab)
+        self.create_library_tab()
+        self.add_lazy_tab("Help", self.build_help_tab)
+        self.watch_settings()
         
         # Bind resize event
+        self.window_size = None
+        self.resize_after_id = None
         self.root.bind('<Configure>', self.on_window_resize)
 
     def create_story_tab(self):
@@ -217,17 +336,43 @@ class AustenStoryCreator:
                                          width=30)
         self.setting_select.grid(row=0, column=3, padx=5, sticky="w")
 
+        self.longform_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(options_frame,
+                        text="Long-form (chapters)",
+                        variable=self.longform_var).grid(row=1, column=0, columnspan=2,
+                                                         padx=(0,5), pady=(10,0), sticky="w")
+        ttk.Label(options_frame, text="Chapters:").grid(row=1, column=2, padx=5, pady=(10,0))
+        self.chapters_var = tk.IntVar(value=DEFAULT_CHAPTERS)
+        ttk.Spinbox(options_frame,
+                    from_=1, to=500,
+                    textvariable=self.chapters_var,
+                    width=8).grid(row=1, column=3, padx=5, pady=(10,0), sticky="w")
+
     def create_output_area(self, parent):
         output_frame = ttk.Frame(parent)
         output_frame.grid(row=3, column=0, sticky="nsew", padx=20, pady=(0,10))
         
         output_frame.grid_columnconfigure(0, weight=1)
-        output_frame.grid_rowconfigure(0, weight=1)
-        
-        self.story_text = scrolledtext.ScrolledText(
+        output_frame.grid_rowconfigure(1, weight=1)
+        
+        nav_frame = ttk.Frame(output_frame)
+        nav_frame.grid(row=0, column=0, sticky="e", pady=(0,5))
+        ttk.Label(nav_frame, text="Jump to chapter:").pack(side=tk.LEFT, padx=(0,5))
+        self.chapter_var = tk.StringVar()
+        self.chapter_select = ttk.Combobox(nav_frame,
+                                         textvariable=self.chapter_var,
+                                         state="readonly",
+                                         width=40,
+                                         postcommand=self.refresh_chapter_list)
+        self.chapter_select.pack(side=tk.LEFT)
+        self.chapter_select.bind('<<ComboboxSelected>>', self.jump_to_chapter)
+        
+        # Only the paragraphs around the view live in the Text widget, so long
+        # stories scroll, resize and change font as quickly as short ones
+        self.story_viewer = StoryViewer(
             output_frame,
-            wrap=tk.WORD,
-            font=("Playfair Display", 12),
+            font_family="Playfair Display",
+            font_size=int(self.font_size.get()),
             bg="white",
             relief="solid",
             borderwidth=1,
@@ -235,10 +380,22 @@ class AustenStoryCreator:
             padx=20,
             pady=10
         )
-        self.story_text.grid(row=0, column=0, sticky="nsew")
+        self.story_viewer.grid(row=1, column=0, sticky="nsew")
+        self.story_text = self.story_viewer.text
         
-        self.story_text.tag_configure('body', spacing1=10, spacing2=2, spacing3=10, justify='center')
-        self.story_text.tag_configure('typing', font=("Playfair Display", 12))
+        self.typewriter = TypewriterRenderer(self.story_viewer,
+                                             cps=TYPING_SPEEDS[self.typing_speed.get()])
+
+    def refresh_chapter_list(self):
+        # Filled in when the list opens; a long story can add chapters faster
+        # than it is worth updating the list for each one
+        self.chapter_select.configure(values=[title for _, title in self.story_viewer.chapters()])
+
+    def jump_to_chapter(self, event=None):
+        position = self.chapter_select.current()
+        chapters = self.story_viewer.chapters()
+        if 0 <= position < len(chapters):
+            self.story_viewer.jump_to(chapters[position][0])
 
     def create_control_panel(self, parent):
         control_frame = ttk.Frame(parent)
@@ -246,9 +403,12 @@ class AustenStoryCreator:
         
         buttons = [
             ("Generate Story", self.generate_story, "#4CAF50"),
+            ("Skip Typing", self.skip_typing, "#607D8B"),
             ("Read Aloud", self.speak_story, "#2196F3"),
+            ("Pause/Resume", self.toggle_pause_speaking, "#03A9F4"),
             ("Stop Reading", self.stop_speaking, "#f44336"),
             ("Export PDF", self.export_to_pdf, "#9C27B0"),
+            ("Save Card", self.save_story_card, "#673AB7"),
             ("Toggle Music", self.toggle_music, "#FF9800"),
             ("Clear", self.clear_all, "#f44336")
         ]
@@ -260,10 +420,44 @@ class AustenStoryCreator:
                            style=f"Accent.TButton")
             btn.pack(side=tk.LEFT, padx=5)
 
-    def create_settings_tab(self):
-        settings_frame = ttk.Frame(self.notebook)
-        self.notebook.add(settings_frame, text="Settings")
-        
+    def create_settings_vars(self):
+        # The settings themselves exist from the start, so saving and the
+        # handlers work whether or not the Settings tab has been built yet.
+        # They start from the saved settings; the story tab, typewriter and
+        # TTS read them when they are created.
+        settings = self.saved_settings
+        self.font_size = tk.StringVar(value=settings["font_size"])
+        self.typing_speed = tk.StringVar(value=settings["typing_speed"])
+        self.app_theme = tk.StringVar(value=settings["app_theme"])
+        self.voice_speed = tk.StringVar(value=str(settings["voice_speed"]))
+        self.music_enabled = tk.BooleanVar(value=settings["music_enabled"])
+        self.voice_rate = settings["voice_speed"]
+        self.settings_after_id = None
+
+    def watch_settings(self):
+        # Any change, from the Settings tab or elsewhere, schedules an autosave
+        for var in (self.font_size, self.typing_speed, self.app_theme,
+                    self.voice_speed, self.music_enabled):
+            var.trace_add('write', self.schedule_settings_save)
+
+    def add_lazy_tab(self, text, build):
+        # An empty frame holds the tab's place until it is first selected,
+        # then build(frame) fills it in. --eager-tabs builds it right away.
+        frame = ttk.Frame(self.notebook)
+        self.notebook.add(frame, text=text)
+        if self.eager_tabs:
+            build(frame)
+        else:
+            self.lazy_tabs[str(frame)] = (text, frame, build)
+
+    def build_selected_tab(self, event=None):
+        entry = self.lazy_tabs.pop(self.notebook.select(), None)
+        if entry is not None:
+            text, frame, build = entry
+            with monitor.span(f"build_tab[{text}]"):
+                build(frame)
+
+    def build_settings_tab(self, settings_frame):
         # Create settings container
         settings_container = ttk.Frame(settings_frame, padding=20)
         settings_container.pack(fill=tk.BOTH, expand=True)
@@ -277,45 +471,27 @@ class AustenStoryCreator:
         font_frame.pack(fill=tk.X, pady=5)
         
         ttk.Label(font_frame, text="Story Font Size:").grid(row=0, column=0, padx=5, pady=5, sticky="w")
-        self.font_size = tk.StringVar(value="12")
         font_size_combo = ttk.Combobox(font_frame, textvariable=self.font_size, 
                                      values=["10", "12", "14", "16", "18"])
         font_size_combo.grid(row=0, column=1, padx=5, pady=5)
         font_size_combo.bind('<<ComboboxSelected>>', self.update_font_size)
         
+        ttk.Label(font_frame, text="Typing Speed:").grid(row=1, column=0, padx=5, pady=5, sticky="w")
+        typing_speed_combo = ttk.Combobox(font_frame, textvariable=self.typing_speed,
+                                        values=list(TYPING_SPEEDS.keys()), state="readonly")
+        typing_speed_combo.grid(row=1, column=1, padx=5, pady=5)
+        typing_speed_combo.bind('<<ComboboxSelected>>', self.update_typing_speed)
+        
         # Theme Settings
         theme_frame = ttk.LabelFrame(appearance_frame, text="Theme", padding=10)
         theme_frame.pack(fill=tk.X, pady=5)
         
         ttk.Label(theme_frame, text="Application Theme:").grid(row=0, column=0, padx=5, pady=5, sticky="w")
-        self.app_theme = tk.StringVar(value="clearlooks")
         theme_combo = ttk.Combobox(theme_frame, textvariable=self.app_theme,
-                                 values=["clearlooks", "equilux", "adapta", "arc"])
+                                 values=self.theme_switcher.names(), state="readonly")
         theme_combo.grid(row=0, column=1, padx=5, pady=5)
         theme_combo.bind('<<ComboboxSelected>>', self.update_theme)
         
-        # Custom styling for adapta theme
-        self.adapta_colors = {
-            "primary": "#FF6B6B",  # Coral red
-            "secondary": "#4ECDC4",  # Turquoise
-            "accent": "#FFD166",  # Yellow
-            "background": "#FFFFFF",  # Pure white background
-            "text": "#000000",  # Black text for maximum contrast
-            "button_bg": "#4ECDC4",  # Turquoise for button background
-            "button_text": "#000000",  # Black text for buttons
-            "button_hover": "#FFD166",  # Yellow hover state
-            "button_hover_text": "#000000",  # Black text for button hover
-            "tab_bg": "#4ECDC4",  # Turquoise
-            "tab_selected": "#FFD166",  # Yellow
-            "tab_text": "#000000",  # Black text for tabs
-            "combo_bg": "#FFFFFF",  # White background for combo
-            "combo_text": "#000000",  # Black text for combo
-            "scale_bg": "#4ECDC4",  # Turquoise
-            "check_bg": "#FFFFFF",  # White background
-            "check_text": "#000000",  # Black text
-            "label_frame_text": "#000000"  # Black text for frame labels
-        }
-        
         # Audio Settings
         audio_frame = ttk.LabelFrame(settings_container, text="Audio Settings", padding=10)
         audio_frame.pack(fill=tk.X, pady=5)
@@ -325,7 +501,6 @@ class AustenStoryCreator:
         voice_frame.pack(fill=tk.X, pady=5)
         
         ttk.Label(voice_frame, text="Voice Speed:").grid(row=0, column=0, padx=5, pady=5, sticky="w")
-        self.voice_speed = tk.StringVar(value="150")
         speed_scale = ttk.Scale(voice_frame, from_=100, to=300, variable=self.voice_speed,
                               orient=tk.HORIZONTAL, command=self.update_voice_speed)
         speed_scale.grid(row=0, column=1, padx=5, pady=5, sticky="ew")
@@ -334,11 +509,19 @@ class AustenStoryCreator:
         music_frame = ttk.LabelFrame(audio_frame, text="Music Settings", padding=10)
         music_frame.pack(fill=tk.X, pady=5)
         
-        self.music_enabled = tk.BooleanVar(value=True)
         music_check = ttk.Checkbutton(music_frame, text="Enable Background Music",
                                     variable=self.music_enabled)
         music_check.pack(padx=5, pady=5, anchor="w")
         
+        # Performance
+        perf_frame = ttk.LabelFrame(settings_container, text="Performance", padding=10)
+        perf_frame.pack(fill=tk.X, pady=5)
+        
+        ttk.Button(perf_frame, text="Show Latency Stats",
+                   command=self.show_latency_stats).pack(side=tk.LEFT, padx=5)
+        ttk.Button(perf_frame, text="Save Latency Report...",
+                   command=self.save_latency_report).pack(side=tk.LEFT, padx=5)
+        
         # Save Settings Button
         save_frame = ttk.Frame(settings_container)
         save_frame.pack(fill=tk.X, pady=20)
@@ -346,10 +529,118 @@ class AustenStoryCreator:
         save_btn = ttk.Button(save_frame, text="Save Settings", command=self.save_settings)
         save_btn.pack(side=tk.RIGHT, padx=5)
 
-    def create_help_tab(self):
-        help_frame = ttk.Frame(self.notebook)
-        self.notebook.add(help_frame, text="Help")
-        
+    def create_library_tab(self):
+        library_frame = ttk.Frame(self.notebook, padding=20)
+        self.notebook.add(library_frame, text="Library")
+        self.library_frame = library_frame
+        
+        library_frame.grid_rowconfigure(1, weight=1)
+        library_frame.grid_columnconfigure(0, weight=1)
+        
+        # Search bar
+        search_frame = ttk.Frame(library_frame)
+        search_frame.grid(row=0, column=0, columnspan=2, sticky="ew", pady=(0, 10))
+        search_frame.grid_columnconfigure(1, weight=1)
+        
+        ttk.Label(search_frame, text="Search:").grid(row=0, column=0, padx=(0, 5))
+        self.library_query = tk.StringVar()
+        search_entry = ttk.Entry(search_frame, textvariable=self.library_query)
+        search_entry.grid(row=0, column=1, sticky="ew", padx=5)
+        search_entry.bind('<Return>', self.search_library)
+        ttk.Button(search_frame, text="Search", command=self.search_library).grid(row=0, column=2, padx=5)
+        self.library_status = ttk.Label(search_frame, text="")
+        self.library_status.grid(row=0, column=3, padx=5)
+        
+        # Results, fetched a page at a time as the list is scrolled
+        columns = ("heroine", "hero", "theme", "setting", "created")
+        self.library_tree = ttk.Treeview(library_frame, columns=columns, show="headings")
+        for column in columns:
+            self.library_tree.heading(column, text=column.title())
+            self.library_tree.column(column, width=150)
+        self.library_tree.grid(row=1, column=0, sticky="nsew")
+        self.library_tree.bind('<Double-1>', self.open_library_story)
+        
+        scrollbar = ttk.Scrollbar(library_frame, orient=tk.VERTICAL, command=self.library_tree.yview)
+        scrollbar.grid(row=1, column=1, sticky="ns")
+        self.library_scrollbar = scrollbar
+        self.library_tree.configure(yscrollcommand=self.on_library_scroll)
+        
+        ttk.Label(library_frame,
+                  text='Double-click a story to open it. Use field:word (e.g. theme:mystery) '
+                       'and word* for prefix searches.').grid(row=2, column=0, sticky="w", pady=(10, 0))
+        
+        self.library_loaded = 0
+        self.library_last_id = None
+        self.library_exhausted = True
+        self.library_page_pending = False
+        self.notebook.bind('<<NotebookTabChanged>>', self.on_tab_changed, add='+')
+
+    def get_library(self):
+        # Opened on first use so startup never waits on the database
+        if self.library is None:
+            self.library = StoryLibrary()
+        return self.library
+
+    def on_tab_changed(self, event=None):
+        if self.notebook.select() == str(self.library_frame):
+            self.search_library()
+
+    def search_library(self, event=None):
+        self.library_tree.delete(*self.library_tree.get_children())
+        self.library_loaded = 0
+        self.library_last_id = None
+        self.library_exhausted = False
+        self.load_library_page()
+
+    def load_library_page(self):
+        self.library_page_pending = False
+        if self.library_exhausted:
+            return
+        query = self.library_query.get()
+        try:
+            # Paged by id rather than offset, so a story saved while the list
+            # is open does not shift the next page onto rows already shown
+            rows = self.get_library().search(query, limit=LIBRARY_PAGE_SIZE,
+                                             before_id=self.library_last_id)
+        except Exception as e:
+            self.library_status.config(text=f"Search failed: {e}")
+            self.library_exhausted = True
+            return
+        for story_id, heroine, hero, theme, setting, created_at, _ in rows:
+            created = time.strftime("%Y-%m-%d %H:%M", time.localtime(created_at))
+            if self.library_tree.exists(str(story_id)):
+                continue
+            self.library_tree.insert("", tk.END, iid=str(story_id),
+                                     values=(heroine, hero, theme, setting, created))
+            self.library_loaded += 1
+        if rows:
+            self.library_last_id = rows[-1][0]
+        self.library_exhausted = len(rows) < LIBRARY_PAGE_SIZE
+        more = "" if self.library_exhausted else "+"
+        self.library_status.config(text=f"{self.library_loaded}{more} stories")
+
+    def on_library_scroll(self, first, last):
+        self.library_scrollbar.set(first, last)
+        # Fetch the next page once the user nears the bottom; a fling sends
+        # many scroll events, but only one page load is queued at a time
+        if float(last) > 0.9 and not self.library_exhausted and not self.library_page_pending:
+            self.library_page_pending = True
+            self.root.after_idle(self.load_library_page)
+
+    def open_library_story(self, event=None):
+        selection = self.library_tree.selection()
+        if not selection:
+            return
+        stored = self.get_library().get(int(selection[0]))
+        if stored is None:
+            return
+        data, story = stored
+        self.current_story_state = {"id": int(selection[0]), "data": data, "text": story}
+        self.notebook.select(0)
+        self.typewriter_effect(story)
+        self.typewriter.skip_to_end()
+
+    def build_help_tab(self, help_frame):
         # Create help container
         help_container = ttk.Frame(help_frame, padding=20)
         help_container.pack(fill=tk.BOTH, expand=True)
@@ -442,16 +733,25 @@ The combination of theme and setting sets the stage for your story."""
 Generate Story:
 - Creates a new story based on your selections
 - Uses a typewriter effect for dramatic presentation
+- Typing speed can be adjusted in Settings
+
+Skip Typing:
+- Shows the rest of the story immediately
 
 Read Aloud:
 - Uses text-to-speech to narrate the story
-- Can be stopped at any time
+- Starts speaking as soon as the first sentence is ready
+- Can be paused, resumed or stopped at any time
 - Voice settings can be adjusted in Settings
 
 Export PDF:
 - Saves the current story as a PDF
 - Includes proper formatting and styling
 
+Save Card:
+- Saves a shareable image of the story: the theme's background, the title
+  and the opening lines
+
 Toggle Music:
 - Enables/disables background music
 - Music changes with the selected theme
@@ -464,127 +764,79 @@ Clear:
 
     def update_font_size(self, event=None):
         size = int(self.font_size.get())
-        self.story_text.configure(font=("Playfair Display", size))
+        self.story_viewer.set_font_size(size)
+
+    def update_typing_speed(self, event=None):
+        self.typewriter.set_rate(TYPING_SPEEDS[self.typing_speed.get()])
 
+    @monitor.instrument("update_theme")
     def update_theme(self, event=None):
-        theme = self.app_theme.get()
-        self.root.set_theme(theme)
-        
-        style = ttk.Style()
-        
-        # Reset all styles to default first
-        style.theme_use(theme)
-        
-        # Apply custom styling ONLY for adapta theme
-        if theme == "adapta":
-            # Configure base styles with strong contrast
-            style.configure("TFrame", 
-                          background=self.adapta_colors["background"])
-            
-            # Configure labels with dark text
-            style.configure("TLabel", 
-                          background=self.adapta_colors["background"],
-                          foreground=self.adapta_colors["text"],
-                          font=("Comic Sans MS", 11, "bold"))
-            
-            # Configure LabelFrame with dark text
-            style.configure("TLabelframe",
-                          background=self.adapta_colors["background"])
-            style.configure("TLabelframe.Label",
-                          foreground=self.adapta_colors["label_frame_text"],
-                          background=self.adapta_colors["background"],
-                          font=("Comic Sans MS", 11, "bold"))
-            
-            # Configure buttons with hover effect and visible text
-            style.configure("TButton",
-                          background=self.adapta_colors["button_bg"],
-                          foreground=self.adapta_colors["button_text"],
-                          font=("Comic Sans MS", 11, "bold"),
-                          padding=10)
-            style.map("TButton",
-                     background=[("active", self.adapta_colors["button_hover"]),
-                               ("pressed", self.adapta_colors["button_hover"])],
-                     foreground=[("active", self.adapta_colors["button_hover_text"]),
-                               ("pressed", self.adapta_colors["button_hover_text"])])
-            
-            # Configure comboboxes with white background and black text
-            style.configure("TCombobox",
-                          background=self.adapta_colors["combo_bg"],
-                          foreground=self.adapta_colors["combo_text"],
-                          selectbackground=self.adapta_colors["accent"],
-                          selectforeground=self.adapta_colors["text"],
-                          fieldbackground=self.adapta_colors["combo_bg"],
-                          font=("Comic Sans MS", 10))
-            
-            # Configure checkbuttons with dark text
-            style.configure("TCheckbutton",
-                          background=self.adapta_colors["check_bg"],
-                          foreground=self.adapta_colors["check_text"],
-                          font=("Comic Sans MS", 11))
-            
-            # Configure scales with contrasting colors
-            style.configure("Horizontal.TScale",
-                          background=self.adapta_colors["background"],
-                          troughcolor=self.adapta_colors["scale_bg"])
-            
-            # Configure notebook and tabs
-            style.configure("TNotebook",
-                          background=self.adapta_colors["background"])
-            
-            style.configure("TNotebook.Tab",
-                          background=self.adapta_colors["tab_bg"],
-                          foreground=self.adapta_colors["tab_text"],
-                          padding=[10, 5],
-                          font=("Comic Sans MS", 11, "bold"))
-            
-            style.map("TNotebook.Tab",
-                     background=[("selected", self.adapta_colors["tab_selected"])],
-                     foreground=[("selected", self.adapta_colors["tab_text"])])
-            
-            # Configure entry fields with white background and black text
-            style.configure("TEntry",
-                          fieldbackground=self.adapta_colors["combo_bg"],
-                          foreground=self.adapta_colors["combo_text"],
-                          font=("Comic Sans MS", 10))
-            
-            # Configure scrollbars
-            style.configure("Vertical.TScrollbar",
-                          background=self.adapta_colors["tab_bg"],
-                          troughcolor=self.adapta_colors["background"],
-                          arrowcolor=self.adapta_colors["text"])
-            
-            style.configure("Horizontal.TScrollbar",
-                          background=self.adapta_colors["tab_bg"],
-                          troughcolor=self.adapta_colors["background"],
-                          arrowcolor=self.adapta_colors["text"])
-        else:
-            # For other themes, use their default styles
-            style.configure("TLabel", font=("Helvetica", 10))
-            style.configure("TButton", font=("Helvetica", 10))
-            style.configure("TCheckbutton", font=("Helvetica", 10))
-            style.configure("TCombobox", font=("Helvetica", 10))
-            style.configure("TNotebook.Tab", font=("Helvetica", 10))
-            style.configure("TLabelframe.Label", font=("Helvetica", 10))
+        # Snapshots are compiled once; re-selecting the active theme does nothing
+        self.theme_switcher.apply(self.app_theme.get())
 
     def update_voice_speed(self, value):
-        if self.current_engine:
-            self.current_engine.setProperty('rate', int(value))
+        # Picked up by the TTS worker before the next sentence. The scale
+        # reports every fractional step of a drag; only whole rates matter.
+        rate = int(round(float(value)))
+        if rate == self.voice_rate:
+            return
+        self.voice_rate = rate
+        if self.tts:
+            self.tts.set_rate(self.voice_rate)
 
-    def save_settings(self):
-        settings = {
+    def current_settings(self):
+        return normalize_settings({
             "font_size": self.font_size.get(),
             "app_theme": self.app_theme.get(),
             "voice_speed": self.voice_speed.get(),
+            "typing_speed": self.typing_speed.get(),
             "music_enabled": self.music_enabled.get()
-        }
+        })
+
+    def schedule_settings_save(self, *args):
+        if self.settings_after_id is not None:
+            self.root.after_cancel(self.settings_after_id)
+        self.settings_after_id = self.root.after(SETTINGS_SAVE_DELAY_MS, self.autosave_settings)
+
+    def autosave_settings(self):
+        self.settings_after_id = None
+        settings = self.current_settings()
+        if settings == self.saved_settings:
+            return
+        self.saved_settings = settings
+        
+        def write(token):
+            # Holding the store's lock, so flush_settings either cancels this
+            # write before it starts or waits for it and then writes over it
+            with self.settings_store.lock:
+                token.check()
+                self.settings_store.save(settings)
         
+        self.scheduler.submit("settings", write, on_error=self.on_settings_save_failed)
+
+    def on_settings_save_failed(self, error):
+        print(f"Error saving settings: {error}")
+        # Retry with the next change
+        self.saved_settings = None
+
+    def flush_settings(self):
+        # Write any pending change now, on this thread
+        if self.settings_after_id is not None:
+            self.root.after_cancel(self.settings_after_id)
+            self.settings_after_id = None
+        self.scheduler.cancel("settings")
+        settings = self.current_settings()
+        self.settings_store.save(settings)
+        self.saved_settings = settings
+
+    def save_settings(self):
         try:
-            with open('settings.json', 'w') as f:
-                json.dump(settings, f)
+            self.flush_settings()
             messagebox.showinfo("Success", "Settings saved successfully!")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to save settings: {e}")
 
+    @monitor.instrument("generate_story")
     def generate_story(self):
         # Validate inputs
         if not self.validate_inputs():
@@ -606,12 +858,53 @@ Clear:
             "setting": self.setting_var.get()
         }
         
+        if self.longform_var.get():
+            self.generate_long_story(story_data)
+            return
+
         # Generate story using the story elements
         story = self.create_story(story_data)
         
+        # Keep every story in the library so it survives Clear and restarts
+        try:
+            story_id = self.get_library().add(story_data, story)
+        except Exception as e:
+            print(f"Error saving story to library: {e}")
+            story_id = None
+        self.current_story_state = {"id": story_id, "data": story_data, "text": story}
+        
         # Display with typewriter effect
         self.typewriter_effect(story)
 
+    def long_story(self):
+        # A fresh paragraph generator for the current long-form story; the
+        # seed makes it reproducible, so the text never has to be kept whole
+        state = self.current_story_state["longform"]
+        return LongFormStory(self.engine, self.current_story_state["data"],
+                             chapters=state["chapters"], seed=state["seed"])
+
+    def generate_long_story(self, story_data):
+        try:
+            chapters = max(1, self.chapters_var.get())
+        except tk.TclError:
+            chapters = DEFAULT_CHAPTERS
+        # Novel-length text is not stored in the library; the seed and
+        # chapter count are enough to regenerate it for export
+        self.current_story_state = {
+            "id": None,
+            "data": story_data,
+            "longform": {"chapters": chapters, "seed": random.randrange(2 ** 32)},
+        }
+        try:
+            story = self.long_story()
+        except ValueError as e:
+            self.current_story_state = {}
+            messagebox.showerror("Error", str(e))
+            return
+        # The typewriter pulls paragraphs as it reaches them, so the first one
+        # appears straight away while the rest are still to be written
+        self.typewriter_effect(story)
+
     def validate_inputs(self):
         required_fields = [
             (self.heroine_name.get(), "Heroine's name"),
@@ -632,132 +925,123 @@ Clear:
         return True
 
     def create_story(self, data):
-        theme = data['theme'].lower().replace(' ', '_')
-        method_name = f"generate_{theme}_story"
-        story_generator = getattr(self, method_name, self.generate_default_story)
-        return story_generator(data)
-
-    def generate_default_story(self, data):
-        return f"""In the elegant society of {data['setting']}, where manners and propriety reigned supreme, 
-the {data['heroine']['personality'].lower()} Miss {data['heroine']['name']}, a {data['heroine']['status'].lower()},
-found her life taking an unexpected turn.
-
-It was during one of Lady Catherine's renowned evening gatherings that she first encountered 
-Mr. {data['hero']['name']}, a {data['hero']['personality'].lower()} {data['hero']['status'].lower()},
-whose presence caused quite a stir among the local gentry.
-
-Through a series of social gatherings and chance encounters, they discovered that first impressions 
-are not always to be trusted, and that the heart often has wisdom that reason cannot comprehend.
-
-And so, in the time-honored tradition of all good stories, they found that happiness often comes 
-not in the way we expect, but in the way that suits us best."""
+        return self.engine.create_story(data)
 
     def typewriter_effect(self, text):
-        self.story_text.delete(1.0, tk.END)
-        
-        def type_text():
-            # Add initial newline for spacing
-            self.story_text.insert(tk.END, '\n')
-            
-            # Split text into paragraphs
-            paragraphs = text.split('\n\n')
-            
-            for i, paragraph in enumerate(paragraphs):
-                # Type each character with delay
-                for char in paragraph:
-                    self.story_text.insert(tk.END, char, ('body', 'typing'))
-                    self.story_text.see(tk.END)
-                    self.story_text.update()
-                    
-                    # Adjust delay based on punctuation
-                    if char in '.!?':
-                        time.sleep(0.1)  # Longer pause for sentence endings
-                    elif char in ',;:':
-                        time.sleep(0.05)  # Medium pause for other punctuation
-                    else:
-                        time.sleep(0.02)  # Quick typing for regular characters
-                
-                # Add paragraph breaks except for the last paragraph
-                if i < len(paragraphs) - 1:
-                    self.story_text.insert(tk.END, '\n\n')
-            
-            # Apply final formatting
-            self.story_text.tag_add('body', '1.0', tk.END)
-        
-        # Run typing effect in a separate thread
-        threading.Thread(target=type_text, daemon=True).start()
+        # Rendered from the Tk event loop in frame-sized batches; a new story
+        # (or Clear) supersedes the one being typed
+        self.scheduler.claim("typing").on_cancel(self.typewriter.cancel)
+        self.chapter_var.set('')
+        self.typewriter.start(text)
 
+    def skip_typing(self):
+        self.typewriter.skip_to_end()
+
+    @monitor.instrument("speak_story")
     def speak_story(self):
+        self.init_audio()
         if not self.voice_enabled:
             messagebox.showerror("Error", "Text-to-speech not available")
             return
             
-        text = self.story_text.get(1.0, tk.END).strip()
+        text = self.story_viewer.get_text().strip()
         if not text:
             messagebox.showinfo("Notice", "No story to read")
             return
-            
-        def speak():
+        
+        # Reading is one task: a new one (or Stop) halts whatever was playing
+        self.stop_speaking()
+        speech = self.scheduler.claim("speech")
+        speech.on_cancel(self.halt_speech)
+        
+        # Replay pre-rendered narration instantly when we have it
+        rate = self.voice_rate
+        cached = self.narration_cache.get(text, self.tts.voice_id, rate)
+        if cached and self.mixer_ready:
             try:
-                if self.current_engine:
-                    try:
-                        self.current_engine.stop()
-                    except:
-                        pass
-                    self.current_engine = None
-                
-                engine = pyttsx3.init()
-                self.current_engine = engine
-                
-                voices = engine.getProperty('voices')
-                for voice in voices:
-                    if "female" in voice.name.lower():
-                        engine.setProperty('voice', voice.id)
-                        break
-                
-                self.voice_playing = True
-                engine.say(text)
-                engine.runAndWait()
+                sound = pygame.mixer.Sound(cached)
+                self.narration_channel = sound.play()
+                self.narration_paused = False
+                return
             except Exception as e:
-                print(f"Error in text-to-speech: {e}")
+                print(f"Error playing cached narration: {e}")
+        
+        # Streamed sentence by sentence; replaces anything already being read.
+        # Meanwhile a separate process renders it to the cache, at the rate it
+        # is spoken at, so the next replay is instant. Stop or another Read
+        # Aloud drops the render if it has not started yet; a failed render
+        # is only logged.
+        self.tts.speak(text)
+        
+        def render(token):
+            speech.check()
+            self.narration_renderer.render(text, rate)
+        
+        speech.on_cancel(lambda: self.scheduler.cancel("narration"))
+        self.scheduler.submit("narration", render)
+
+    def on_tts_event(self, event, detail):
+        # Called on the TTS worker thread; everything happens on the Tk thread
+        self.scheduler.call_soon(self.handle_tts_event, event, detail)
+
+    def handle_tts_event(self, event, detail):
+        if event == "started":
+            self.voice_playing = True
+        elif event == "finished":
+            self.voice_playing = False
+        elif event == "error":
+            print(f"Error in text-to-speech: {detail}")
+            if self.voice_enabled:
                 messagebox.showerror("Error", "Failed to read text aloud")
-            finally:
-                self.voice_playing = False
-                try:
-                    if self.current_engine:
-                        self.current_engine.stop()
-                        self.current_engine = None
-                except:
-                    pass
-            
-        threading.Thread(target=speak, daemon=True).start()
 
     def stop_speaking(self):
-        if self.voice_playing:
-            self.voice_playing = False
-            try:
-                if self.current_engine:
-                    self.current_engine.stop()
-                    self.current_engine = None
-            except:
-                pass
+        self.scheduler.cancel("speech")
+
+    def halt_speech(self):
+        if self.narration_channel is not None:
+            self.narration_channel.stop()
+            self.narration_channel = None
+            self.narration_paused = False
+        if self.tts:
+            self.tts.stop()
 
+    def toggle_pause_speaking(self):
+        channel = self.narration_channel
+        if channel is not None and channel.get_busy():
+            if self.narration_paused:
+                channel.unpause()
+            else:
+                channel.pause()
+            self.narration_paused = not self.narration_paused
+            return
+        if not self.tts or not self.tts.speaking:
+            return
+        if self.tts.paused:
+            self.tts.resume()
+        else:
+            self.tts.pause()
+
+    @monitor.instrument("toggle_music")
     def toggle_music(self):
         if self.music_playing:
-            pygame.mixer.music.stop()
+            self.music.stop()
             self.music_playing = False
         else:
+            self.init_audio()
             theme = self.theme_var.get()
-            if theme in self.bg_music_paths:
-                try:
-                    pygame.mixer.music.load(self.bg_music_paths[theme])
-                    pygame.mixer.music.play(-1)
+            if self.mixer_ready and theme in self.bg_music_paths:
+                if self.music.play(theme):
                     self.music_playing = True
-                except:
+                else:
                     messagebox.showerror("Error", "Could not play music")
 
+    @monitor.instrument("export_to_pdf")
     def export_to_pdf(self):
-        text = self.story_text.get(1.0, tk.END).strip()
+        if "longform" in self.current_story_state:
+            # Regenerate the paragraphs so pages stream straight to disk
+            text = self.long_story()
+        else:
+            text = self.current_story_state.get("text")
         if not text:
             messagebox.showwarning("Warning", "No story to export")
             return
@@ -773,12 +1057,46 @@ not in the way we expect, but in the way that suits us best."""
         self.create_fancy_pdf(text, file_path)
 
     def create_fancy_pdf(self, text, file_path):
-        # Create a more sophisticated PDF with proper formatting
-        # This is a placeholder for the PDF creation logic
-        pass
+        # Pages are laid out and streamed to disk one at a time on a worker;
+        # starting another export abandons this one
+        def export(token):
+            paragraphs = split_paragraphs(text) if isinstance(text, str) else text
+            try:
+                return export_story(file_path, checked(paragraphs, token))
+            except TaskCancelled:
+                os.remove(file_path)
+                raise
+        
+        self.scheduler.submit(
+            "export", export,
+            on_done=lambda pages: messagebox.showinfo(
+                "Success", f"Story exported to PDF ({pages} pages)"),
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to export PDF: {e}"))
+
+    def save_story_card(self):
+        data = self.current_story_state.get("data")
+        if not data:
+            messagebox.showwarning("Warning", "No story to share")
+            return
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".jpg",
+            filetypes=[("JPEG images", "*.jpg"), ("PNG images", "*.png")]
+        )
+        if not file_path:
+            return
+        # Only the opening is shown, so a long-form story's first paragraphs suffice
+        story = self.long_story() if "longform" in self.current_story_state \
+            else self.current_story_state["text"]
+        self.scheduler.submit(
+            "card", lambda token: save_card(file_path, data, story),
+            on_done=lambda _: messagebox.showinfo("Success", f"Story card saved to {file_path}"),
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to save card: {e}"))
 
     def clear_all(self):
-        self.story_text.delete(1.0, tk.END)
+        self.scheduler.cancel("typing")
+        self.current_story_state = {}
+        self.story_viewer.clear()
+        self.chapter_var.set('')
         self.heroine_name.delete(0, tk.END)
         self.hero_name.delete(0, tk.END)
         self.heroine_personality.set('')
@@ -790,17 +1108,28 @@ not in the way we expect, but in the way that suits us best."""
 
     def on_window_resize(self, event):
         # Only handle window resize events
-        if event.widget == self.root:
-            # Get new dimensions
-            width = event.width
-            height = event.height
-            
-            # Update notebook size
-            self.notebook.config(width=width, height=height)
-            
-            # Update background if theme is selected
-            if hasattr(self, 'current_theme') and self.current_theme:
-                self.apply_theme(self.current_theme)
+        if event.widget != self.root:
+            return
+        
+        # <Configure> also fires on moves and restacking; skip those
+        size = (event.width, event.height)
+        if size == self.window_size:
+            return
+        self.window_size = size
+        
+        # Update notebook size
+        self.notebook.config(width=event.width, height=event.height)
+        
+        # Redraw the background once the user stops dragging
+        if self.resize_after_id is not None:
+            self.root.after_cancel(self.resize_after_id)
+        self.resize_after_id = self.root.after(RESIZE_DEBOUNCE_MS, self.on_resize_settled)
+
+    def on_resize_settled(self):
+        self.resize_after_id = None
+        # Update background if theme is selected
+        if self.current_theme:
+            self.update_background(self.current_theme)
 
     def on_theme_change(self, event=None):
         theme = self.theme_var.get()
@@ -808,69 +1137,148 @@ not in the way we expect, but in the way that suits us best."""
             self.current_theme = theme
             self.apply_theme(theme)
 
+    @monitor.instrument("apply_theme")
     def apply_theme(self, theme):
-        theme_data = self.themes[theme]
+        self.update_background(theme)
         
-        try:
-            # Load and resize background image
-            bg_image = Image.open(theme_data["image"])
-            
-            # Get current window dimensions
-            window_width = self.root.winfo_width()
-            window_height = self.root.winfo_height()
-            
-            # Calculate aspect ratios
-            window_ratio = window_width / window_height
-            image_ratio = bg_image.width / bg_image.height
-            
-            # Calculate new dimensions maintaining aspect ratio and ensuring full coverage
-            if window_ratio > image_ratio:
-                # Window is wider than image
-                new_width = window_width
-                new_height = int(window_width / image_ratio)
-            else:
-                # Window is taller than image
-                new_height = window_height
-                new_width = int(window_height * image_ratio)
-            
-            # Resize image with high-quality resampling
-            bg_image = bg_image.resize((new_width, new_height), Image.Resampling.LANCZOS)
-            
-            # Convert to PhotoImage and store reference
-            self.bg_photo = ImageTk.PhotoImage(bg_image)
-            
-            # Create a new canvas for the background if it doesn't exist
-            if not hasattr(self, 'canvas'):
-                self.canvas = tk.Canvas(self.main_container, highlightthickness=0)
-                self.canvas.grid(row=0, column=0, sticky="nsew")
-                self.notebook.lift()  # Ensure notebook stays on top
-            
-            # Clear canvas and draw new background
-            self.canvas.delete("all")
-            
-            # Calculate position to center the image
-            x = (window_width - new_width) // 2
-            y = (window_height - new_height) // 2
-            
-            # Draw the background image
-            self.canvas.create_image(x, y, image=self.bg_photo, anchor="nw")
-            
-            # Ensure notebook stays on top
-            self.notebook.lift()
-            
-        except Exception as e:
-            print(f"Error loading background image: {e}")
-            import traceback
-            traceback.print_exc()
-        
-        # Handle music transition
+        # Crossfade to the new theme's music; nothing happens if it is unchanged
         if self.music_playing:
-            self.toggle_music()  # Stop current music
-            self.toggle_music()  # Start new theme music
+            self.music.play(theme)
+
+    def update_background(self, theme):
+        # Get current window dimensions
+        window_width = self.root.winfo_width()
+        window_height = self.root.winfo_height()
+        if window_width <= 1 or window_height <= 1:
+            return
+        
+        key = (theme, window_width, window_height)
+        if key == self.bg_key or key == self.bg_pending_key:
+            return
+        self.bg_pending_key = key
+        
+        # Scale off the UI thread; only the PhotoImage swap happens here. A
+        # newer size or theme supersedes a resize still in flight.
+        self.scheduler.submit(
+            "background",
+            lambda token: self.image_cache.get(theme, window_width, window_height),
+            on_done=lambda bg_image: self.show_background(key, bg_image),
+            on_error=self.background_failed)
+
+    def load_background_assets(self):
+        # Map the pre-scaled backgrounds if 'cli.py build-assets' has made
+        # them. The app never builds them itself: the full set is hundreds of
+        # MB. Without them, or when they are out of date, backgrounds are
+        # scaled on demand.
+        theme_images = self.image_cache.theme_images
+
+        def load(token):
+            return AssetCache.open(theme_images)
+
+        def attach(assets):
+            self.image_cache.assets = assets
+
+        self.scheduler.submit(
+            "assets", load, on_done=attach,
+            on_error=lambda e: print(f"Background assets unavailable: {e}"))
+
+    def background_failed(self, error):
+        self.bg_pending_key = None
+        print(f"Error loading background image: {error}")
+
+    @monitor.instrument("show_background")
+    def show_background(self, key, bg_image):
+        self.bg_pending_key = None
+        _, window_width, window_height = key
+        
+        # Convert to PhotoImage and store reference
+        self.bg_photo = ImageTk.PhotoImage(bg_image)
+        self.bg_key = key
+        
+        # Create a new canvas for the background if it doesn't exist
+        if not hasattr(self, 'canvas'):
+            self.canvas = tk.Canvas(self.main_container, highlightthickness=0)
+            self.canvas.grid(row=0, column=0, sticky="nsew")
+            self.notebook.lift()  # Ensure notebook stays on top
+        
+        # Clear canvas and draw new background
+        self.canvas.delete("all")
+        
+        # Calculate position to center the image
+        x = (window_width - bg_image.width) // 2
+        y = (window_height - bg_image.height) // 2
+        
+        # Draw the background image
+        self.canvas.create_image(x, y, image=self.bg_photo, anchor="nw")
+        
+        # Ensure notebook stays on top
+        self.notebook.lift()
+
+    def show_latency_stats(self):
+        stats = monitor.stats()
+        window = tk.Toplevel(self.root)
+        window.title("Latency Stats")
+        window.geometry("620x420")
+        
+        columns = ("count", "p50", "p99", "max")
+        tree = ttk.Treeview(window, columns=columns, height=10)
+        tree.heading("#0", text="Handler")
+        tree.column("#0", width=200)
+        for column, title in zip(columns, ("Calls", "p50 (ms)", "p99 (ms)", "Max (ms)")):
+            tree.heading(column, text=title)
+            tree.column(column, width=90, anchor="e")
+        for name, handler in sorted(stats["handlers"].items()):
+            tree.insert("", tk.END, text=name, values=(
+                handler["count"], handler["p50_ms"], handler["p99_ms"], handler["max_ms"]))
+        tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=(10,5))
+        
+        blamed = ", ".join(f"{span}: {count}" for span, count in
+                           sorted(stats["stalls_by_span"].items(), key=lambda item: -item[1]))
+        summary = f"Event-loop stalls: {stats['stall_count']}"
+        if blamed:
+            summary += f" ({blamed})"
+        ttk.Label(window, text=summary, wraplength=580).pack(padx=10, pady=(0,10), anchor="w")
+
+    def save_latency_report(self):
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".json",
+            filetypes=[("JSON files", "*.json")]
+        )
+        if file_path:
+            monitor.dump(file_path)
+
+    def on_close(self):
+        if self.latency_report:
+            monitor.dump(self.latency_report)
+        if self.settings_after_id is not None:
+            try:
+                self.flush_settings()
+            except OSError as e:
+                print(f"Error saving settings: {e}")
+        monitor.stop()
+        self.scheduler.shutdown()
+        if self.tts:
+            self.tts.shutdown()
+        self.narration_renderer.shutdown()
+        self.root.destroy()
 
     def run(self):
         self.root.mainloop()
 
-if __name__ == "__main__":
-    app = AustenStoryCreator()
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="The Austen Experience")
+    parser.add_argument('--startup-profile', action='store_true',
+                        help="Print time spent in each startup phase")
+    parser.add_argument('--latency-report', metavar='PATH', default=None,
+                        help="Write handler latencies and event-loop stalls to PATH on exit")
+    parser.add_argument('--eager-tabs', action='store_true',
+                        help="Build every tab at startup instead of on first use")
+    args = parser.parse_args(argv)
+    profiler.enabled = args.startup_profile
+    
+    app = AustenStoryCreator(eager_tabs=args.eager_tabs)
+    app.latency_report = args.latency_report
     app.run()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+import hashlib
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from app_paths import user_cache_dir
+from lazy_import import LazyModule
+from tts_worker import DEFAULT_RATE, DEFAULT_VOICE_HINT, resolve_voice
+
+pyttsx3 = LazyModule('pyttsx3')
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+AUDIO_SUFFIX = ".wav"
+
+
+def default_cache_dir():
+    return user_cache_dir("narration")
+
+
+def narration_key(text, voice_id, rate):
+    digest = hashlib.sha256()
+    for part in (text, voice_id or "", str(int(rate))):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class NarrationCache:
+    # Pre-rendered narration on disk, keyed by text, voice and rate, with
+    # least-recently-used eviction once the directory outgrows max_bytes.
+    # Recency is the file's mtime, refreshed on every hit.
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory or default_cache_dir()
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def path_for(self, key):
+        return os.path.join(self.directory, key + AUDIO_SUFFIX)
+
+    def get(self, text, voice_id, rate):
+        path = self.path_for(narration_key(text, voice_id, rate))
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def render(self, engine, text, voice_id, rate):
+        # Synthesize text to a file with an already-initialized engine.
+        # Must run on the thread that owns the engine.
+        key = narration_key(text, voice_id, rate)
+        path = self.path_for(key)
+        if os.path.exists(path):
+            os.utime(path)
+            return path
+
+        if voice_id:
+            engine.setProperty('voice', voice_id)
+        engine.setProperty('rate', int(rate))
+        fd, tmp_path = tempfile.mkstemp(prefix='.render-', suffix=AUDIO_SUFFIX,
+                                        dir=self.directory)
+        os.close(fd)
+        try:
+            engine.save_to_file(text, tmp_path)
+            engine.runAndWait()
+            if os.path.getsize(tmp_path) == 0:
+                raise RuntimeError("text-to-speech engine wrote no audio")
+            # Readers never see a half-written file
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        self.evict()
+        return path
+
+    def entries(self):
+        for entry in os.scandir(self.directory):
+            # Skip in-progress renders (dot-prefixed temp files)
+            if (entry.is_file() and entry.name.endswith(AUDIO_SUFFIX)
+                    and not entry.name.startswith('.')):
+                yield entry
+
+    def size(self):
+        return sum(entry.stat().st_size for entry in self.entries())
+
+    def evict(self):
+        with self._lock:
+            entries = []
+            total = 0
+            for entry in self.entries():
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+            if total <= self.max_bytes:
+                return 0
+            removed = 0
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                removed += 1
+            return removed
+
+
+# Batch pre-rendering: each worker process owns one engine for all its files
+
+_worker_engine = None
+_worker_voice = None
+_worker_cache = None
+
+
+def _init_worker(cache_dir, voice_hint):
+    global _worker_engine, _worker_voice, _worker_cache
+    _worker_engine = pyttsx3.init()
+    _worker_voice = resolve_voice(_worker_engine, voice_hint)
+    # Eviction happens once in the parent, not concurrently in every worker
+    _worker_cache = NarrationCache(cache_dir, max_bytes=float('inf'))
+
+
+def _render_file(story_path, rate):
+    with open(story_path, 'r', encoding='utf-8') as f:
+        text = f.read().strip()
+    if not text:
+        return story_path, None, 0.0
+    start = time.perf_counter()
+    path = _worker_cache.render(_worker_engine, text, _worker_voice, rate)
+    return story_path, path, time.perf_counter() - start
+
+
+def _render_text(text, rate):
+    return _worker_cache.render(_worker_engine, text, _worker_voice, rate)
+
+
+class NarrationRenderer:
+    # Renders narration into a cache from a worker process with its own
+    # engine, so a long render never holds up the TTS thread that is reading
+    # aloud. The process starts on the first render and handles one at a time.
+    # It is spawned, not forked: by then the app has the TTS, scheduler and
+    # music threads running, and a forked child could inherit a lock one of
+    # them holds, as well as the parent's Tk/X connection.
+    def __init__(self, cache, voice_hint=DEFAULT_VOICE_HINT):
+        self.cache = cache
+        self.voice_hint = voice_hint
+        self._pool = None
+
+    def render(self, text, rate):
+        # Blocks until the file is written; call it off the Tk thread
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=1,
+                                             mp_context=multiprocessing.get_context("spawn"),
+                                             initializer=_init_worker,
+                                             initargs=(self.cache.directory, self.voice_hint))
+        path = self._pool.submit(_render_text, text, rate).result()
+        self.cache.evict()
+        return path
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+def story_files(directory):
+    for name in sorted(os.listdir(directory)):
+        if name.endswith('.txt'):
+            yield os.path.join(directory, name)
+
+
+def render_directory(directory, cache_dir=None, rate=DEFAULT_RATE,
+                     voice_hint=DEFAULT_VOICE_HINT, workers=0,
+                     max_bytes=DEFAULT_MAX_BYTES):
+    # Pre-render narration for every .txt story in directory. Yields
+    # (story_path, audio_path, seconds) as files complete.
+    cache = NarrationCache(cache_dir, max_bytes=max_bytes)
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers,
+                             initializer=_init_worker,
+                             initargs=(cache.directory, voice_hint)) as pool:
+        futures = [pool.submit(_render_file, path, rate) for path in story_files(directory)]
+        for future in futures:
+            yield future.result()
+    cache.evict()
@@ -0,0 +1,345 @@
+import os
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+from story_engine import DATA_DIR, StoryEngine
+
+LETTER = (612, 792)
+A4 = (595, 842)
+
+# Advance widths (1/1000 em) of the standard Times-Roman font for the
+# printable ASCII range and the few typographic characters stories use.
+# Standard 14 fonts are built into every PDF reader, so only metrics are
+# needed; nothing has to be embedded.
+TIMES_ROMAN_WIDTHS = {
+    ' ': 250, '!': 333, '"': 408, '#': 500, '$': 500, '%': 833, '&': 778,
+    "'": 180, '(': 333, ')': 333, '*': 500, '+': 564, ',': 250, '-': 333,
+    '.': 250, '/': 278, '0': 500, '1': 500, '2': 500, '3': 500, '4': 500,
+    '5': 500, '6': 500, '7': 500, '8': 500, '9': 500, ':': 278, ';': 278,
+    '<': 564, '=': 564, '>': 564, '?': 444, '@': 921, 'A': 722, 'B': 667,
+    'C': 667, 'D': 722, 'E': 611, 'F': 556, 'G': 722, 'H': 722, 'I': 333,
+    'J': 389, 'K': 722, 'L': 611, 'M': 889, 'N': 722, 'O': 722, 'P': 556,
+    'Q': 722, 'R': 667, 'S': 556, 'T': 611, 'U': 722, 'V': 722, 'W': 944,
+    'X': 722, 'Y': 722, 'Z': 611, '[': 333, '\\': 278, ']': 333, '^': 469,
+    '_': 500, '`': 333, 'a': 444, 'b': 500, 'c': 444, 'd': 500, 'e': 444,
+    'f': 333, 'g': 500, 'h': 500, 'i': 278, 'j': 278, 'k': 500, 'l': 278,
+    'm': 778, 'n': 500, 'o': 500, 'p': 500, 'q': 500, 'r': 333, 's': 389,
+    't': 278, 'u': 500, 'v': 500, 'w': 722, 'x': 500, 'y': 500, 'z': 444,
+    '{': 480, '|': 200, '}': 480, '~': 541,
+    '‘': 333, '’': 333, '“': 444, '”': 444,
+    '–': 500, '—': 1000, '…': 1000,
+}
+DEFAULT_WIDTH = 500
+
+FONTS = {
+    'F1': 'Times-Roman',
+    'F2': 'Times-Italic',
+}
+
+
+class FontMetrics:
+    def __init__(self, widths, default_width=DEFAULT_WIDTH):
+        self.widths = widths
+        self.default_width = default_width
+
+    @lru_cache(maxsize=65536)
+    def word_width(self, word):
+        # Width in 1/1000 em; words repeat constantly, so memoize them
+        widths = self.widths
+        default = self.default_width
+        return sum(widths.get(char, default) for char in word)
+
+
+# Loaded once per process and shared by every layout
+TIMES_ROMAN = FontMetrics(TIMES_ROMAN_WIDTHS)
+
+
+def pdf_string(text):
+    # Literal string in WinAnsiEncoding; characters it lacks become '?'
+    data = text.encode('cp1252', errors='replace')
+    return b'(' + data.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)') + b')'
+
+
+def wrap_paragraph(text, max_width, font_size, metrics=TIMES_ROMAN):
+    # Greedy word wrap; max_width is in points
+    limit = max_width * 1000.0 / font_size
+    space = metrics.word_width(' ')
+    line = []
+    width = 0
+    for word in text.split():
+        word_width = metrics.word_width(word)
+        if line and width + space + word_width > limit:
+            yield ' '.join(line)
+            line = [word]
+            width = word_width
+        else:
+            width += (space if line else 0) + word_width
+            line.append(word)
+    if line:
+        yield ' '.join(line)
+
+
+class StoryLayout:
+    # Turns a title and paragraphs into page content streams, one page at a
+    # time, so a story of any length is never held in memory as a whole.
+    def __init__(self, page_size=LETTER, margin=72, font_size=12,
+                 title_size=22, leading=1.45, compress=True):
+        self.page_width, self.page_height = page_size
+        self.margin = margin
+        self.font_size = font_size
+        self.title_size = title_size
+        self.line_height = font_size * leading
+        self.compress = compress
+        self.text_width = self.page_width - 2 * margin
+
+    def pages(self, title, paragraphs, first_page_number=1):
+        page_number = first_page_number
+        ops = []
+        y = self.page_height - self.margin
+
+        if title:
+            y -= self.title_size
+            ops.append(self._centered_line(title, 'F2', self.title_size, y))
+            y -= self.title_size * 1.5
+
+        bottom = self.margin + self.line_height
+        for paragraph in paragraphs:
+            for line in wrap_paragraph(paragraph, self.text_width, self.font_size):
+                if y < bottom:
+                    yield self._finish_page(ops, page_number)
+                    page_number += 1
+                    ops = []
+                    y = self.page_height - self.margin - self.font_size
+                ops.append(b'BT /F1 %d Tf %.2f %.2f Td %s Tj ET'
+                           % (self.font_size, self.margin, y, pdf_string(line)))
+                y -= self.line_height
+            # Blank line between paragraphs
+            y -= self.line_height * 0.6
+
+        yield self._finish_page(ops, page_number)
+
+    def _centered_line(self, text, font, size, y):
+        # Italic advance widths are close enough to Roman for centering
+        width = TIMES_ROMAN.word_width(text) * size / 1000.0
+        x = max(self.margin, (self.page_width - width) / 2)
+        return b'BT /%s %d Tf %.2f %.2f Td %s Tj ET' % (font.encode(), size, x, y, pdf_string(text))
+
+    def _finish_page(self, ops, page_number):
+        footer_size = self.font_size - 2
+        ops.append(self._centered_line(str(page_number), 'F1', footer_size,
+                                       self.margin / 2))
+        content = b'\n'.join(ops)
+        if self.compress:
+            return zlib.compress(content, 6), True
+        return content, False
+
+
+class PDFWriter:
+    # Minimal streaming PDF writer: every page is written to disk as soon as it
+    # is added. Only object offsets and page ids stay in memory until close().
+    CATALOG_ID = 1
+    PAGES_ID = 2
+    FONTS_ID = 3
+    FIRST_FREE_ID = 4 + len(FONTS)
+
+    def __init__(self, path, page_size=LETTER, title=None):
+        self.path = path
+        self.page_size = page_size
+        self.title = title
+        self.page_count = 0
+        self._file = open(path, 'wb')
+        self._offsets = {}
+        self._page_ids = []
+        self._next_id = self.FIRST_FREE_ID
+        self._write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._file.close()
+
+    def _write(self, data):
+        self._file.write(data)
+
+    def _allocate(self):
+        object_id = self._next_id
+        self._next_id += 1
+        return object_id
+
+    def _write_object(self, object_id, body):
+        self._offsets[object_id] = self._file.tell()
+        self._write(b'%d 0 obj\n' % object_id)
+        self._write(body)
+        self._write(b'\nendobj\n')
+
+    def add_page(self, content, compressed=False):
+        content_id = self._allocate()
+        page_id = self._allocate()
+        filter_entry = b' /Filter /FlateDecode' if compressed else b''
+        self._write_object(content_id,
+                           b'<< /Length %d%s >>\nstream\n' % (len(content), filter_entry)
+                           + content + b'\nendstream')
+        self._write_object(page_id,
+                           b'<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] '
+                           b'/Resources << /Font %d 0 R >> /Contents %d 0 R >>'
+                           % (self.PAGES_ID, self.page_size[0], self.page_size[1],
+                              self.FONTS_ID, content_id))
+        self._page_ids.append(page_id)
+        self.page_count += 1
+
+    def add_pages(self, pages):
+        for content, compressed in pages:
+            self.add_page(content, compressed)
+
+    def close(self):
+        font_refs = []
+        for i, (name, base_font) in enumerate(FONTS.items()):
+            font_id = 4 + i
+            self._write_object(font_id,
+                               b'<< /Type /Font /Subtype /Type1 /BaseFont /%s '
+                               b'/Encoding /WinAnsiEncoding >>' % base_font.encode())
+            font_refs.append(b'/%s %d 0 R' % (name.encode(), font_id))
+        self._write_object(self.FONTS_ID, b'<< ' + b' '.join(font_refs) + b' >>')
+
+        kids = b' '.join(b'%d 0 R' % page_id for page_id in self._page_ids)
+        self._write_object(self.PAGES_ID,
+                           b'<< /Type /Pages /Kids [' + kids + b'] /Count %d >>'
+                           % len(self._page_ids))
+        self._write_object(self.CATALOG_ID,
+                           b'<< /Type /Catalog /Pages %d 0 R >>' % self.PAGES_ID)
+
+        info_id = self._allocate()
+        title = pdf_string(self.title) if self.title else b'()'
+        self._write_object(info_id,
+                           b'<< /Title ' + title + b' /Producer (The Austen Experience) >>')
+
+        xref_offset = self._file.tell()
+        size = self._next_id
+        self._write(b'xref\n0 %d\n0000000000 65535 f \n' % size)
+        for object_id in range(1, size):
+            self._write(b'%010d 00000 n \n' % self._offsets[object_id])
+        self._write(b'trailer\n<< /Size %d /Root %d 0 R /Info %d 0 R >>\n'
+                    % (size, self.CATALOG_ID, info_id))
+        self._write(b'startxref\n%d\n%%%%EOF\n' % xref_offset)
+        self._file.close()
+
+
+def split_paragraphs(text):
+    # Paragraphs are separated by blank lines; line breaks inside one reflow
+    for paragraph in text.split('\n\n'):
+        paragraph = ' '.join(paragraph.split())
+        if paragraph:
+            yield paragraph
+
+
+def export_story(path, text, title="The Austen Experience", layout=None):
+    # Write one story to a PDF; text may be a string or an iterable of paragraphs
+    layout = layout or StoryLayout()
+    paragraphs = split_paragraphs(text) if isinstance(text, str) else text
+    with PDFWriter(path, page_size=(layout.page_width, layout.page_height), title=title) as pdf:
+        pdf.add_pages(layout.pages(title, paragraphs))
+        return pdf.page_count
+
+
+def story_title(data):
+    return f"{data['heroine']['name']} and {data['hero']['name']}"
+
+
+# Batch mode: workers generate and lay out stories; pages come back already
+# compressed, so the parent only has to append bytes to the file.
+
+_worker_engine = None
+_worker_layout = None
+
+
+def _init_worker(data_dir, layout):
+    global _worker_engine, _worker_layout
+    _worker_engine = StoryEngine(data_dir)
+    _worker_layout = layout
+
+
+def _layout_chunk(records):
+    return [list(_worker_layout.pages(story_title(data),
+                                      split_paragraphs(_worker_engine.create_story(data))))
+            for data in records]
+
+
+def _write_chunk(records, out_dir, first_index):
+    pages = 0
+    for offset, data in enumerate(records):
+        path = os.path.join(out_dir, f"story_{first_index + offset:07d}.pdf")
+        pages += export_story(path, _worker_engine.create_story(data),
+                              title=story_title(data), layout=_worker_layout)
+    return pages
+
+
+def _chunked(records, size):
+    chunk = []
+    for data in records:
+        chunk.append(data)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def render_batch(records, output, split=False, workers=1, chunk_size=200,
+                 data_dir=DATA_DIR, layout=None):
+    # Render story_data records into one PDF at output, or with split=True into
+    # one PDF per story inside the output directory. Returns (stories, pages,
+    # seconds).
+    layout = layout or StoryLayout()
+    start = time.perf_counter()
+    stories = pages = 0
+
+    if split:
+        os.makedirs(output, exist_ok=True)
+
+    if workers == 1:
+        _init_worker(data_dir, layout)
+        if split:
+            for chunk in _chunked(records, chunk_size):
+                pages += _write_chunk(chunk, output, stories)
+                stories += len(chunk)
+        else:
+            with PDFWriter(output, title="The Austen Experience") as pdf:
+                for chunk in _chunked(records, chunk_size):
+                    for story_pages in _layout_chunk(chunk):
+                        pdf.add_pages(story_pages)
+                    stories += len(chunk)
+                pages = pdf.page_count
+        return stories, pages, time.perf_counter() - start
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(data_dir, layout)) as pool:
+        pending = deque()
+        max_pending = workers * 2
+        if split:
+            for chunk in _chunked(records, chunk_size):
+                pending.append(pool.submit(_write_chunk, chunk, output, stories))
+                stories += len(chunk)
+                if len(pending) >= max_pending:
+                    pages += pending.popleft().result()
+            pages += sum(future.result() for future in pending)
+        else:
+            with PDFWriter(output, title="The Austen Experience") as pdf:
+                for chunk in _chunked(records, chunk_size):
+                    pending.append(pool.submit(_layout_chunk, chunk))
+                    stories += len(chunk)
+                    if len(pending) >= max_pending:
+                        for story_pages in pending.popleft().result():
+                            pdf.add_pages(story_pages)
+                for future in pending:
+                    for story_pages in future.result():
+                        pdf.add_pages(story_pages)
+                pages = pdf.page_count
+    return stories, pages, time.perf_counter() - start
@@ -0,0 +1,307 @@
+import json
+import mmap
+import os
+import random
+import re
+import struct
+import sys
+from collections import Counter, defaultdict
+from hashlib import sha256
+
+from lazy_import import LazyModule
+
+# Required for sampling (see requirements.txt): many sentences are sampled in
+# lock-step with one searchsorted per step. Training does not need it.
+np = LazyModule('numpy')
+
+MAGIC = b"AUSTNGR1"
+DEFAULT_ORDER = 3
+MAX_ORDER = 4
+# Token id 0 marks a sentence boundary
+BOUNDARY = 0
+MAX_SENTENCE_TOKENS = 60
+# Sentences sampled once per model; stories draw from this pool by seed
+POOL_SIZE = 4096
+POOL_SEED = 1813
+
+# Honorifics keep their full stop instead of ending the sentence
+TOKEN_RE = re.compile(r"(?:Mr|Mrs|Dr|St|Col)\.|[A-Za-z]+(?:['’][A-Za-z]+)*|[.,;:!?]")
+SENTENCE_END = {".", "!", "?"}
+NO_SPACE_BEFORE = {".", ",", ";", ":", "!", "?"}
+
+# Array layout: name -> struct/memoryview format
+ARRAYS = (("keys", "q"), ("offsets", "Q"), ("next", "I"), ("cumulative", "Q"))
+ITEM_SIZES = {"q": 8, "Q": 8, "I": 4}
+
+
+def have_numpy():
+    try:
+        np.load()
+    except ImportError:
+        return False
+    return True
+
+
+def require_numpy(feature):
+    # There is deliberately no pure-Python fallback: it would draw different
+    # text for the same seed depending on what happens to be installed
+    if not have_numpy():
+        raise ImportError(f"{feature} needs NumPy; install it with "
+                          "'pip install -r requirements.txt'")
+
+
+def tokenize(text):
+    # Yield sentences as lists of tokens; stray punctuation between
+    # sentences is dropped
+    sentence = []
+    for match in TOKEN_RE.finditer(text.replace("’", "'")):
+        token = match.group()
+        if not sentence and token in NO_SPACE_BEFORE:
+            continue
+        sentence.append(token)
+        if token in SENTENCE_END:
+            yield sentence
+            sentence = []
+    if sentence:
+        yield sentence + ["."]
+
+
+def detokenize(tokens):
+    parts = []
+    for token in tokens:
+        if parts and token not in NO_SPACE_BEFORE:
+            parts.append(" ")
+        parts.append(token)
+    text = "".join(parts)
+    if text and text[-1] not in SENTENCE_END:
+        text += "."
+    return text[:1].upper() + text[1:]
+
+
+def train(paths, order=DEFAULT_ORDER):
+    # Count every (context, next token) pair over the corpus files. Returns
+    # (vocab, {context_key: Counter(next_id)}).
+    if not 2 <= order <= MAX_ORDER:
+        raise ValueError(f"order must be 2..{MAX_ORDER}")
+    vocab = ["<s>"]
+    ids = {"<s>": BOUNDARY}
+    transitions = defaultdict(Counter)
+    width = order - 1
+    for path in paths:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            text = f.read()
+        for sentence in tokenize(text):
+            context = (BOUNDARY,) * width
+            for token in sentence + [None]:
+                if token is None:
+                    token_id = BOUNDARY
+                else:
+                    token_id = ids.get(token)
+                    if token_id is None:
+                        token_id = ids[token] = len(vocab)
+                        vocab.append(token)
+                transitions[context][token_id] += 1
+                context = context[1:] + (token_id,)
+    if len(vocab) ** width >= 2 ** 63:
+        raise ValueError("vocabulary too large for this order")
+    size = len(vocab)
+    keyed = {}
+    for context, counts in transitions.items():
+        key = 0
+        for token_id in context:
+            key = key * size + token_id
+        keyed[key] = counts
+    return vocab, keyed
+
+
+def write_model(path, vocab, transitions, order):
+    # Flatten the counts into sorted, cumulative arrays (CSR layout) so a
+    # reader can mmap them and sample without building anything
+    from array import array
+    keys = array('q')
+    offsets = array('Q', [0])
+    next_ids = array('I')
+    cumulative = array('Q')
+    total = 0
+    for key in sorted(transitions):
+        keys.append(key)
+        for token_id, count in sorted(transitions[key].items()):
+            total += count
+            next_ids.append(token_id)
+            cumulative.append(total)
+        offsets.append(len(next_ids))
+    arrays = {"keys": keys, "offsets": offsets, "next": next_ids, "cumulative": cumulative}
+
+    layout = {}
+    position = 0
+    for name, code in ARRAYS:
+        layout[name] = [position, len(arrays[name])]
+        position += len(arrays[name]) * ITEM_SIZES[code]
+        position += -position % 8
+    header = json.dumps({"order": order, "vocab": vocab, "arrays": layout},
+                        ensure_ascii=False).encode('utf-8')
+    header += b" " * (-(len(MAGIC) + 4 + len(header)) % 8)
+    base = len(MAGIC) + 4 + len(header)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<I', len(header)))
+        f.write(header)
+        for name, code in ARRAYS:
+            data = arrays[name]
+            if sys.byteorder != 'little':
+                data.byteswap()
+            f.seek(base + layout[name][0])
+            f.write(data.tobytes())
+        f.truncate(base + position)
+    os.replace(tmp_path, path)
+
+
+class ProseModel:
+    # A trained n-gram model opened straight from its file: the transition
+    # tables stay in the page cache behind a read-only mmap
+    def __init__(self, path):
+        require_numpy(f"Prose model {path}")
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a prose model")
+        (header_len,) = struct.unpack_from('<I', self._mmap, len(MAGIC))
+        start = len(MAGIC) + 4
+        header = json.loads(bytes(self._mmap[start:start + header_len]))
+        base = start + header_len
+        self.order = header["order"]
+        self.vocab = header["vocab"]
+        self.size = len(self.vocab)
+
+        view = memoryview(self._mmap)
+        self.tables = {}
+        for name, code in ARRAYS:
+            offset, count = header["arrays"][name]
+            begin = base + offset
+            self.tables[name] = view[begin:begin + count * ITEM_SIZES[code]].cast(code)
+        self._arrays = None
+
+    def arrays(self):
+        # numpy views over the same mapped memory; nothing is copied
+        if self._arrays is None:
+            self._arrays = {name: np.frombuffer(table, dtype=np.dtype(code).newbyteorder('<'))
+                            for (name, code), table in zip(ARRAYS, self.tables.values())}
+        return self._arrays
+
+    def sentences(self, count, seed):
+        # Every sentence advances one token per step: one key computation,
+        # one searchsorted for the row and one for the token, over all of
+        # the sentences still running
+        tables = self.arrays()
+        keys = tables["keys"]
+        offsets = tables["offsets"].astype(np.int64)
+        next_ids = tables["next"]
+        cumulative = tables["cumulative"]
+        rng = np.random.default_rng(seed)
+        width = self.order - 1
+
+        context = np.zeros((count, width), dtype=np.int64)
+        tokens = np.zeros((count, MAX_SENTENCE_TOKENS), dtype=np.int64)
+        lengths = np.zeros(count, dtype=np.int64)
+        active = np.arange(count)
+        for step in range(MAX_SENTENCE_TOKENS):
+            if not len(active):
+                break
+            key = np.zeros(len(active), dtype=np.int64)
+            for column in range(width):
+                key = key * self.size + context[active, column]
+            rows = np.searchsorted(keys, key)
+            begin = offsets[rows]
+            end = offsets[rows + 1]
+            base = np.where(begin > 0, cumulative[np.maximum(begin - 1, 0)], 0)
+            span = cumulative[end - 1] - base
+            target = base + (rng.random(len(active)) * span).astype(np.uint64)
+            chosen = next_ids[np.searchsorted(cumulative, target, side='right')].astype(np.int64)
+
+            done = chosen == BOUNDARY
+            running = active[~done]
+            tokens[running, step] = chosen[~done]
+            lengths[running] = step + 1
+            context[running] = np.column_stack((context[running, 1:], chosen[~done]))
+            active = running
+
+        vocab = self.vocab
+        return [detokenize([vocab[t] for t in tokens[i, :lengths[i]]]) for i in range(count)]
+
+    def close(self):
+        self._arrays = None
+        self.tables = {}
+        self._mmap.close()
+
+
+class ThemeProse:
+    # Paragraphs for one theme, drawn from a pool of sampled sentences. The
+    # pool depends only on the model, so every process builds the same one,
+    # and a story's paragraph depends only on its own seed.
+    def __init__(self, model, pool_size=POOL_SIZE):
+        self.model = model
+        self.pool_size = pool_size
+        self._pool = None
+
+    def pool(self):
+        if self._pool is None:
+            self._pool = self.model.sentences(self.pool_size, POOL_SEED)
+        return self._pool
+
+    def paragraph(self, seed, sentences=4):
+        pool = self.pool()
+        rng = random.Random(seed)
+        return " ".join(pool[i] for i in rng.sample(range(len(pool)), min(sentences, len(pool))))
+
+
+def story_seed(data):
+    # Stable per-story seed, so create_story stays a pure function of its input
+    encoded = json.dumps(data, sort_keys=True, ensure_ascii=False).encode('utf-8')
+    return int.from_bytes(sha256(encoded).digest()[:8], 'big')
+
+
+class ProseLibrary:
+    # Trained models in data/prose/: <theme>.ngram for a theme (lowercase),
+    # default.ngram for every other theme. Missing models mean no prose.
+    def __init__(self, prose_dir):
+        self.prose_dir = prose_dir
+        self.themes = {}
+        if os.path.isdir(prose_dir):
+            for name in sorted(os.listdir(prose_dir)):
+                stem, ext = os.path.splitext(name)
+                if ext == ".ngram":
+                    self.themes[stem] = ThemeProse(ProseModel(os.path.join(prose_dir, name)))
+
+    def __bool__(self):
+        return bool(self.themes)
+
+    def for_theme(self, theme):
+        return self.themes.get(theme.lower()) or self.themes.get("default")
+
+
+def corpus_files(corpus_dir):
+    # {model name: [text files]}: top-level files train "default", each
+    # subdirectory trains a model named after it
+    groups = {}
+    for entry in sorted(os.listdir(corpus_dir)):
+        path = os.path.join(corpus_dir, entry)
+        if os.path.isdir(path):
+            files = [os.path.join(path, name) for name in sorted(os.listdir(path))
+                     if name.endswith(".txt")]
+            if files:
+                groups[entry.lower()] = files
+        elif entry.endswith(".txt"):
+            groups.setdefault("default", []).append(path)
+    return groups
+
+
+def train_directory(corpus_dir, prose_dir, order=DEFAULT_ORDER):
+    # Train one model per corpus group; yields (name, vocab size, contexts)
+    os.makedirs(prose_dir, exist_ok=True)
+    for name, files in corpus_files(corpus_dir).items():
+        vocab, transitions = train(files, order)
+        write_model(os.path.join(prose_dir, f"{name}.ngram"), vocab, transitions, order)
+        yield name, len(vocab), len(transitions)
@@ -0,0 +1,126 @@
+import json
+import os
+import tempfile
+import threading
+
+from app_paths import user_config_dir
+from typewriter import TYPING_SPEEDS
+from ui_themes import DEFAULT_UI_THEME, UI_THEMES
+
+FONT_SIZES = ("10", "12", "14", "16", "18")
+VOICE_SPEED_RANGE = (100, 300)
+
+DEFAULTS = {
+    "font_size": "12",
+    "app_theme": DEFAULT_UI_THEME,
+    "voice_speed": 150,
+    "typing_speed": "Normal",
+    "music_enabled": True,
+}
+
+# Older versions wrote settings.json to the working directory, which was
+# usually the app's own folder
+LEGACY_PATHS = (
+    os.path.join(os.getcwd(), "settings.json"),
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "settings.json"),
+)
+
+
+def default_settings_path():
+    return user_config_dir("settings.json")
+
+
+def _voice_speed(value):
+    # Accepts the float strings older versions stored ("217.94871794871796")
+    low, high = VOICE_SPEED_RANGE
+    return min(high, max(low, int(round(float(value)))))
+
+
+# Turns a stored value into a valid one, or raises ValueError/TypeError
+COERCE = {
+    "font_size": lambda value: _member(str(value), FONT_SIZES),
+    "app_theme": lambda value: _member(value, UI_THEMES),
+    "voice_speed": _voice_speed,
+    "typing_speed": lambda value: _member(value, TYPING_SPEEDS),
+    "music_enabled": lambda value: _boolean(value),
+}
+
+
+def _member(value, allowed):
+    if value not in allowed:
+        raise ValueError(value)
+    return value
+
+
+def _boolean(value):
+    if not isinstance(value, bool):
+        raise TypeError(value)
+    return value
+
+
+def normalize(stored):
+    # Defaults overlaid with every stored value that is still valid; unknown
+    # keys and bad values are dropped rather than failing the whole file
+    settings = dict(DEFAULTS)
+    if isinstance(stored, dict):
+        for key, coerce in COERCE.items():
+            if key in stored:
+                try:
+                    settings[key] = coerce(stored[key])
+                except (TypeError, ValueError):
+                    pass
+    return settings
+
+
+class SettingsStore:
+    # User settings as JSON in the per-user config directory. Writes go to a
+    # temporary file in the same directory that then replaces the real one,
+    # so a crash mid-write never leaves a truncated file behind. Saves are
+    # serialized by `lock`, which callers may also hold around a save.
+    def __init__(self, path=None, legacy_paths=LEGACY_PATHS):
+        self.path = path or default_settings_path()
+        self.legacy_paths = legacy_paths
+        self.lock = threading.RLock()
+
+    def _read(self, path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable settings file {path}: {e}")
+            return None
+
+    def load(self):
+        stored = self._read(self.path)
+        if stored is None:
+            # First run with this version: carry over the old settings once
+            for legacy_path in dict.fromkeys(self.legacy_paths):
+                stored = self._read(legacy_path)
+                # Skip unrelated files that happen to share the name
+                if isinstance(stored, dict) and stored.keys() & DEFAULTS.keys():
+                    settings = normalize(stored)
+                    try:
+                        self.save(settings)
+                    except OSError as e:
+                        print(f"Could not migrate settings from {legacy_path}: {e}")
+                    return settings
+            return dict(DEFAULTS)
+        return normalize(stored)
+
+    def save(self, settings):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        with self.lock:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(prefix='.settings-', suffix='.json', dir=directory)
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(settings, f, indent=2, sort_keys=True)
+                    f.write("\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                os.remove(tmp_path)
+                raise
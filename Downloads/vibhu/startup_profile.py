@@ -0,0 +1,60 @@
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+
+class StartupProfiler:
+    # Wall-clock time per startup phase, reported with --startup-profile
+    def __init__(self, start=None):
+        self.start = time.perf_counter() if start is None else start
+        self.enabled = False
+        self.phases = []
+        self.marks = []
+        self.counts = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name):
+        began = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, began, time.perf_counter())
+
+    def record(self, name, began, ended):
+        with self._lock:
+            self.phases.append((name, began - self.start, ended - began,
+                                threading.current_thread().name))
+
+    def mark(self, name):
+        # A point in time since process start, e.g. "first window"
+        with self._lock:
+            self.marks.append((name, time.perf_counter() - self.start))
+
+    def count(self, name, value):
+        # A quantity worth seeing next to the timings, e.g. widgets built
+        with self._lock:
+            self.counts.append((name, value))
+
+    def report(self, file=None):
+        if not self.enabled:
+            return
+        file = file or sys.stderr
+        with self._lock:
+            phases = list(self.phases)
+            marks = list(self.marks)
+            counts = list(self.counts)
+        print("Startup profile (ms)", file=file)
+        print(f"  {'phase':<24}{'start':>10}{'duration':>10}  thread", file=file)
+        for name, offset, duration, thread in phases:
+            print(f"  {name:<24}{offset * 1000:>10.1f}{duration * 1000:>10.1f}  {thread}",
+                  file=file)
+        for name, offset in marks:
+            print(f"  {name:<24}{offset * 1000:>10.1f}", file=file)
+        for name, value in counts:
+            print(f"  {name:<24}{value:>10}", file=file)
+        file.flush()
+
+
+profiler = StartupProfiler()
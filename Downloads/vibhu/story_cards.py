@@ -0,0 +1,275 @@
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from image_cache import cover_size
+from lazy_import import LazyModule
+from longform import ChapterHeading
+from pdf_writer import split_paragraphs, story_title
+from story_data import BASE_DIR, DATA_DIR
+from story_engine import StoryEngine
+
+Image = LazyModule('PIL.Image')
+ImageDraw = LazyModule('PIL.ImageDraw')
+ImageFont = LazyModule('PIL.ImageFont')
+
+IMAGES_DIR = os.path.join(BASE_DIR, 'images')
+
+# Link-preview size used by most sharing sites
+CARD_SIZE = (1200, 630)
+# Word bitmaps kept per renderer; story text reuses a small vocabulary
+MAX_CACHED_WORDS = 20000
+MARGIN = 64
+
+# First serif font Pillow can find wins; Pillow's own font is the last resort
+SERIF_FONTS = ("DejaVuSerif.ttf", "georgia.ttf", "times.ttf", "LiberationSerif-Regular.ttf")
+SERIF_BOLD_FONTS = ("DejaVuSerif-Bold.ttf", "georgiab.ttf", "timesbd.ttf",
+                    "LiberationSerif-Bold.ttf")
+
+TITLE_SIZE = 56
+SUBTITLE_SIZE = 28
+EXCERPT_SIZE = 30
+EXCERPT_LINES = 7
+LINE_SPACING = 1.3
+
+TEXT_COLOR = (255, 255, 255)
+SUBTITLE_COLOR = (235, 225, 210)
+# Darkens the background under the text so it stays readable on any theme
+SHADE_COLOR = (20, 12, 8, 150)
+FALLBACK_BACKGROUND = (74, 55, 40, 255)
+
+# JPEG is the default: encoding a card as PNG takes ~15x as long
+FORMATS = {
+    'jpeg': ('JPEG', {'quality': 88}),
+    'png': ('PNG', {'compress_level': 3}),
+}
+DEFAULT_FORMAT = 'jpeg'
+
+
+def theme_background(theme):
+    return os.path.join(IMAGES_DIR, f"{theme.lower()}_bg.png")
+
+
+def load_font(candidates, size):
+    for name in candidates:
+        try:
+            return ImageFont.truetype(name, size)
+        except OSError:
+            continue
+    return ImageFont.load_default(size)
+
+
+def card_excerpt(paragraphs, max_chars=600):
+    # Leading story text up to about max_chars, skipping chapter headings
+    words = []
+    length = 0
+    for paragraph in paragraphs:
+        if isinstance(paragraph, ChapterHeading):
+            continue
+        for word in paragraph.split():
+            if length + len(word) > max_chars:
+                return " ".join(words) + "…"
+            words.append(word)
+            length += len(word) + 1
+    return " ".join(words)
+
+
+class CardRenderer:
+    # Composes story cards: the theme background scaled to cover the card,
+    # a shaded panel, then the title, "A <theme> in <setting>" and a wrapped
+    # excerpt. Fonts, finished backgrounds, word widths and word bitmaps are
+    # built once and reused for every card, so drawing text is mostly
+    # pasting cached masks rather than asking FreeType to render each line.
+    def __init__(self, size=CARD_SIZE):
+        self.size = size
+        self.title_font = load_font(SERIF_BOLD_FONTS, TITLE_SIZE)
+        self.subtitle_font = load_font(SERIF_FONTS, SUBTITLE_SIZE)
+        self.excerpt_font = load_font(SERIF_FONTS, EXCERPT_SIZE)
+        self._backgrounds = {}
+        self._widths = {}
+        self._masks = {}
+
+    def background(self, theme):
+        image = self._backgrounds.get(theme)
+        if image is None:
+            image = self._backgrounds[theme] = self._compose_background(theme)
+        return image
+
+    def _compose_background(self, theme):
+        width, height = self.size
+        path = theme_background(theme)
+        if os.path.exists(path):
+            with Image.open(path) as source:
+                source = source.convert('RGBA')
+                scaled = source.resize(cover_size(source.width, source.height, width, height),
+                                       Image.Resampling.LANCZOS)
+            left = (scaled.width - width) // 2
+            top = (scaled.height - height) // 2
+            image = scaled.crop((left, top, left + width, top + height))
+        else:
+            image = Image.new('RGBA', self.size, FALLBACK_BACKGROUND)
+        shade = Image.new('RGBA', self.size, (0, 0, 0, 0))
+        ImageDraw.Draw(shade).rounded_rectangle(
+            (MARGIN // 2, MARGIN // 2, width - MARGIN // 2, height - MARGIN // 2),
+            radius=24, fill=SHADE_COLOR)
+        # Cards have no transparency; RGB copies and encodes faster
+        return Image.alpha_composite(image, shade).convert('RGB')
+
+    def text_width(self, font, text):
+        key = (id(font), text)
+        width = self._widths.get(key)
+        if width is None:
+            width = self._widths[key] = font.getlength(text)
+        return width
+
+    def word_mask(self, font, word):
+        # (mask, dx, dy): the word's coverage bitmap and its offset from the pen
+        key = (id(font), word)
+        entry = self._masks.get(key)
+        if entry is None:
+            left, top, right, bottom = font.getbbox(word)
+            mask = Image.new('L', (max(1, right - left), max(1, bottom - top)))
+            ImageDraw.Draw(mask).text((-left, -top), word, font=font, fill=255)
+            entry = (mask, left, top)
+            if len(self._masks) >= MAX_CACHED_WORDS:
+                self._masks.clear()
+            self._masks[key] = entry
+        return entry
+
+    def draw_line(self, image, position, text, font, color):
+        x, y = position
+        space = self.text_width(font, " ")
+        for word in text.split():
+            mask, dx, dy = self.word_mask(font, word)
+            image.paste(color, (int(x) + dx, y + dy), mask)
+            x += self.text_width(font, word) + space
+
+    def wrap(self, text, font, max_width, max_lines):
+        # Greedy word wrap using cached word widths; overflow ends in an ellipsis
+        space = self.text_width(font, " ")
+        lines = []
+        line = []
+        line_width = 0.0
+        for word in text.split():
+            word_width = self.text_width(font, word)
+            if line and line_width + space + word_width > max_width:
+                lines.append(" ".join(line))
+                if len(lines) == max_lines:
+                    lines[-1] = lines[-1].rstrip(".,;:") + "…"
+                    return lines
+                line = []
+                line_width = 0.0
+            line_width += (space if line else 0.0) + word_width
+            line.append(word)
+        if line:
+            lines.append(" ".join(line))
+        return lines
+
+    def render(self, data, story):
+        image = self.background(data['theme']).copy()
+        width = self.size[0] - 2 * MARGIN
+        y = MARGIN
+
+        for line in self.wrap(story_title(data), self.title_font, width, 2):
+            self.draw_line(image, (MARGIN, y), line, self.title_font, TEXT_COLOR)
+            y += int(TITLE_SIZE * 1.15)
+        y += 8
+        subtitle = f"A {data['theme'].lower()} in {data['setting']}"
+        self.draw_line(image, (MARGIN, y), subtitle, self.subtitle_font, SUBTITLE_COLOR)
+        y += int(SUBTITLE_SIZE * 1.8)
+
+        excerpt = card_excerpt(split_paragraphs(story) if isinstance(story, str) else story)
+        step = int(EXCERPT_SIZE * LINE_SPACING)
+        max_lines = max(1, min(EXCERPT_LINES, (self.size[1] - MARGIN - y) // step))
+        for line in self.wrap(excerpt, self.excerpt_font, width, max_lines):
+            self.draw_line(image, (MARGIN, y), line, self.excerpt_font, TEXT_COLOR)
+            y += step
+        return image
+
+    def save(self, image, path, fmt=DEFAULT_FORMAT):
+        format_name, options = FORMATS[fmt]
+        image.save(path, format_name, **options)
+
+
+def save_card(path, data, story, fmt=None):
+    # One-off card, e.g. from the app; the format follows the file extension
+    if fmt is None:
+        fmt = 'jpeg' if path.lower().endswith(('.jpg', '.jpeg')) else 'png'
+    renderer = CardRenderer()
+    renderer.save(renderer.render(data, story), path, fmt)
+
+
+# Batch mode: each worker builds its engine and renderer once, then writes
+# whole chunks of cards straight to disk and reports its CPU time.
+
+_worker_engine = None
+_worker_renderer = None
+
+
+def _init_worker(data_dir):
+    global _worker_engine, _worker_renderer
+    _worker_engine = StoryEngine(data_dir)
+    _worker_renderer = CardRenderer()
+
+
+def _render_chunk(records, out_dir, first_index, fmt):
+    began = time.process_time()
+    extension = 'jpg' if fmt == 'jpeg' else fmt
+    for offset, data in enumerate(records):
+        story = _worker_engine.create_story(data)
+        image = _worker_renderer.render(data, story)
+        path = os.path.join(out_dir, f"card_{first_index + offset:07d}.{extension}")
+        _worker_renderer.save(image, path, fmt)
+    return len(records), time.process_time() - began
+
+
+def _chunked(records, size):
+    chunk = []
+    for data in records:
+        chunk.append(data)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def render_cards(records, out_dir, workers=1, chunk_size=100, fmt=DEFAULT_FORMAT,
+                 data_dir=DATA_DIR):
+    # Render one card per story_data record into out_dir. Returns (cards,
+    # wall seconds, CPU seconds summed over the workers, workers used).
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown card format '{fmt}'")
+    if workers < 0:
+        raise ValueError("workers must be 0 (all cores) or more")
+    os.makedirs(out_dir, exist_ok=True)
+    start = time.perf_counter()
+    cards = 0
+    cpu = 0.0
+
+    if workers == 1:
+        _init_worker(data_dir)
+        for chunk in _chunked(records, chunk_size):
+            count, seconds = _render_chunk(chunk, out_dir, cards, fmt)
+            cards += count
+            cpu += seconds
+        return cards, time.perf_counter() - start, cpu, 1
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(data_dir,)) as pool:
+        pending = deque()
+        submitted = 0
+        for chunk in _chunked(records, chunk_size):
+            pending.append(pool.submit(_render_chunk, chunk, out_dir, submitted, fmt))
+            submitted += len(chunk)
+            if len(pending) >= workers * 2:
+                count, seconds = pending.popleft().result()
+                cards += count
+                cpu += seconds
+        for future in pending:
+            count, seconds = future.result()
+            cards += count
+            cpu += seconds
+    return cards, time.perf_counter() - start, cpu, workers
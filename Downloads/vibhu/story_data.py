@@ -0,0 +1,226 @@
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+
+from app_paths import user_cache_dir
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BASE_DIR, 'data')
+
+SOURCE_FILES = ('characters.json', 'settings.json', 'plots.json')
+
+# Bump whenever the compiled layout below changes
+CACHE_VERSION = 3
+
+# Keys every data file must provide, each a non-empty list of strings
+REQUIRED_LISTS = {
+    'characters.json': ('personalities', 'male_status', 'female_status'),
+    'settings.json': ('locations',),
+    'plots.json': ('twists', 'resolutions'),
+}
+
+# Optional lists; when present they must also be non-empty lists of strings
+OPTIONAL_LISTS = {
+    'characters.json': ('female_names', 'male_names'),
+}
+
+GENDERS = {
+    'female': 'female_status',
+    'male': 'male_status',
+}
+
+
+class StoryDataError(ValueError):
+    pass
+
+
+def _check_string_list(source, key, value):
+    if not isinstance(value, list) or not value:
+        raise StoryDataError(f"{source}: '{key}' must be a non-empty list")
+    for i, item in enumerate(value):
+        if not isinstance(item, str) or not item.strip():
+            raise StoryDataError(f"{source}: '{key}[{i}]' must be a non-empty string")
+    if len(set(value)) != len(value):
+        raise StoryDataError(f"{source}: '{key}' contains duplicates")
+
+
+def validate(sources):
+    # sources maps file name -> parsed JSON
+    for name, keys in REQUIRED_LISTS.items():
+        document = sources[name]
+        if not isinstance(document, dict):
+            raise StoryDataError(f"{name}: expected a JSON object")
+        for key in keys:
+            if key not in document:
+                raise StoryDataError(f"{name}: missing '{key}'")
+            _check_string_list(name, key, document[key])
+        for key in OPTIONAL_LISTS.get(name, ()):
+            if key in document:
+                _check_string_list(name, key, document[key])
+    _check_themes(sources['plots.json'].get('themes', {}))
+
+
+def _check_themes(themes):
+    # Two themes with the same twist and resolution would tell the same story
+    if not isinstance(themes, dict):
+        raise StoryDataError("plots.json: 'themes' must be an object")
+    seen = {}
+    for theme, choice in themes.items():
+        if not isinstance(choice, dict):
+            raise StoryDataError(f"plots.json: 'themes.{theme}' must be an object")
+        pair = (choice.get('twist', 0), choice.get('resolution', 0))
+        if pair in seen:
+            raise StoryDataError(f"plots.json: themes '{seen[pair]}' and '{theme}' both use "
+                                 f"twist {pair[0]} and resolution {pair[1]}")
+        seen[pair] = theme
+
+
+def index_of(values):
+    return {value: i for i, value in enumerate(values)}
+
+
+def compile_sources(sources):
+    # Everything derived from the JSON that is worth not recomputing
+    characters = sources['characters.json']
+    settings = sources['settings.json']
+    statuses = {gender: list(characters[key]) for gender, key in GENDERS.items()}
+    names = {gender: list(characters.get(f'{gender}_names', ())) for gender in GENDERS}
+    return {
+        'character_traits': characters,
+        'settings': settings,
+        'plot_elements': sources['plots.json'],
+        'personality_index': index_of(characters['personalities']),
+        'statuses': statuses,
+        'status_index': {gender: index_of(values) for gender, values in statuses.items()},
+        'location_index': index_of(settings['locations']),
+        'names': names,
+    }
+
+
+class StoryData:
+    # Validated story vocabulary plus precomputed lookups
+    def __init__(self, compiled):
+        self.character_traits = compiled['character_traits']
+        self.settings = compiled['settings']
+        self.plot_elements = compiled['plot_elements']
+        self.personality_index = compiled['personality_index']
+        # Status lists and indices split by gender ('female' / 'male')
+        self.statuses = compiled['statuses']
+        self.status_index = compiled['status_index']
+        self.location_index = compiled['location_index']
+        # Stock character names by gender, used by seeded generation
+        self.names = compiled['names']
+
+    @property
+    def personalities(self):
+        return self.character_traits['personalities']
+
+    @property
+    def locations(self):
+        return self.settings['locations']
+
+
+def _fingerprint(path, with_hash):
+    stat = os.stat(path)
+    digest = None
+    if with_hash:
+        with open(path, 'rb') as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+    return {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'sha256': digest}
+
+
+def default_cache_path(data_dir):
+    # One cache file per data directory
+    tag = hashlib.sha256(os.path.abspath(data_dir).encode('utf-8')).hexdigest()[:16]
+    return user_cache_dir('story-data', f'{tag}.pickle')
+
+
+def _read_cache(cache_path, data_dir):
+    # The cache is only an optimisation: anything wrong with it, including
+    # a pickle that no longer unpickles against this code (KeyError,
+    # ImportError, IndexError, ...), means rebuilding from the sources
+    try:
+        with open(cache_path, 'rb') as f:
+            cached = pickle.load(f)
+    except Exception:
+        return None
+    if not isinstance(cached, dict) or cached.get('version') != CACHE_VERSION:
+        return None
+    try:
+        return _check_cache(cache_path, data_dir, cached)
+    except (KeyError, TypeError):
+        return None
+
+
+def _check_cache(cache_path, data_dir, cached):
+    fingerprints = cached['sources']
+    touched = False
+    for name in SOURCE_FILES:
+        path = os.path.join(data_dir, name)
+        try:
+            current = _fingerprint(path, with_hash=False)
+        except OSError:
+            return None
+        known = fingerprints.get(name)
+        if known is None:
+            return None
+        if current['mtime_ns'] == known['mtime_ns'] and current['size'] == known['size']:
+            continue
+        # mtime moved (checkout, copy, touch): only the content hash decides
+        current = _fingerprint(path, with_hash=True)
+        if current['sha256'] != known['sha256']:
+            return None
+        fingerprints[name] = current
+        touched = True
+
+    if touched:
+        _write_cache(cache_path, cached)
+    return cached['compiled']
+
+
+def _write_cache(cache_path, cached):
+    directory = os.path.dirname(cache_path)
+    try:
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix='.story-data-', dir=directory)
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(cached, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        # A read-only or missing cache directory just means no cache
+        print(f"Could not write story data cache: {e}")
+
+
+def load_story_data(data_dir=DATA_DIR, cache_path=None, use_cache=True):
+    # Paths are resolved relative to this module, never the working directory
+    cache_path = cache_path or default_cache_path(data_dir)
+    if use_cache:
+        compiled = _read_cache(cache_path, data_dir)
+        if compiled is not None:
+            return StoryData(compiled)
+
+    sources = {}
+    fingerprints = {}
+    for name in SOURCE_FILES:
+        path = os.path.join(data_dir, name)
+        stat = os.stat(path)
+        with open(path, 'rb') as f:
+            raw = f.read()
+        fingerprints[name] = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size,
+                              'sha256': hashlib.sha256(raw).hexdigest()}
+        try:
+            sources[name] = json.loads(raw.decode('utf-8'))
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            raise StoryDataError(f"{name}: invalid JSON: {e}") from e
+    validate(sources)
+    compiled = compile_sources(sources)
+
+    if use_cache:
+        _write_cache(cache_path, {
+            'version': CACHE_VERSION,
+            'sources': fingerprints,
+            'compiled': compiled,
+        })
+    return StoryData(compiled)
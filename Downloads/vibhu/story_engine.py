@@ -0,0 +1,144 @@
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from prose_model import ProseLibrary, story_seed
+from story_data import DATA_DIR, load_story_data
+from templates import PARAGRAPH_SEPARATOR, StoryTemplates
+
+
+class StoryEngine:
+    # Pure story generation: no Tk, no audio. Shared by the GUI and the CLI.
+    def __init__(self, data_dir=DATA_DIR):
+        self.data_dir = data_dir
+        self.load_story_elements()
+
+    def load_story_elements(self):
+        # Validated, precompiled story data (served from cache when unchanged)
+        self.data = load_story_data(self.data_dir)
+        self.character_traits = self.data.character_traits
+        self.settings = self.data.settings
+        self.plot_elements = self.data.plot_elements
+
+        # Compile every plot template once; stories are rendered from these
+        self.templates = StoryTemplates(self.plot_elements)
+        # Trained n-gram models from data/prose/, if any (see 'cli.py train-prose')
+        self.prose = ProseLibrary(os.path.join(self.data_dir, 'prose'))
+        self._generators = {}
+
+    def story_generator(self, theme):
+        # Resolve generate_<theme>_story overrides once per theme, not per story;
+        # themes without one use the templates, plus generated prose when a
+        # model has been trained for them
+        generator = self._generators.get(theme)
+        if generator is None:
+            method_name = f"generate_{theme.lower().replace(' ', '_')}_story"
+            generator = getattr(self, method_name, None)
+            if generator is None:
+                prose = self.prose.for_theme(theme)
+                if prose is None:
+                    generator = self.templates.render_story
+                else:
+                    generator = partial(self.render_with_prose, prose)
+            # Only themes from plots.json are remembered, so callers passing
+            # arbitrary strings (e.g. over HTTP) cannot grow this without bound
+            if theme in self.plot_elements.get('themes', {}):
+                self._generators[theme] = generator
+        return generator
+
+    def render_with_prose(self, prose, data):
+        # The template story with a generated paragraph before the ending.
+        # The paragraph is seeded from the story data, so the same input
+        # always gives the same story.
+        story = self.templates.render_story(data)
+        body, ending = story.rsplit(PARAGRAPH_SEPARATOR, 1)
+        paragraph = prose.paragraph(story_seed(data))
+        return PARAGRAPH_SEPARATOR.join((body, paragraph, ending))
+
+    def create_story(self, data):
+        return self.story_generator(data['theme'])(data)
+
+    def generate_default_story(self, data):
+        return self.templates.render_default(data)
+
+    def generate_many(self, records):
+        # Lazily turn an iterable of story_data dicts into stories
+        create_story = self.create_story
+        for data in records:
+            yield create_story(data)
+
+
+def read_story_data(lines):
+    # Parse story_data dicts from JSONL, skipping blank lines
+    for line_no, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON on line {line_no}: {e}") from e
+
+
+# Each pool worker builds its own engine once instead of pickling it per task.
+# generate_batch and story_server share these pool helpers
+_worker_engine = None
+
+
+def init_worker(data_dir):
+    global _worker_engine
+    _worker_engine = StoryEngine(data_dir)
+
+
+def generate_chunk(records):
+    return [_worker_engine.create_story(data) for data in records]
+
+
+def chunked(records, size):
+    chunk = []
+    for data in records:
+        chunk.append(data)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def generate_batch(records, workers=1, chunk_size=500, data_dir=DATA_DIR):
+    # Yield (story_data, story) pairs in input order.
+    # workers=1 runs in-process; workers=0/None uses every core.
+    if workers == 1:
+        engine = StoryEngine(data_dir)
+        for data in records:
+            yield data, engine.create_story(data)
+        return
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers,
+                             initializer=init_worker,
+                             initargs=(data_dir,)) as pool:
+        # Keep a bounded number of chunks in flight so memory stays flat
+        max_pending = workers * 2
+        pending = deque()
+        for chunk in chunked(records, chunk_size):
+            pending.append((chunk, pool.submit(generate_chunk, chunk)))
+            if len(pending) >= max_pending:
+                chunk, future = pending.popleft()
+                yield from zip(chunk, future.result())
+        for chunk, future in pending:
+            yield from zip(chunk, future.result())
+
+
+def write_stories(pairs, out):
+    # Write each story next to its input as one JSONL record
+    count = 0
+    for data, story in pairs:
+        record = dict(data)
+        record['story'] = story
+        out.write(json.dumps(record, ensure_ascii=False))
+        out.write('\n')
+        count += 1
+    return count
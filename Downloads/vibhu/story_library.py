@@ -0,0 +1,166 @@
+import json
+import os
+import sqlite3
+import time
+
+from app_paths import user_data_dir
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS stories (
+    id INTEGER PRIMARY KEY,
+    created_at REAL NOT NULL,
+    heroine TEXT NOT NULL,
+    hero TEXT NOT NULL,
+    theme TEXT NOT NULL,
+    setting TEXT NOT NULL,
+    story_data TEXT NOT NULL,
+    text TEXT NOT NULL
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS stories_fts USING fts5(
+    heroine, hero, theme, setting, text,
+    content='stories', content_rowid='id'
+);
+
+CREATE TRIGGER IF NOT EXISTS stories_ai AFTER INSERT ON stories BEGIN
+    INSERT INTO stories_fts(rowid, heroine, hero, theme, setting, text)
+    VALUES (new.id, new.heroine, new.hero, new.theme, new.setting, new.text);
+END;
+
+CREATE TRIGGER IF NOT EXISTS stories_ad AFTER DELETE ON stories BEGIN
+    INSERT INTO stories_fts(stories_fts, rowid, heroine, hero, theme, setting, text)
+    VALUES ('delete', old.id, old.heroine, old.hero, old.theme, old.setting, old.text);
+END;
+
+-- Small covering index so count(*) does not scan the story text
+CREATE INDEX IF NOT EXISTS stories_theme ON stories(theme);
+"""
+
+# Columns a search term can be restricted to, e.g. "theme:mystery"
+SEARCH_FIELDS = ("heroine", "hero", "theme", "setting", "text")
+
+PAGE_SIZE = 50
+
+
+def default_library_path():
+    return user_data_dir("library.sqlite3")
+
+
+def fts_query(query):
+    # Turn free text into a safe FTS5 query: every term is quoted (so
+    # punctuation is never parsed as syntax) and terms are ANDed together.
+    # "field:term" restricts a term to one column, and a trailing '*' keeps
+    # its meaning as a prefix match.
+    parts = []
+    for term in query.split():
+        column = None
+        field, sep, rest = term.partition(':')
+        if sep and field.lower() in SEARCH_FIELDS and rest:
+            column, term = field.lower(), rest
+        prefix = term.endswith('*') and len(term) > 1
+        if prefix:
+            term = term[:-1]
+        quoted = '"' + term.replace('"', '""') + '"' + ('*' if prefix else '')
+        parts.append(f"{column} : {quoted}" if column else quoted)
+    return ' '.join(parts)
+
+
+class StoryLibrary:
+    # Persistent store of generated stories with a full-text index
+    def __init__(self, path=None):
+        self.path = path or default_library_path()
+        if self.path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.conn = sqlite3.connect(self.path)
+        # WAL lets readers (searches) run alongside batched writes
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @staticmethod
+    def _row(data, text, created_at):
+        return (created_at,
+                data['heroine']['name'], data['hero']['name'],
+                data['theme'], data['setting'],
+                json.dumps(data, ensure_ascii=False), text)
+
+    def add(self, data, text):
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO stories (created_at, heroine, hero, theme, setting, story_data, text) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", self._row(data, text, time.time()))
+        return cursor.lastrowid
+
+    def add_many(self, pairs, batch_size=2000):
+        # Insert (story_data, text) pairs, one transaction per batch
+        count = 0
+        batch = []
+        now = time.time()
+        insert = ("INSERT INTO stories (created_at, heroine, hero, theme, setting, story_data, text) "
+                  "VALUES (?, ?, ?, ?, ?, ?, ?)")
+        for data, text in pairs:
+            batch.append(self._row(data, text, now))
+            if len(batch) >= batch_size:
+                with self.conn:
+                    self.conn.executemany(insert, batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            with self.conn:
+                self.conn.executemany(insert, batch)
+            count += len(batch)
+        return count
+
+    def search(self, query='', limit=PAGE_SIZE, offset=0, order='recent', before_id=None):
+        # One page of (id, heroine, hero, theme, setting, created_at, snippet).
+        # order='recent' lists newest matches first and stops after one page;
+        # order='relevance' ranks with bm25, which has to score every match.
+        # before_id pages by key instead of offset: only stories older than
+        # that id, so stories saved in the meantime never shift a page.
+        match = fts_query(query)
+        order_by = 'rank' if order == 'relevance' else 'stories_fts.rowid DESC'
+        if not match:
+            where, params = ("WHERE id < ? ", (before_id,)) if before_id is not None else ("", ())
+            return self.conn.execute(
+                "SELECT id, heroine, hero, theme, setting, created_at, substr(text, 1, 120) "
+                f"FROM stories {where}ORDER BY id DESC LIMIT ? OFFSET ?",
+                params + (limit, offset)).fetchall()
+        where, params = ("AND stories_fts.rowid < ? ", (before_id,)) if before_id is not None else ("", ())
+        return self.conn.execute(
+            "SELECT s.id, s.heroine, s.hero, s.theme, s.setting, s.created_at, "
+            "snippet(stories_fts, 4, '[', ']', '...', 16) "
+            "FROM stories_fts JOIN stories s ON s.id = stories_fts.rowid "
+            f"WHERE stories_fts MATCH ? {where}ORDER BY {order_by} LIMIT ? OFFSET ?",
+            (match,) + params + (limit, offset)).fetchall()
+
+    def count(self, query=''):
+        match = fts_query(query)
+        if not match:
+            return self.conn.execute("SELECT count(*) FROM stories").fetchone()[0]
+        return self.conn.execute(
+            "SELECT count(*) FROM stories_fts WHERE stories_fts MATCH ?", (match,)).fetchone()[0]
+
+    def get(self, story_id):
+        row = self.conn.execute(
+            "SELECT story_data, text FROM stories WHERE id = ?", (story_id,)).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def delete(self, story_id):
+        with self.conn:
+            self.conn.execute("DELETE FROM stories WHERE id = ?", (story_id,))
+
+    def optimize(self):
+        # Merge FTS index segments after large imports
+        with self.conn:
+            self.conn.execute("INSERT INTO stories_fts(stories_fts) VALUES ('optimize')")
@@ -0,0 +1,313 @@
+import asyncio
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+from urllib.parse import urlsplit
+
+from longform import ChapterHeading, DEFAULT_CHAPTERS, LongFormStory
+from story_data import DATA_DIR
+from story_engine import StoryEngine, chunked, generate_chunk, init_worker
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+# Request limits
+MAX_HEADER_BYTES = 64 * 1024
+MAX_BODY_BYTES = 32 * 1024 * 1024
+MAX_BATCH = 50000
+MAX_CHAPTERS = 10000
+
+# Batches smaller than this are generated in-process: handing a few
+# microseconds of work to another process costs more than doing it
+POOL_THRESHOLD = 2000
+CHUNK_SIZE = 1000
+
+# Long-form streams are sent in chunks of about this size, and give other
+# connections a turn every STREAM_YIELD_EVERY paragraphs
+STREAM_CHUNK_BYTES = 16 * 1024
+STREAM_YIELD_EVERY = 64
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message=None):
+        super().__init__(message or status.phrase)
+        self.status = status
+
+
+class StreamAborted(Exception):
+    # A streamed response failed after its headers went out; the stream has
+    # been ended and the connection must close
+    pass
+
+
+def check_story_data(data, themes, where="story_data"):
+    # Reject malformed records up front so a bad one never reaches a worker
+    if not isinstance(data, dict):
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f"{where} must be an object")
+    for role in ("heroine", "hero"):
+        character = data.get(role)
+        if not isinstance(character, dict):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"{where}.{role} must be an object")
+        for field in ("name", "personality", "status"):
+            if not isinstance(character.get(field), str):
+                raise HTTPError(HTTPStatus.BAD_REQUEST, f"{where}.{role}.{field} must be a string")
+    for field in ("theme", "setting"):
+        if not isinstance(data.get(field), str):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"{where}.{field} must be a string")
+    # Only known themes: the engine keeps per-theme state for each one
+    if data["theme"] not in themes:
+        raise HTTPError(HTTPStatus.UNPROCESSABLE_ENTITY,
+                        f"{where}.theme: unknown theme '{data['theme']}'")
+    return data
+
+
+class StoryService:
+    # The story engine behind a small HTTP/1.1 API:
+    #
+    #   GET  /health      liveness check
+    #   GET  /elements    characters, settings and themes the engine knows
+    #   POST /story       one story_data object -> {"story": ...}
+    #   POST /stories     {"records": [...]} -> {"stories": [...]}, in order
+    #   POST /longform    {"story_data": ..., "chapters": N, "seed": S}
+    #                     -> NDJSON stream, one paragraph per line
+    #
+    # Large batches run on a bounded process pool; at most two chunks per
+    # worker are queued, and further requests wait for a slot.
+    def __init__(self, data_dir=DATA_DIR, workers=0):
+        self.data_dir = data_dir
+        self.engine = StoryEngine(data_dir)
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = None
+        self.pool_slots = asyncio.Semaphore(self.workers * 2)
+        self.elements = {
+            "characters": self.engine.character_traits,
+            "settings": self.engine.settings,
+            "themes": sorted(self.engine.plot_elements.get("themes", {})),
+        }
+        self.themes = frozenset(self.elements["themes"])
+
+    def start_pool(self):
+        if self.pool is None and self.workers > 1:
+            self.pool = ProcessPoolExecutor(max_workers=self.workers,
+                                            initializer=init_worker,
+                                            initargs=(self.data_dir,))
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+            self.pool = None
+
+    # Endpoints
+
+    async def get_health(self, body, writer):
+        return {"status": "ok", "workers": self.workers}
+
+    async def get_elements(self, body, writer):
+        return self.elements
+
+    async def post_story(self, body, writer):
+        data = check_story_data(body, self.themes)
+        return {"story": self.engine.create_story(data)}
+
+    async def post_stories(self, body, writer):
+        records = body.get("records") if isinstance(body, dict) else body
+        if not isinstance(records, list):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "expected {\"records\": [...]}")
+        if len(records) > MAX_BATCH:
+            raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                            f"at most {MAX_BATCH} records per batch")
+        for i, data in enumerate(records):
+            check_story_data(data, self.themes, f"records[{i}]")
+        if self.pool is None or len(records) < POOL_THRESHOLD:
+            create_story = self.engine.create_story
+            return {"stories": [create_story(data) for data in records]}
+
+        loop = asyncio.get_running_loop()
+
+        async def run_chunk(chunk):
+            async with self.pool_slots:
+                return await loop.run_in_executor(self.pool, generate_chunk, chunk)
+
+        chunks = await asyncio.gather(*(run_chunk(chunk)
+                                        for chunk in chunked(records, CHUNK_SIZE)))
+        return {"stories": [story for chunk in chunks for story in chunk]}
+
+    async def post_longform(self, body, writer):
+        if not isinstance(body, dict):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "expected an object")
+        data = check_story_data(body.get("story_data"), self.themes)
+        chapters = body.get("chapters", DEFAULT_CHAPTERS)
+        seed = body.get("seed", 0)
+        if not isinstance(chapters, int) or not 1 <= chapters <= MAX_CHAPTERS:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"chapters must be 1..{MAX_CHAPTERS}")
+        if not isinstance(seed, int):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "seed must be an integer")
+        try:
+            story = LongFormStory(self.engine, data, chapters=chapters, seed=seed)
+        except ValueError as e:
+            raise HTTPError(HTTPStatus.UNPROCESSABLE_ENTITY, str(e)) from None
+
+        # Paragraphs are generated as the client reads them; drain() holds
+        # the generator back whenever the socket buffer is full. The first
+        # one goes out alone so the client can start showing it at once.
+        await start_chunked(writer, "application/x-ndjson")
+        try:
+            buffer = []
+            buffered = 0
+            for count, paragraph in enumerate(story, 1):
+                line = {"paragraph": paragraph}
+                if isinstance(paragraph, ChapterHeading):
+                    line["heading"] = True
+                encoded = (json.dumps(line, ensure_ascii=False) + "\n").encode('utf-8')
+                buffer.append(encoded)
+                buffered += len(encoded)
+                if count == 1 or buffered >= STREAM_CHUNK_BYTES:
+                    await write_chunk(writer, b"".join(buffer))
+                    buffer = []
+                    buffered = 0
+                elif count % STREAM_YIELD_EVERY == 0:
+                    await asyncio.sleep(0)
+            if buffer:
+                await write_chunk(writer, b"".join(buffer))
+        except ConnectionError:
+            raise
+        except Exception as e:
+            # Too late for a status code: the paragraphs so far are followed
+            # by an error line, and the stream ends properly before closing
+            print(f"Error streaming long-form story: {e}", file=sys.stderr)
+            await write_chunk(writer, b'{"error": "internal error"}\n')
+            await end_chunked(writer)
+            raise StreamAborted() from e
+        await end_chunked(writer)
+        return None
+
+    ROUTES = {
+        ('GET', '/health'): get_health,
+        ('GET', '/elements'): get_elements,
+        ('POST', '/story'): post_story,
+        ('POST', '/stories'): post_stories,
+        ('POST', '/longform'): post_longform,
+    }
+
+    # HTTP plumbing
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                keep_alive = await self.handle_request(reader, writer)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def handle_request(self, reader, writer):
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError as e:
+            if e.partial:
+                await send_json(writer, HTTPStatus.BAD_REQUEST, {"error": "incomplete request"}, False)
+            return False
+        except asyncio.LimitOverrunError:
+            await send_json(writer, HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE,
+                            {"error": "headers too large"}, False)
+            return False
+
+        lines = head.decode('latin-1').split("\r\n")
+        try:
+            method, target, version = lines[0].split(" ", 2)
+        except ValueError:
+            await send_json(writer, HTTPStatus.BAD_REQUEST, {"error": "malformed request line"}, False)
+            return False
+        headers = {}
+        for line in lines[1:]:
+            if line:
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+
+        try:
+            length = int(headers.get("content-length", "0"))
+        except ValueError:
+            length = -1
+        if length < 0:
+            await send_json(writer, HTTPStatus.BAD_REQUEST, {"error": "invalid Content-Length"}, False)
+            return False
+        if length > MAX_BODY_BYTES:
+            await send_json(writer, HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"error": "body too large"}, False)
+            return False
+        raw = await reader.readexactly(length) if length else b""
+
+        handler = self.ROUTES.get((method, urlsplit(target).path))
+        try:
+            if handler is None:
+                raise HTTPError(HTTPStatus.NOT_FOUND)
+            try:
+                body = json.loads(raw) if raw else None
+            except (json.JSONDecodeError, UnicodeDecodeError) as e:
+                raise HTTPError(HTTPStatus.BAD_REQUEST, f"invalid JSON: {e}") from None
+            result = await handler(self, body, writer)
+        except HTTPError as e:
+            await send_json(writer, e.status, {"error": str(e)}, keep_alive)
+            return keep_alive
+        except ConnectionError:
+            raise
+        except StreamAborted:
+            return False
+        except Exception as e:
+            print(f"Error handling {method} {target}: {e}", file=sys.stderr)
+            await send_json(writer, HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "internal error"}, False)
+            return False
+        if result is not None:
+            await send_json(writer, HTTPStatus.OK, result, keep_alive)
+        return keep_alive
+
+
+async def send_json(writer, status, payload, keep_alive):
+    body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+    writer.write(
+        f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+        f"Content-Type: application/json; charset=utf-8\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1') + body)
+    await writer.drain()
+
+
+async def start_chunked(writer, content_type):
+    writer.write(
+        f"HTTP/1.1 200 OK\r\n"
+        f"Content-Type: {content_type}; charset=utf-8\r\n"
+        f"Transfer-Encoding: chunked\r\n\r\n".encode('latin-1'))
+    await writer.drain()
+
+
+async def write_chunk(writer, data):
+    writer.write(b"%x\r\n%s\r\n" % (len(data), data))
+    await writer.drain()
+
+
+async def end_chunked(writer):
+    writer.write(b"0\r\n\r\n")
+    await writer.drain()
+
+
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, data_dir=DATA_DIR, workers=0):
+    service = StoryService(data_dir, workers)
+    service.start_pool()
+    server = await asyncio.start_server(service.handle_connection, host, port,
+                                        limit=MAX_HEADER_BYTES)
+    addresses = ", ".join(str(sock.getsockname()) for sock in server.sockets)
+    print(f"Serving stories on {addresses} with {service.workers} worker(s)", file=sys.stderr)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
@@ -0,0 +1,172 @@
+import hashlib
+import json
+import os
+import random
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from story_data import DATA_DIR
+from story_engine import StoryEngine
+
+# Names used when the data files ship no stock names
+FALLBACK_NAMES = {
+    'female': ["Elizabeth"],
+    'male': ["Darcy"],
+}
+
+
+def derive_seed(seed, index):
+    # Stable per-story seed: the same (seed, index) gives the same story in any
+    # process, on any machine, however the index range was split up
+    digest = hashlib.sha256(f"{seed}:{index}".encode('ascii')).digest()
+    return int.from_bytes(digest[:8], 'big')
+
+
+class StorySpace:
+    # The full combination space of story attributes, addressed by index.
+    # Nothing is materialized: an index is decoded into its attribute values
+    # as a mixed-radix number, so any slice can be walked lazily.
+    def __init__(self, engine):
+        data = engine.data
+        themes = list(engine.plot_elements.get('themes', {}))
+        if not themes:
+            raise ValueError("plots.json defines no themes to enumerate")
+        self.dimensions = (
+            ('heroine_personality', data.personalities),
+            ('hero_personality', data.personalities),
+            ('heroine_status', data.statuses['female']),
+            ('hero_status', data.statuses['male']),
+            ('setting', data.locations),
+            ('theme', themes),
+        )
+        self.names = {gender: data.names.get(gender) or FALLBACK_NAMES[gender]
+                      for gender in FALLBACK_NAMES}
+        self.size = 1
+        for _, values in self.dimensions:
+            self.size *= len(values)
+
+    def __len__(self):
+        return self.size
+
+    def decode(self, index):
+        if not 0 <= index < self.size:
+            raise IndexError(f"story index {index} out of range 0..{self.size - 1}")
+        values = {}
+        # Last dimension varies fastest
+        for name, options in reversed(self.dimensions):
+            index, digit = divmod(index, len(options))
+            values[name] = options[digit]
+        return values
+
+    def story_data(self, values, rng):
+        return {
+            "heroine": {
+                "name": rng.choice(self.names['female']),
+                "personality": values['heroine_personality'],
+                "status": values['heroine_status'],
+            },
+            "hero": {
+                "name": rng.choice(self.names['male']),
+                "personality": values['hero_personality'],
+                "status": values['hero_status'],
+            },
+            "theme": values['theme'],
+            "setting": values['setting'],
+        }
+
+    def enumerated(self, index, seed):
+        # Story number `index` in enumeration order; names come from the seed
+        return self.story_data(self.decode(index), random.Random(derive_seed(seed, index)))
+
+    def sampled(self, index, seed):
+        # A uniformly random point of the space, reproducible from (seed, index)
+        rng = random.Random(derive_seed(seed, index))
+        return self.enumerated(rng.randrange(self.size), seed)
+
+    def shard(self, shard, shards, start=0, stop=None):
+        # Contiguous index range [start, stop) for shard number `shard` of `shards`
+        stop = self.size if stop is None else min(stop, self.size)
+        if not 0 <= shard < shards:
+            raise ValueError(f"shard must be in 0..{shards - 1}")
+        total = max(0, stop - start)
+        base, extra = divmod(total, shards)
+        first = start + shard * base + min(shard, extra)
+        return first, first + base + (1 if shard < extra else 0)
+
+
+class StoryGenerator:
+    # Seeded front end over the engine: output depends only on (seed, index)
+    def __init__(self, seed, data_dir=DATA_DIR, engine=None):
+        self.seed = seed
+        self.engine = engine or StoryEngine(data_dir)
+        self.space = StorySpace(self.engine)
+
+    def story_data(self, index, mode='enumerate'):
+        if mode == 'enumerate':
+            return self.space.enumerated(index, self.seed)
+        return self.space.sampled(index, self.seed)
+
+    def generate(self, index, mode='enumerate'):
+        data = self.story_data(index, mode)
+        return data, self.engine.create_story(data)
+
+    def iter_range(self, start, stop, mode='enumerate'):
+        # Lazy generator over [start, stop); nothing is built ahead of time
+        for index in range(start, stop):
+            data, story = self.generate(index, mode)
+            yield index, data, story
+
+
+_worker_generator = None
+
+
+def _init_worker(seed, data_dir):
+    global _worker_generator
+    _worker_generator = StoryGenerator(seed, data_dir)
+
+
+def _generate_range(start, stop, mode):
+    return list(_worker_generator.iter_range(start, stop, mode))
+
+
+def generate_range(start, stop, seed, mode='enumerate', workers=1,
+                   chunk_size=1000, data_dir=DATA_DIR):
+    # Yield (index, story_data, story) for [start, stop) in index order. The
+    # output is identical for any number of workers.
+    if workers == 1:
+        yield from StoryGenerator(seed, data_dir).iter_range(start, stop, mode)
+        return
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(seed, data_dir)) as pool:
+        pending = deque()
+        for chunk_start in range(start, stop, chunk_size):
+            chunk_stop = min(chunk_start + chunk_size, stop)
+            pending.append(pool.submit(_generate_range, chunk_start, chunk_stop, mode))
+            if len(pending) >= workers * 2:
+                yield from pending.popleft().result()
+        for future in pending:
+            yield from future.result()
+
+
+class Checkpoint:
+    # Remembers the next index to produce so an interrupted run can resume.
+    # Written atomically, and only after the output it covers has been flushed.
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def save(self, state):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(prefix='.checkpoint-', dir=directory)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.path)
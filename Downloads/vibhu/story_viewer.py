@@ -0,0 +1,290 @@
+import tempfile
+import tkinter as tk
+import tkinter.font as tkfont
+from array import array
+from bisect import bisect_left
+from tkinter import ttk
+
+from longform import ChapterHeading
+
+# Paragraphs kept in the Text widget at once, and how many are loaded or
+# dropped when the view nears either edge of that window
+WINDOW_PARAGRAPHS = 120
+MARGIN_PARAGRAPHS = 40
+# Fraction of the window that counts as "near the edge"
+EDGE = 0.15
+# Paragraph text stays in memory until the index grows past this
+SPOOL_BYTES = 1024 * 1024
+
+
+class ParagraphIndex:
+    # Append-only store of a story's paragraphs with random access. The text
+    # is spooled to a temporary file (in memory while small) and only the
+    # byte offsets are kept, so a 500-page story costs a few bytes per
+    # paragraph in RAM.
+    def __init__(self):
+        self._file = tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES)
+        self._offsets = array('Q', [0])
+        # (paragraph number, heading) for every chapter heading seen
+        self.chapters = []
+        self._chapter_numbers = array('Q')
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def append(self, paragraph):
+        if isinstance(paragraph, ChapterHeading):
+            self.chapters.append((len(self), str(paragraph)))
+            self._chapter_numbers.append(len(self))
+        data = paragraph.encode('utf-8')
+        self._file.seek(self._offsets[-1])
+        self._file.write(data)
+        self._offsets.append(self._offsets[-1] + len(data))
+
+    def __getitem__(self, number):
+        start = self._offsets[number]
+        self._file.seek(start)
+        paragraph = self._file.read(self._offsets[number + 1] - start).decode('utf-8')
+        if self.is_heading(number):
+            return ChapterHeading(paragraph)
+        return paragraph
+
+    def is_heading(self, number):
+        i = bisect_left(self._chapter_numbers, number)
+        return i < len(self._chapter_numbers) and self._chapter_numbers[i] == number
+
+    def __iter__(self):
+        for number in range(len(self)):
+            yield self[number]
+
+    def text(self):
+        return '\n\n'.join(self)
+
+    def close(self):
+        self._file.close()
+
+
+class StoryViewer(ttk.Frame):
+    # Read-only story display that keeps only a window of paragraphs in its
+    # Text widget and loads neighbours from the ParagraphIndex as the user
+    # scrolls. The scrollbar spans the whole story, so dragging it or jumping
+    # to a chapter reloads the window around the target paragraph. Layout,
+    # scrolling and font changes therefore cost the same however long the
+    # story is.
+    #
+    # Each paragraph occupies one block, "\n" + text + "\n", whose start is
+    # marked 'vp<number>'; the blank line between blocks spaces the paragraphs.
+    def __init__(self, parent, font_family="Playfair Display", font_size=12, **text_options):
+        super().__init__(parent)
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(0, weight=1)
+
+        # One named font shared by the widget and its tags: resizing it only
+        # re-lays out the paragraphs currently loaded
+        self.font = tkfont.Font(family=font_family, size=font_size)
+        self.text = tk.Text(self, wrap=tk.WORD, font=self.font,
+                            yscrollcommand=self._on_text_scroll, **text_options)
+        self.text.grid(row=0, column=0, sticky="nsew")
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self._on_scrollbar)
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+
+        self.text.tag_configure('body', spacing1=10, spacing2=2, spacing3=10, justify='center')
+        self.text.tag_configure('typing', font=self.font)
+        self.text.tag_configure('heading', font=self.font, underline=True)
+
+        self.index = ParagraphIndex()
+        self.first = 0
+        self.last = 0
+        # Bumped whenever the newest displayed paragraph may have been removed
+        # or rebuilt, so the typewriter knows its marks are stale
+        self.generation = 0
+        self._adjust_id = None
+
+    @property
+    def following(self):
+        # True while the window reaches the newest paragraph, so new
+        # paragraphs are shown as they arrive
+        return self.last == len(self.index)
+
+    # Content
+
+    def clear(self):
+        self._cancel_adjust()
+        self._unload()
+        self.index.close()
+        self.index = ParagraphIndex()
+        self.first = self.last = 0
+        self.scrollbar.set(0.0, 1.0)
+
+    def append(self, paragraph, tags=('body',)):
+        # Add a paragraph to the story. Returns the widget index where its
+        # text starts if it was displayed, or None if the user is reading
+        # elsewhere and it was only indexed.
+        following = self.following
+        number = len(self.index)
+        self.index.append(paragraph)
+        if not following:
+            self._update_scrollbar()
+            return None
+        if isinstance(paragraph, ChapterHeading):
+            tags = tags + ('heading',)
+        start = self._append_block(number, paragraph, tags)
+        self.last = number + 1
+        # While following, drop the oldest paragraphs once the window is full
+        while self.last - self.first > WINDOW_PARAGRAPHS:
+            self._drop_first()
+        return start
+
+    def paragraphs(self):
+        return iter(self.index)
+
+    def get_text(self):
+        return self.index.text()
+
+    # Navigation
+
+    def chapters(self):
+        return self.index.chapters
+
+    def jump_to(self, number):
+        # Show paragraph `number` at the top of the view, reloading the
+        # window around it if it is not already loaded
+        total = len(self.index)
+        if not total:
+            return
+        number = max(0, min(number, total - 1))
+        if not self.first <= number < self.last:
+            self._load_window(max(0, number - MARGIN_PARAGRAPHS))
+        self.text.yview(self._block_start(number))
+        self._update_scrollbar()
+
+    def set_font_size(self, size):
+        # Keep the paragraph at the top of the view in place across the re-layout
+        top = self._top_paragraph()
+        self.font.configure(size=size)
+        if top is not None:
+            self.text.yview(self._block_start(top))
+
+    def see_end(self):
+        if self.following:
+            self.text.see(tk.END)
+
+    # Window management
+
+    def _block_start(self, number):
+        return f'vp{number}'
+
+    def _block_tags(self, paragraph):
+        return ('body', 'heading') if isinstance(paragraph, ChapterHeading) else ('body',)
+
+    def _append_block(self, number, paragraph, tags):
+        mark = self._block_start(number)
+        self.text.mark_set(mark, 'end-1c')
+        self.text.mark_gravity(mark, tk.LEFT)
+        self.text.insert(tk.END, '\n', ('body',))
+        start = self.text.index('end-1c')
+        self.text.insert(tk.END, paragraph, tags, '\n', ('body',))
+        return start
+
+    def _prepend_block(self, number, paragraph, tags):
+        # The old first mark sits at 1.0 with left gravity, so it stays put
+        # when text goes in ahead of it and has to be moved past the new block
+        self.text.insert('1.0', '\n', ('body',), paragraph, tags, '\n', ('body',))
+        self.text.mark_set(self._block_start(number + 1), f'1.0 + {len(paragraph) + 2} chars')
+        self.text.mark_set(self._block_start(number), '1.0')
+        self.text.mark_gravity(self._block_start(number), tk.LEFT)
+
+    def _drop_first(self):
+        self.text.delete('1.0', self._block_start(self.first + 1))
+        self.text.mark_unset(self._block_start(self.first))
+        self.first += 1
+
+    def _drop_last(self):
+        self.generation += 1
+        self.text.delete(self._block_start(self.last - 1), 'end-1c')
+        self.text.mark_unset(self._block_start(self.last - 1))
+        self.last -= 1
+
+    def _unload(self):
+        self.generation += 1
+        self.text.delete('1.0', tk.END)
+        for number in range(self.first, self.last):
+            self.text.mark_unset(self._block_start(number))
+
+    def _load_window(self, first):
+        self._unload()
+        self.first = self.last = first
+        self._extend_end(min(len(self.index), first + WINDOW_PARAGRAPHS))
+
+    def _extend_end(self, stop):
+        for number in range(self.last, stop):
+            paragraph = self.index[number]
+            self._append_block(number, paragraph, self._block_tags(paragraph))
+        self.last = max(self.last, stop)
+
+    def _extend_start(self, start):
+        for number in range(self.first - 1, start - 1, -1):
+            paragraph = self.index[number]
+            self._prepend_block(number, paragraph, self._block_tags(paragraph))
+        self.first = min(self.first, start)
+
+    def _top_paragraph(self):
+        if self.first == self.last:
+            return None
+        top = self.text.index('@0,0')
+        for number in range(self.first, self.last):
+            if self.text.compare(self._block_start(number), '>', top):
+                return max(self.first, number - 1)
+        return self.last - 1
+
+    def _on_text_scroll(self, top, bottom):
+        self._update_scrollbar(float(top), float(bottom))
+        # Shifting the window from inside the widget's own scroll callback
+        # would re-enter it, so the adjustment runs once the view settles
+        if self._adjust_id is None:
+            self._adjust_id = self.after_idle(self._adjust_window)
+
+    def _cancel_adjust(self):
+        if self._adjust_id is not None:
+            self.after_cancel(self._adjust_id)
+            self._adjust_id = None
+
+    def _adjust_window(self):
+        self._adjust_id = None
+        top, bottom = (float(f) for f in self.text.yview())
+        total = len(self.index)
+        if top < EDGE and self.first > 0:
+            anchor = self._top_paragraph()
+            self._extend_start(max(0, self.first - MARGIN_PARAGRAPHS))
+            while self.last - self.first > WINDOW_PARAGRAPHS:
+                self._drop_last()
+            if anchor is not None:
+                self.text.yview(self._block_start(anchor))
+        elif bottom > 1 - EDGE and self.last < total:
+            anchor = self._top_paragraph()
+            self._extend_end(min(total, self.last + MARGIN_PARAGRAPHS))
+            while self.last - self.first > WINDOW_PARAGRAPHS:
+                self._drop_first()
+            if anchor is not None:
+                self.text.yview(self._block_start(anchor))
+        self._update_scrollbar()
+
+    def _update_scrollbar(self, top=None, bottom=None):
+        # Map the widget's view of the window onto the whole story
+        total = len(self.index)
+        if not total or self.first == self.last:
+            self.scrollbar.set(0.0, 1.0)
+            return
+        if top is None:
+            top, bottom = (float(f) for f in self.text.yview())
+        loaded = self.last - self.first
+        self.scrollbar.set((self.first + top * loaded) / total,
+                           (self.first + bottom * loaded) / total)
+
+    def _on_scrollbar(self, action, *args):
+        if action == 'moveto':
+            total = len(self.index)
+            if total and self.first < self.last:
+                self.jump_to(int(float(args[0]) * total))
+        else:
+            self.text.yview(action, *args)
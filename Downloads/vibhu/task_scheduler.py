@@ -0,0 +1,141 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# How often the Tk thread drains callbacks queued by worker threads
+UI_POLL_MS = 15
+
+
+class TaskCancelled(Exception):
+    pass
+
+
+class CancelToken:
+    # Shared between a task and whoever may cancel it. Work running on a
+    # thread polls `cancelled` (or calls check()); work living on the Tk
+    # thread registers on_cancel callbacks instead.
+    def __init__(self, kind):
+        self.kind = kind
+        self._event = threading.Event()
+        self._callbacks = []
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def check(self):
+        if self._event.is_set():
+            raise TaskCancelled(self.kind)
+
+    def on_cancel(self, callback):
+        if self._event.is_set():
+            callback()
+        else:
+            self._callbacks.append(callback)
+
+    def cancel(self):
+        if self._event.is_set():
+            return
+        self._event.set()
+        callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback()
+
+
+class TaskScheduler:
+    # Owns the app's background work. Each kind of task ("typing", "speech",
+    # "background", "export", ...) has at most one live token: starting a new
+    # one cancels the old. Thread work runs on one worker per kind, so a
+    # superseded task never races its replacement, and every result or UI
+    # update is handed back through a queue that only the Tk thread drains.
+    def __init__(self, root, poll_ms=UI_POLL_MS):
+        self.root = root
+        self.poll_ms = poll_ms
+        self._ui_queue = queue.SimpleQueue()
+        self._tokens = {}
+        self._lanes = {}
+        self._after_id = None
+        self._closed = False
+        self._drain()
+
+    def claim(self, kind):
+        # New token for `kind`, cancelling whatever held it before. Must be
+        # called on the Tk thread.
+        previous = self._tokens.get(kind)
+        if previous is not None:
+            previous.cancel()
+        token = self._tokens[kind] = CancelToken(kind)
+        return token
+
+    def cancel(self, kind):
+        token = self._tokens.pop(kind, None)
+        if token is not None:
+            token.cancel()
+
+    def active(self, kind):
+        token = self._tokens.get(kind)
+        return token is not None and not token.cancelled
+
+    def submit(self, kind, work, on_done=None, on_error=None):
+        # Run work(token) off the Tk thread. on_done(result) or
+        # on_error(exception) runs on the Tk thread, and only if the task was
+        # not cancelled or superseded in the meantime.
+        token = self.claim(kind)
+        lane = self._lanes.get(kind)
+        if lane is None:
+            lane = self._lanes[kind] = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix=f"task-{kind}")
+        lane.submit(self._run, token, work, on_done, on_error)
+        return token
+
+    def _run(self, token, work, on_done, on_error):
+        if token.cancelled:
+            return
+        try:
+            result = work(token)
+        except TaskCancelled:
+            return
+        except Exception as e:
+            if on_error is None:
+                print(f"Background task '{token.kind}' failed: {e}")
+            else:
+                self.call_soon(self._deliver, token, on_error, e)
+            return
+        if on_done is not None:
+            self.call_soon(self._deliver, token, on_done, result)
+
+    def _deliver(self, token, callback, value):
+        if not token.cancelled:
+            if self._tokens.get(token.kind) is token:
+                del self._tokens[token.kind]
+            callback(value)
+
+    def call_soon(self, callback, *args):
+        # Safe from any thread: run callback(*args) on the Tk thread
+        self._ui_queue.put((callback, args))
+
+    def _drain(self):
+        self._after_id = None
+        while True:
+            try:
+                callback, args = self._ui_queue.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                callback(*args)
+            except Exception as e:
+                print(f"Error in UI callback: {e}")
+        if not self._closed:
+            self._after_id = self.root.after(self.poll_ms, self._drain)
+
+    def shutdown(self):
+        self._closed = True
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+        for token in list(self._tokens.values()):
+            token.cancel()
+        self._tokens.clear()
+        for lane in self._lanes.values():
+            lane.shutdown(wait=False, cancel_futures=True)
+        self._lanes.clear()
@@ -0,0 +1,184 @@
+import sys
+from functools import lru_cache
+from string import Formatter
+
+# Fields a template may reference, mirroring the story_data dict built by the GUI
+CHARACTER_FIELDS = ("name", "personality", "status")
+STORY_SCHEMA = {
+    "heroine": CHARACTER_FIELDS,
+    "hero": CHARACTER_FIELDS,
+    "setting": None,
+    "theme": None,
+}
+
+# Custom conversion: {hero[status]!l} renders the lowercased value
+CONVERSIONS = {None: None, "l": "lower"}
+
+# Paragraph order for a themed story; twist and resolution come from the theme
+STORY_OUTLINE = ("opening", "meeting", "twist", "courtship", "resolution", "ending")
+DEFAULT_OUTLINE = ("opening", "meeting", "courtship", "ending")
+PARAGRAPH_SEPARATOR = "\n\n"
+
+
+class TemplateError(ValueError):
+    pass
+
+
+# Vocabulary values repeat endlessly at batch scale, so lowercase each one once
+_lower = lru_cache(maxsize=4096)(str.lower)
+
+
+def _make_accessor(root, key, conversion):
+    if key is None:
+        if conversion == "lower":
+            return lambda data: _lower(data[root])
+        return lambda data: data[root]
+    if conversion == "lower":
+        return lambda data: _lower(data[root][key])
+    return lambda data: data[root][key]
+
+
+def parse_field(field_name, where):
+    # "hero[name]" -> ("hero", "name"), "setting" -> ("setting", None)
+    root, sep, rest = field_name.partition("[")
+    if root not in STORY_SCHEMA:
+        raise TemplateError(f"{where}: unknown field '{field_name}'")
+    allowed = STORY_SCHEMA[root]
+    if not sep:
+        if allowed is not None:
+            raise TemplateError(f"{where}: '{root}' needs a key, e.g. {{{root}[name]}}")
+        return root, None
+    if not rest.endswith("]") or "[" in rest[:-1]:
+        raise TemplateError(f"{where}: malformed field '{field_name}'")
+    key = rest[:-1]
+    if allowed is None or key not in allowed:
+        raise TemplateError(f"{where}: unknown field '{field_name}'")
+    return root, key
+
+
+class SlotTable:
+    # Assigns one slot per distinct (root, key, conversion) used by any template,
+    # so a story_data dict is read and converted once no matter how many
+    # templates refer to the same value.
+    def __init__(self):
+        self.slots = {}
+        self.accessors = []
+
+    def slot_for(self, root, key, conversion):
+        spec = (root, key, conversion)
+        index = self.slots.get(spec)
+        if index is None:
+            index = len(self.accessors)
+            self.slots[spec] = index
+            self.accessors.append(_make_accessor(root, key, conversion))
+        return index
+
+    def prepare(self, data):
+        return tuple([accessor(data) for accessor in self.accessors])
+
+
+class CompiledTemplate:
+    def __init__(self, source, segments, slots):
+        self.source = source
+        # Static text interleaved with slot indices, e.g. ("Miss ", 3, ", a ", 4)
+        self.segments = segments
+        self.slots = slots
+        # Re-emit the template as a positional format string so rendering is a
+        # single C-level str.format call over the prepared values
+        fmt = "".join(
+            s.replace("{", "{{").replace("}", "}}") if isinstance(s, str) else f"{{{s}}}"
+            for s in segments
+        )
+        self._format = sys.intern(fmt).format
+
+    def render(self, values):
+        return self._format(*values)
+
+
+def compile_template(source, slot_table, where="template"):
+    segments = []
+    for literal, field_name, format_spec, conversion in Formatter().parse(source):
+        if literal:
+            segments.append(sys.intern(literal))
+        if field_name is None:
+            continue
+        if format_spec:
+            raise TemplateError(f"{where}: format specs are not supported ('{field_name}')")
+        if conversion not in CONVERSIONS:
+            raise TemplateError(f"{where}: unknown conversion '!{conversion}'")
+        root, key = parse_field(field_name, where)
+        segments.append(slot_table.slot_for(root, key, CONVERSIONS[conversion]))
+    slots = tuple(s for s in segments if not isinstance(s, str))
+    return CompiledTemplate(source, tuple(segments), slots)
+
+
+class StoryTemplates:
+    # Every template in plots.json, compiled once at load time
+    def __init__(self, plot_elements):
+        self.slot_table = SlotTable()
+        try:
+            self.twists = self._compile_list(plot_elements["twists"], "twists")
+            self.resolutions = self._compile_list(plot_elements["resolutions"], "resolutions")
+            outline = plot_elements["outline"]
+        except KeyError as e:
+            raise TemplateError(f"plots.json is missing {e}") from None
+
+        self.paragraphs = {}
+        for part in DEFAULT_OUTLINE:
+            if part not in outline:
+                raise TemplateError(f"plots.json outline is missing '{part}'")
+            self.paragraphs[part] = compile_template(
+                outline[part], self.slot_table, f"outline.{part}")
+
+        # Optional building blocks for long-form stories
+        chapters = plot_elements.get("chapters", {})
+        self.chapter_openings = self._compile_list(chapters.get("openings", []), "chapters.openings")
+        self.chapter_scenes = self._compile_list(chapters.get("scenes", []), "chapters.scenes")
+
+        self.default_story = self._compile_story(
+            [self.paragraphs[part] for part in DEFAULT_OUTLINE])
+
+        self.theme_stories = {}
+        for theme, choice in plot_elements.get("themes", {}).items():
+            twist = self._pick(self.twists, choice, "twist", theme)
+            resolution = self._pick(self.resolutions, choice, "resolution", theme)
+            parts = {"twist": twist, "resolution": resolution, **self.paragraphs}
+            self.theme_stories[theme] = self._compile_story(
+                [parts[part] for part in STORY_OUTLINE])
+
+    def _compile_list(self, sources, name):
+        return [compile_template(source, self.slot_table, f"{name}[{i}]")
+                for i, source in enumerate(sources)]
+
+    def _pick(self, templates, choice, kind, theme):
+        index = choice.get(kind)
+        if not isinstance(index, int) or not 0 <= index < len(templates):
+            raise TemplateError(f"themes.{theme}: invalid {kind} index {index!r}")
+        return templates[index]
+
+    def _compile_story(self, paragraphs):
+        # Join the paragraphs into a single template so a whole story renders
+        # with one format call
+        segments = []
+        for i, paragraph in enumerate(paragraphs):
+            if i:
+                segments.append(PARAGRAPH_SEPARATOR)
+            segments.extend(paragraph.segments)
+        merged = []
+        for segment in segments:
+            if merged and isinstance(segment, str) and isinstance(merged[-1], str):
+                merged[-1] = sys.intern(merged[-1] + segment)
+            else:
+                merged.append(segment)
+        slots = tuple(s for s in merged if not isinstance(s, str))
+        return CompiledTemplate(None, tuple(merged), slots)
+
+    def prepare(self, data):
+        return self.slot_table.prepare(data)
+
+    def render_story(self, data):
+        template = self.theme_stories.get(data["theme"], self.default_story)
+        return template.render(self.prepare(data))
+
+    def render_default(self, data):
+        return self.default_story.render(self.prepare(data))
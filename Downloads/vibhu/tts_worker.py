@@ -0,0 +1,178 @@
+import queue
+import re
+import threading
+
+from lazy_import import LazyModule
+
+pyttsx3 = LazyModule('pyttsx3')
+
+# A sentence runs up to its closing punctuation (plus any closing quotes or
+# brackets); trailing text without punctuation counts as a final sentence
+SENTENCE_RE = re.compile(r'[^.!?]+(?:[.!?]+[\'")\]]*|$)|[.!?]+')
+
+# Titles that end in a full stop without ending the sentence
+ABBREVIATIONS = frozenset(["Mr.", "Mrs.", "Ms.", "Dr.", "St.", "Col.", "Capt.", "Rev."])
+
+DEFAULT_RATE = 150
+DEFAULT_VOICE_HINT = "female"
+
+
+def split_sentences(text):
+    # Lazily yield sentences so speech can start before the text is scanned
+    pending = ''
+    for match in SENTENCE_RE.finditer(text):
+        sentence = ' '.join(match.group().split())
+        if not sentence:
+            continue
+        if pending:
+            sentence = f"{pending} {sentence}"
+        if sentence.rsplit(' ', 1)[-1] in ABBREVIATIONS:
+            pending = sentence
+            continue
+        pending = ''
+        yield sentence
+    if pending:
+        yield pending
+
+
+def resolve_voice(engine, hint):
+    # First installed voice whose name contains the hint, or None for default
+    hint = hint.lower()
+    for voice in engine.getProperty('voices'):
+        if hint in (voice.name or '').lower():
+            return voice.id
+    return None
+
+
+class TTSWorker(threading.Thread):
+    # Owns the one pyttsx3 engine for the life of the app.
+    #
+    # Text is spoken a sentence at a time; stop, pause, resume and rate changes
+    # are picked up between sentences. Stop also interrupts the sentence being
+    # spoken from pyttsx3's started-word callback, which runs on this thread.
+    #
+    # on_event(event, detail) is called from the worker thread with one of
+    # "ready", "started", "finished" or "error".
+    def __init__(self, rate=DEFAULT_RATE, voice_hint=DEFAULT_VOICE_HINT, on_event=None):
+        super().__init__(name="tts-worker", daemon=True)
+        self.on_event = on_event
+        self.voice_hint = voice_hint
+        self.voice_id = None
+        self.available = False
+        self.ready = threading.Event()
+
+        self._commands = queue.Queue()
+        self._lock = threading.Lock()
+        self._resume = threading.Event()
+        self._resume.set()
+        self._rate = rate
+        self._generation = 0
+        self._speaking = None
+        self._engine = None
+
+    # Public API, safe to call from any thread
+
+    @property
+    def speaking(self):
+        return self._speaking is not None
+
+    @property
+    def paused(self):
+        return not self._resume.is_set()
+
+    def speak(self, text):
+        # Replaces whatever is currently being read
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+        self._resume.set()
+        self._commands.put(('speak', text, generation))
+
+    def stop(self):
+        with self._lock:
+            self._generation += 1
+        self._resume.set()
+
+    def pause(self):
+        self._resume.clear()
+
+    def resume(self):
+        self._resume.set()
+
+    def set_rate(self, rate):
+        with self._lock:
+            self._rate = int(rate)
+
+    def shutdown(self):
+        self.stop()
+        self._commands.put(('shutdown',))
+
+    # Worker thread
+
+    def run(self):
+        try:
+            engine = pyttsx3.init()
+            # Voice lookup scans every installed voice, so do it exactly once
+            self.voice_id = resolve_voice(engine, self.voice_hint)
+            if self.voice_id:
+                engine.setProperty('voice', self.voice_id)
+            engine.connect('started-word', self._on_word)
+            self._engine = engine
+            self.available = True
+        except Exception as e:
+            self.ready.set()
+            self._notify('error', e)
+            return
+        self.ready.set()
+        self._notify('ready', self.voice_id)
+
+        applied_rate = None
+        while True:
+            command = self._commands.get()
+            if command[0] == 'shutdown':
+                break
+            _, text, generation = command
+            applied_rate = self._speak(engine, text, generation, applied_rate)
+
+        try:
+            engine.stop()
+        except Exception:
+            pass
+
+    def _current(self, generation):
+        with self._lock:
+            return generation == self._generation
+
+    def _speak(self, engine, text, generation, applied_rate):
+        if not self._current(generation):
+            return applied_rate
+        self._speaking = generation
+        self._notify('started', None)
+        try:
+            for sentence in split_sentences(text):
+                # Honor pause between sentences; stop/speak also wake us up
+                while not self._resume.wait(0.1):
+                    if not self._current(generation):
+                        break
+                if not self._current(generation):
+                    break
+                rate = self._rate
+                if rate != applied_rate:
+                    engine.setProperty('rate', rate)
+                    applied_rate = rate
+                engine.say(sentence)
+                engine.runAndWait()
+        except Exception as e:
+            self._notify('error', e)
+        finally:
+            self._speaking = None
+            self._notify('finished', None)
+        return applied_rate
+
+    def _on_word(self, name, location, length):
+        if self._speaking is not None and not self._current(self._speaking):
+            self._engine.stop()
+
+    def _notify(self, event, detail):
+        if self.on_event:
+            self.on_event(event, detail)
@@ -0,0 +1,175 @@
+import time
+
+# Characters-per-second presets offered in the Settings tab (0 = instant)
+TYPING_SPEEDS = {
+    "Slow": 25,
+    "Normal": 50,
+    "Fast": 120,
+    "Instant": 0,
+}
+
+# Punctuation costs more "characters" of time so sentences still breathe
+SENTENCE_END_COST = 5.0
+CLAUSE_END_COST = 2.5
+
+
+def char_cost(char):
+    if char in '.!?':
+        return SENTENCE_END_COST
+    if char in ',;:':
+        return CLAUSE_END_COST
+    return 1.0
+
+
+class TypewriterRenderer:
+    # Reveals a story in a StoryViewer from the Tk event loop.
+    #
+    # Each paragraph is appended once, already carrying the 'body' tag, under an
+    # elided 'tw_hidden' tag. Every frame removes 'tw_hidden' from the next run
+    # of characters, so a frame costs one tag_remove regardless of how many
+    # characters it reveals and no text is re-tagged afterwards. If the reader
+    # scrolls away from the end, paragraphs go straight into the viewer's index
+    # and typing carries on unseen.
+    def __init__(self, viewer, cps=50, frame_ms=16, budget_ms=8, on_done=None):
+        self.viewer = viewer
+        self.widget = viewer.text
+        self.cps = cps
+        self.frame_ms = frame_ms
+        self.budget = budget_ms / 1000.0
+        self.on_done = on_done
+        self._after_id = None
+        self._paragraphs = None
+        self._current = ''
+        self._pos = 0
+        self._credit = 0.0
+        self._last_tick = 0.0
+        self._generation = None
+
+        self.widget.tag_configure('tw_hidden', elide=True)
+
+    @property
+    def running(self):
+        return self._paragraphs is not None
+
+    def set_rate(self, cps):
+        self.cps = cps
+
+    def start(self, paragraphs):
+        # Accepts a whole story or any iterable of paragraphs
+        self.cancel()
+        if isinstance(paragraphs, str):
+            paragraphs = paragraphs.split('\n\n')
+        self.viewer.clear()
+        self._paragraphs = iter(paragraphs)
+        self._current = ''
+        self._pos = 0
+        self._credit = 0.0
+        self._last_tick = time.perf_counter()
+        self._schedule(0)
+
+    def skip_to_end(self):
+        if self.running:
+            if self._after_id is not None:
+                self.widget.after_cancel(self._after_id)
+                self._after_id = None
+            self._reveal_rest_of_paragraph()
+            self._flush()
+
+    def cancel(self):
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+            self._after_id = None
+        self._paragraphs = None
+
+    def _schedule(self, delay):
+        self._after_id = self.widget.after(delay, self._tick)
+
+    def _next_paragraph(self, hidden=True):
+        paragraph = next(self._paragraphs, None)
+        if paragraph is None:
+            return False
+        tags = ('body', 'typing', 'tw_hidden') if hidden else ('body', 'typing')
+        start = self.viewer.append(paragraph, tags)
+        self._pos = 0
+        if start is None:
+            # Not on screen, so there is nothing to reveal
+            self._current = ''
+            return True
+        self._generation = self.viewer.generation
+        self.widget.mark_set('tw_reveal', start)
+        self.widget.mark_gravity('tw_reveal', 'left')
+        self._current = paragraph if hidden else ''
+        return True
+
+    def _reveal(self, count):
+        end = f'tw_reveal + {count} chars'
+        self.widget.tag_remove('tw_hidden', 'tw_reveal', end)
+        self.widget.mark_set('tw_reveal', end)
+        self._pos += count
+
+    def _reveal_rest_of_paragraph(self):
+        remaining = len(self._current) - self._pos
+        if remaining > 0 and self.viewer.generation == self._generation:
+            self._reveal(remaining)
+        self._current = ''
+        self._pos = 0
+
+    def _tick(self):
+        self._after_id = None
+        if self.viewer.generation != self._generation:
+            # The paragraph being typed was scrolled out of the viewer or
+            # reloaded fully shown, so there is nothing left to reveal
+            self._current = ''
+        if not self.cps:
+            self._reveal_rest_of_paragraph()
+            self._flush()
+            return
+
+        now = time.perf_counter()
+        self._credit += (now - self._last_tick) * self.cps
+        self._last_tick = now
+        deadline = now + self.budget
+
+        while time.perf_counter() < deadline:
+            if self._pos >= len(self._current):
+                if not self._next_paragraph():
+                    self._finish()
+                    return
+                continue
+
+            # Spend the accumulated credit on as many characters as it covers
+            text = self._current
+            pos = start = self._pos
+            credit = self._credit
+            while pos < len(text):
+                cost = char_cost(text[pos])
+                if credit < cost:
+                    break
+                credit -= cost
+                pos += 1
+            self._credit = credit
+            if pos > start:
+                self._reveal(pos - start)
+            if pos < len(text):
+                break
+
+        if self.viewer.generation == self._generation:
+            self.widget.see('tw_reveal')
+        self._schedule(self.frame_ms)
+
+    def _flush(self):
+        # Insert what is left visibly, yielding to the event loop whenever the
+        # frame budget runs out so very long stories never freeze the window
+        deadline = time.perf_counter() + self.budget
+        while time.perf_counter() < deadline:
+            if not self._next_paragraph(hidden=False):
+                self._finish()
+                return
+        self.viewer.see_end()
+        self._after_id = self.widget.after(1, self._flush)
+
+    def _finish(self):
+        self._paragraphs = None
+        self.viewer.see_end()
+        if self.on_done:
+            self.on_done()
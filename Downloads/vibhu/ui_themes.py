@@ -0,0 +1,148 @@
+# Declarative ttk theme registry. Each entry names the ttkthemes base theme
+# and the style options layered on top of it; colours may refer to the
+# entry's palette as "$name". Definitions are compiled once into a Tcl script
+# (a "snapshot"), so switching themes is a single interpreter call and Tk
+# re-lays out the window once, after every style has changed.
+
+DEFAULT_UI_THEME = "clearlooks"
+
+PLAIN_STYLES = {
+    style: {"font": ("Helvetica", 10)}
+    for style in ("TLabel", "TButton", "TCheckbutton", "TCombobox",
+                  "TNotebook.Tab", "TLabelframe.Label")
+}
+
+ADAPTA_PALETTE = {
+    "primary": "#FF6B6B",  # Coral red
+    "secondary": "#4ECDC4",  # Turquoise
+    "accent": "#FFD166",  # Yellow
+    "background": "#FFFFFF",  # Pure white background
+    "text": "#000000",  # Black text for maximum contrast
+    "button_bg": "#4ECDC4",  # Turquoise for button background
+    "button_text": "#000000",  # Black text for buttons
+    "button_hover": "#FFD166",  # Yellow hover state
+    "button_hover_text": "#000000",  # Black text for button hover
+    "tab_bg": "#4ECDC4",  # Turquoise
+    "tab_selected": "#FFD166",  # Yellow
+    "tab_text": "#000000",  # Black text for tabs
+    "combo_bg": "#FFFFFF",  # White background for combo
+    "combo_text": "#000000",  # Black text for combo
+    "scale_bg": "#4ECDC4",  # Turquoise
+    "check_bg": "#FFFFFF",  # White background
+    "check_text": "#000000",  # Black text
+    "label_frame_text": "#000000",  # Black text for frame labels
+}
+
+ADAPTA_STYLES = {
+    "TFrame": {"background": "$background"},
+    "TLabel": {"background": "$background", "foreground": "$text",
+               "font": ("Comic Sans MS", 11, "bold")},
+    "TLabelframe": {"background": "$background"},
+    "TLabelframe.Label": {"foreground": "$label_frame_text", "background": "$background",
+                          "font": ("Comic Sans MS", 11, "bold")},
+    "TButton": {"background": "$button_bg", "foreground": "$button_text",
+                "font": ("Comic Sans MS", 11, "bold"), "padding": 10},
+    "TCombobox": {"background": "$combo_bg", "foreground": "$combo_text",
+                  "selectbackground": "$accent", "selectforeground": "$text",
+                  "fieldbackground": "$combo_bg", "font": ("Comic Sans MS", 10)},
+    "TCheckbutton": {"background": "$check_bg", "foreground": "$check_text",
+                     "font": ("Comic Sans MS", 11)},
+    "Horizontal.TScale": {"background": "$background", "troughcolor": "$scale_bg"},
+    "TNotebook": {"background": "$background"},
+    "TNotebook.Tab": {"background": "$tab_bg", "foreground": "$tab_text",
+                      "padding": (10, 5), "font": ("Comic Sans MS", 11, "bold")},
+    "TEntry": {"fieldbackground": "$combo_bg", "foreground": "$combo_text",
+               "font": ("Comic Sans MS", 10)},
+    "Vertical.TScrollbar": {"background": "$tab_bg", "troughcolor": "$background",
+                            "arrowcolor": "$text"},
+    "Horizontal.TScrollbar": {"background": "$tab_bg", "troughcolor": "$background",
+                              "arrowcolor": "$text"},
+}
+
+ADAPTA_MAPS = {
+    "TButton": {
+        "background": [("active", "$button_hover"), ("pressed", "$button_hover")],
+        "foreground": [("active", "$button_hover_text"), ("pressed", "$button_hover_text")],
+    },
+    "TNotebook.Tab": {
+        "background": [("selected", "$tab_selected")],
+        "foreground": [("selected", "$tab_text")],
+    },
+}
+
+UI_THEMES = {
+    "clearlooks": {"base": "clearlooks", "styles": PLAIN_STYLES},
+    "equilux": {"base": "equilux", "styles": PLAIN_STYLES},
+    "adapta": {"base": "adapta", "palette": ADAPTA_PALETTE,
+               "styles": ADAPTA_STYLES, "maps": ADAPTA_MAPS},
+    "arc": {"base": "arc", "styles": PLAIN_STYLES},
+}
+
+_TCL_SPECIAL = set(' \t\n{}[]$";\\')
+
+
+def tcl_word(value):
+    # Quote a value as one Tcl word; tuples become Tcl lists
+    if isinstance(value, (tuple, list)):
+        value = ' '.join(tcl_word(item) for item in value)
+    value = str(value)
+    if value and not _TCL_SPECIAL.intersection(value):
+        return value
+    if value.count('{') != value.count('}') or value.endswith('\\'):
+        raise ValueError(f"cannot quote {value!r} for a style snapshot")
+    return '{' + value + '}'
+
+
+def _resolve(value, palette, where):
+    if isinstance(value, str) and value.startswith('$'):
+        try:
+            return palette[value[1:]]
+        except KeyError:
+            raise ValueError(f"{where}: unknown palette colour {value!r}") from None
+    return value
+
+
+def compile_theme(name, definition):
+    # Build the snapshot: one Tcl script that selects the base theme and sets
+    # every style option and state map in order
+    palette = definition.get("palette", {})
+    lines = [f"ttk::setTheme {tcl_word(definition['base'])}"]
+    for style, options in definition.get("styles", {}).items():
+        words = []
+        for option, value in options.items():
+            words += [f"-{option}", tcl_word(_resolve(value, palette, f"{name}.{style}"))]
+        lines.append(f"ttk::style configure {tcl_word(style)} {' '.join(words)}")
+    for style, options in definition.get("maps", {}).items():
+        words = []
+        for option, states in options.items():
+            spec = []
+            for state, value in states:
+                spec += [state, _resolve(value, palette, f"{name}.{style}")]
+            words += [f"-{option}", tcl_word(spec)]
+        lines.append(f"ttk::style map {tcl_word(style)} {' '.join(words)}")
+    return '\n'.join(lines)
+
+
+class ThemeSwitcher:
+    # Applies compiled snapshots to a Tk root
+    def __init__(self, root, themes=UI_THEMES):
+        self.root = root
+        self.snapshots = {name: compile_theme(name, definition)
+                          for name, definition in themes.items()}
+        self.active = None
+
+    def names(self):
+        return list(self.snapshots)
+
+    def apply(self, name):
+        # Returns False when there was nothing to do
+        if name == self.active:
+            return False
+        snapshot = self.snapshots.get(name)
+        if snapshot is None:
+            raise KeyError(f"unknown theme '{name}'")
+        # A single eval: no event processing, and so no layout pass, happens
+        # until every style has been updated
+        self.root.tk.eval(snapshot)
+        self.active = name
+        return True